@@ -0,0 +1,460 @@
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from store import STATUS_ORDER, TERMINAL_STATUSES, CallRegistry, Update
+import asyncio
+import logging
+import threading
+import time
+import numpy as np
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Status column codes; statuses we do not know count as "other"
+STATUSES = ("registered", "ongoing", "ended", "error", "not_connected", "other")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+STATUS_LOOKUP = {**STATUS_CODES, None: -1}
+# Same forward-only rule as the registry: a late call_started never undoes call_ended
+STATUS_RANK = np.array([STATUS_ORDER.get(status, 0) for status in STATUSES], np.int8)
+TERMINAL_CODES = np.array([status in TERMINAL_STATUSES for status in STATUSES])
+
+# Duration histogram: 1%-wide log-spaced bins from 100 ms to 24 h (plus an
+# underflow and an overflow bin), so percentiles are within 0.5%
+DURATION_EDGES = np.geomspace(100, 86_400_000, num=1375)
+BIN_VALUES = np.concatenate((
+    DURATION_EDGES[:1], np.sqrt(DURATION_EDGES[:-1] * DURATION_EDGES[1:]), DURATION_EDGES[-1:]
+))
+PERCENTILES = (50, 90, 95, 99)
+
+# Bucket sizes in minutes, the resolution of the time series
+BUCKETS = {"minute": 1, "hour": 60, "day": 1440}
+MINUTE_MS = 60_000
+
+# Above this many rows, scatter-adds go through bincount instead of np.add.at
+BULK_ROWS = 4096
+
+# (call_id, agent_id, call_status, start_timestamp, end_timestamp, duration)
+CallRow = Tuple[str, Optional[str], Optional[str], Optional[int], Optional[int], Optional[int]]
+
+
+def scatter_add(target: np.ndarray, index: np.ndarray, values=1) -> None:
+    """target.flat[index] += values, with repeated indexes accumulating."""
+    flat = target.reshape(-1)
+    if len(index) > BULK_ROWS:
+        scalar = np.isscalar(values)
+        sums = np.bincount(index, weights=None if scalar else values, minlength=flat.size)
+        flat += (sums * values if scalar else sums).astype(flat.dtype)
+    else:
+        np.add.at(flat, index, values)
+
+
+def merge_call(old: dict, new: dict) -> dict:
+    """Two updates of one call combined the way the registry upserts them."""
+    merged = {key: new.get(key) if new.get(key) is not None else old.get(key) for key in old.keys() | new.keys()}
+    if STATUS_ORDER.get(new.get("call_status"), 0) < STATUS_ORDER.get(old.get("call_status"), 0):
+        merged["call_status"] = old.get("call_status")
+    return merged
+
+
+class CallAnalytics:
+    """
+    Call records as NumPy columns, with aggregates kept current as calls change.
+
+    One row per call: agent code, status code, start and end minute and
+    duration. Per-agent status counts, per-agent duration histograms, calls
+    started per minute and the per-minute concurrency delta (+1 at a call's
+    first minute, -1 after its last) are updated by vectorized scatter-adds
+    for each batch the registry writes: an update takes a call's old
+    contribution out and adds the new one. Queries only read the
+    aggregates (volume is a reshape-sum of starts per minute, concurrency a
+    cumulative sum of the deltas); filtering by agent scans the columns.
+
+    Rows are found by call ID: a sorted array of ID hashes for calls loaded
+    at startup (a hash match is confirmed against the row's ID, so colliding
+    IDs stay separate rows) and a dict for newer ones, merged when it grows.
+    Minutes are counted from max_days before startup; older calls are in
+    the counts and durations but not the time series.
+    """
+
+    def __init__(self, max_days: int, capacity: int = 1 << 16):
+        self._lock = threading.Lock()
+        self.loading = False
+        self.loaded = 0
+        self.updates = 0
+        self._stopping = False
+        self._pending: List[List[Update]] = []
+        # Columns, the first self.size rows in use
+        self.size = 0
+        self._agent = np.zeros(capacity, np.int32)
+        self._status = np.zeros(capacity, np.int8)
+        self._start = np.full(capacity, -1, np.int32)  # minute index, -1 unknown
+        self._end = np.full(capacity, -1, np.int32)
+        self._duration = np.full(capacity, np.nan, np.float32)  # ms
+        # Row lookup: call ID of each row, hash(call_id) sorted with its row, newer calls by ID
+        self._ids: List[str] = []
+        self._keys = np.empty(0, np.int64)
+        self._rows = np.empty(0, np.int64)
+        self._recent: Dict[str, int] = {}
+        # Agent codes; code 0 is calls without an agent
+        self._agents: List[Optional[str]] = [None]
+        self._agent_codes: Dict[str, int] = {}
+        # Aggregates
+        self._status_counts = np.zeros((64, len(STATUSES)), np.int64)
+        self._duration_hist = np.zeros((64, len(BIN_VALUES)), np.int64)
+        self._duration_sum = np.zeros(64, np.float64)
+        now_minute = int(time.time() // 60)
+        self.base_minute = now_minute - now_minute % 1440 - max_days * 1440
+        minutes = (max_days + 2) * 1440
+        self._starts = np.zeros(minutes, np.int64)
+        self._delta = np.zeros(minutes + 1, np.int64)
+
+    # Loading and updates
+
+    async def start(self, registry: CallRegistry) -> None:
+        """Load every call in the registry, then follow the batches it writes."""
+        self.loading = True
+        registry.listeners.append(self.apply)
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._load, registry)
+        except Exception as e:
+            logger.error(f"Failed to load call analytics: {str(e)}")
+        with self._lock:
+            pending, self._pending = self._pending, []
+            for batch in pending:
+                self._apply(batch)
+            self.loading = False
+        logger.info(f"Call analytics ready ({self.loaded} calls in {time.perf_counter() - started:.1f}s)")
+
+    def stop(self) -> None:
+        """Make a running load return after its current chunk."""
+        self._stopping = True
+
+    def _load(self, registry: CallRegistry) -> None:
+        keys = []
+        for chunk in registry.scan_calls(settings.analytics_load_chunk_size):
+            if self._stopping:
+                return
+            with self._lock:
+                # _columns assigns agent codes and may grow the time series
+                ids, chunk_keys, *columns = self._columns(chunk)
+                rows = self._append(ids, *columns)
+                self._contribute(rows, 1)
+            keys.append(chunk_keys)
+            self.loaded += len(chunk)
+        with self._lock:
+            self._keys = np.concatenate(keys) if keys else np.empty(0, np.int64)
+            self._rows = np.arange(len(self._keys), dtype=np.int64)
+            order = np.argsort(self._keys, kind="stable")
+            self._keys, self._rows = self._keys[order], self._rows[order]
+
+    def apply(self, batch: List[Update]) -> None:
+        """Registry listener: fold one written batch of call updates in."""
+        with self._lock:
+            if self.loading:
+                self._pending.append(batch)
+            else:
+                self._apply(batch)
+
+    def _apply(self, batch: List[Update]) -> None:
+        merged: Dict[str, dict] = {}
+        for _, _, call, _ in batch:
+            previous = merged.get(call["call_id"])
+            merged[call["call_id"]] = call if previous is None else merge_call(previous, call)
+        self.updates += len(batch)
+        ids, keys, agent, status, start, end, duration = self._columns([
+            (c["call_id"], c.get("agent_id"), c.get("call_status"), c.get("start_timestamp"),
+             c.get("end_timestamp"), c.get("duration")) for c in merged.values()
+        ])
+        rows = self._lookup(ids, keys)
+        known = rows >= 0
+
+        # Calls seen before: take out the old contribution, merge, add the new one
+        old = rows[known]
+        if len(old):
+            self._contribute(old, -1)
+            new_agent, new_status = agent[known], status[known]
+            self._agent[old] = np.where(new_agent >= 0, new_agent, self._agent[old])
+            forward = (new_status >= 0) & (STATUS_RANK[new_status] >= STATUS_RANK[self._status[old]])
+            self._status[old] = np.where(forward, new_status, self._status[old])
+            self._start[old] = np.where(start[known] >= 0, start[known], self._start[old])
+            self._end[old] = np.where(end[known] >= 0, end[known], self._end[old])
+            self._duration[old] = np.where(np.isnan(duration[known]), self._duration[old], duration[known])
+            self._close_finished(old)
+            self._contribute(old, 1)
+
+        fresh = ~known
+        if fresh.any():
+            fresh_ids = [ids[i] for i in np.flatnonzero(fresh).tolist()]
+            added = self._append(fresh_ids, agent[fresh], status[fresh], start[fresh], end[fresh], duration[fresh])
+            self._contribute(added, 1)
+            self._recent.update(zip(fresh_ids, added.tolist()))
+            if len(self._recent) > max(65536, len(self._keys) // 8):
+                self._merge_recent()
+
+    def _columns(self, calls: List[CallRow]):
+        """
+        Call IDs, their hash keys and column arrays for call rows. A missing
+        agent or status is -1 (an update without one keeps the old value),
+        missing times -1 / NaN.
+        """
+        n = len(calls)
+        call_ids, agents, statuses, starts, ends, durations = zip(*calls) if n else ((),) * 6
+        keys = np.fromiter(map(hash, call_ids), np.int64, n)
+        # Dict lookups via map() run at C speed; only misses take the slow path
+        agent = list(map(self._agent_codes.get, agents))
+        if None in agent:
+            agent = [(-1 if a is None else self._agent_code(a)) if c is None else c for a, c in zip(agents, agent)]
+        status = list(map(STATUS_LOOKUP.get, statuses))
+        if None in status:
+            status = [STATUS_CODES["other"] if c is None else c for c in status]
+        agent, status = np.array(agent, np.int32), np.array(status, np.int8)
+        start_ms = np.array(starts, dtype=np.float64)
+        end_ms = np.array(ends, dtype=np.float64)
+        duration = np.array(durations, dtype=np.float64)
+        # Retell reports duration_ms; derive it from the timestamps when missing
+        derived = np.isnan(duration) & ~np.isnan(start_ms) & ~np.isnan(end_ms)
+        duration[derived] = (end_ms - start_ms)[derived]
+        return (list(call_ids), keys, agent, status, self._minutes(start_ms), self._minutes(end_ms),
+                duration.astype(np.float32))
+
+    def _agent_code(self, agent_id: str) -> int:
+        code = self._agent_codes.get(agent_id)
+        if code is None:
+            code = self._agent_codes[agent_id] = len(self._agents)
+            self._agents.append(agent_id)
+            if code >= len(self._duration_sum):
+                self._grow_agents(2 * code)
+        return code
+
+    def _minutes(self, timestamps_ms: np.ndarray) -> np.ndarray:
+        """Minute index of each timestamp; -1 when missing or outside the time series."""
+        minutes = np.floor(timestamps_ms / MINUTE_MS) - self.base_minute
+        limit = time.time() // 60 - self.base_minute + 2 * 1440
+        valid = (minutes >= 0) & (minutes < limit)  # NaN compares False
+        index = np.where(valid, minutes, -1).astype(np.int32)
+        if valid.any():
+            self._grow_minutes(int(index.max()) + 2)
+        return index
+
+    def _close_finished(self, rows: np.ndarray) -> None:
+        """Finished calls without an end time end at start + duration, not never."""
+        open_ended = TERMINAL_CODES[self._status[rows]] & (self._end[rows] < 0) & (self._start[rows] >= 0)
+        if open_ended.any():
+            closing = rows[open_ended]
+            minutes = np.nan_to_num(self._duration[closing] / MINUTE_MS).astype(np.int32)
+            self._end[closing] = self._start[closing] + minutes
+            self._grow_minutes(int(self._end[closing].max()) + 2)
+
+    def _append(self, ids, agent, status, start, end, duration) -> np.ndarray:
+        n = len(agent)
+        self._ids.extend(ids)
+        if self.size + n > len(self._agent):
+            self._grow_rows(max(2 * len(self._agent), self.size + n))
+        rows = np.arange(self.size, self.size + n)
+        self._agent[rows] = np.maximum(agent, 0)
+        self._status[rows] = np.where(status >= 0, status, STATUS_CODES["other"])
+        self._start[rows], self._end[rows], self._duration[rows] = start, end, duration
+        self.size += n
+        self._close_finished(rows)
+        return rows
+
+    def _contribute(self, rows: np.ndarray, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) rows from every aggregate."""
+        agent, status = self._agent[rows], self._status[rows]
+        scatter_add(self._status_counts, agent * len(STATUSES) + status, sign)
+
+        duration = self._duration[rows]
+        timed = ~np.isnan(duration)
+        bins = np.searchsorted(DURATION_EDGES, duration[timed], side="right")
+        scatter_add(self._duration_hist, agent[timed] * len(BIN_VALUES) + bins, sign)
+        scatter_add(self._duration_sum, agent[timed], sign * duration[timed].astype(np.float64))
+
+        start = self._start[rows]
+        started = start >= 0
+        scatter_add(self._starts, start[started], sign)
+        scatter_add(self._delta, start[started], sign)
+        end = self._end[rows][started]
+        ended = end >= 0
+        # Active through its last minute: the delta drops the minute after
+        scatter_add(self._delta, np.maximum(end[ended], start[started][ended]) + 1, -sign)
+
+    def _lookup(self, ids: List[str], keys: np.ndarray) -> np.ndarray:
+        rows = np.full(len(keys), -1, np.int64)
+        if len(self._keys):
+            position = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+            found = self._keys[position] == keys
+            rows[found] = self._rows[position[found]]
+            # A hash match is only a candidate until the row's call ID agrees
+            candidates = np.flatnonzero(found).tolist()
+            for i, row in zip(candidates, rows[candidates].tolist()):
+                if self._ids[row] != ids[i]:
+                    rows[i] = self._colliding_row(ids[i], int(position[i]))
+        if self._recent:
+            for i in np.flatnonzero(rows < 0).tolist():
+                rows[i] = self._recent.get(ids[i], -1)
+        return rows
+
+    def _colliding_row(self, call_id: str, position: int) -> int:
+        """Row of call_id among the keys equal to the one at position, or -1."""
+        key = self._keys[position]
+        while position < len(self._keys) and self._keys[position] == key:
+            row = int(self._rows[position])
+            if self._ids[row] == call_id:
+                return row
+            position += 1
+        return -1
+
+    def _merge_recent(self) -> None:
+        keys = np.fromiter(map(hash, self._recent.keys()), np.int64, len(self._recent))
+        rows = np.fromiter(self._recent.values(), np.int64, len(self._recent))
+        order = np.argsort(keys)
+        keys, rows = keys[order], rows[order]
+        position = np.searchsorted(self._keys, keys)
+        self._keys = np.insert(self._keys, position, keys)
+        self._rows = np.insert(self._rows, position, rows)
+        self._recent.clear()
+
+    def _grow_rows(self, capacity: int) -> None:
+        def grown(column, fill):
+            new = np.full(capacity, fill, column.dtype)
+            new[:self.size] = column[:self.size]
+            return new
+
+        self._agent, self._status = grown(self._agent, 0), grown(self._status, 0)
+        self._start, self._end = grown(self._start, -1), grown(self._end, -1)
+        self._duration = grown(self._duration, np.nan)
+
+    def _grow_agents(self, capacity: int) -> None:
+        def grown(table):
+            new = np.zeros((capacity, *table.shape[1:]), table.dtype)
+            new[:len(table)] = table
+            return new
+
+        self._status_counts = grown(self._status_counts)
+        self._duration_hist = grown(self._duration_hist)
+        self._duration_sum = grown(self._duration_sum)
+
+    def _grow_minutes(self, minutes: int) -> None:
+        if minutes > len(self._starts):
+            # Whole days, so every bucket size divides the length
+            extra = -(-(minutes - len(self._starts)) // 1440) * 1440
+            self._starts = np.concatenate((self._starts, np.zeros(extra, np.int64)))
+            self._delta = np.concatenate((self._delta, np.zeros(extra, np.int64)))
+
+    # Queries
+
+    def summary(self, agent_id: Optional[str] = None, top: int = 20) -> dict:
+        """Call counts by status and duration stats, overall (or for one agent) and per busiest agent."""
+        with self._lock:
+            agents = len(self._agents)
+            counts = self._status_counts[:agents]
+            if agent_id is not None:
+                code = self._agent_codes.get(agent_id)
+                if code is None:
+                    raise KeyError(agent_id)
+                selected = np.array([code])
+            else:
+                totals = counts.sum(axis=1)
+                busiest = np.argsort(totals)[::-1][:top]
+                selected = busiest[totals[busiest] > 0]
+            stats = duration_stats(self._duration_hist[selected], self._duration_sum[selected])
+            overall = duration_stats(self._duration_hist[:agents].sum(axis=0, keepdims=True),
+                                     self._duration_sum[:agents].sum(keepdims=True))[0]
+            return {
+                "calls": int(counts.sum()) if agent_id is None else int(counts[selected[0]].sum()),
+                "by_status": status_breakdown(counts.sum(axis=0) if agent_id is None else counts[selected[0]]),
+                "duration_ms": overall if agent_id is None else stats[0],
+                "agents": [
+                    {
+                        "agent_id": self._agents[code],
+                        "calls": int(counts[code].sum()),
+                        "by_status": status_breakdown(counts[code]),
+                        "duration_ms": stats[i],
+                    }
+                    for i, code in enumerate(selected)
+                ],
+            }
+
+    def timeline(self, bucket: str, since: float, until: float, agent_id: Optional[str] = None) -> dict:
+        """
+        Calls started and concurrency per bucket over [since, until) (unix
+        seconds, widened to whole buckets, UTC).
+        """
+        size = BUCKETS[bucket]
+        with self._lock:
+            lo = int(since // 60) - self.base_minute
+            hi = int(-(-until // 60)) - self.base_minute
+            lo, hi = lo - lo % size, hi + (-hi) % size
+            lo, hi = max(lo, 0), max(min(hi, len(self._starts)), 0)
+            if hi <= lo:
+                return {"bucket": bucket, "timestamps": [], "calls": [], "peak_concurrency": [],
+                        "mean_concurrency": []}
+            if agent_id is None:
+                # Copies: the arrays are updated (or replaced) once the lock is released
+                starts = self._starts[lo:hi].copy()
+                active = np.cumsum(self._delta[:hi])[lo:]
+            else:
+                code = self._agent_codes.get(agent_id)
+                if code is None:
+                    raise KeyError(agent_id)
+                starts, active = self._agent_series(code, lo, hi)
+        buckets = (hi - lo) // size
+        active = active.reshape(buckets, size)
+        return {
+            "bucket": bucket,
+            "timestamps": ((np.arange(buckets) * size + lo + self.base_minute) * 60).tolist(),
+            "calls": starts.reshape(buckets, size).sum(axis=1).tolist(),
+            "peak_concurrency": active.max(axis=1).tolist(),
+            "mean_concurrency": np.round(active.mean(axis=1), 2).tolist(),
+        }
+
+    def _agent_series(self, code: int, lo: int, hi: int):
+        """Starts and active calls per minute in [lo, hi) for one agent, from the columns."""
+        rows = np.flatnonzero(self._agent[:self.size] == code)
+        start, end = self._start[rows], self._end[rows]
+        start, end = start[start >= 0], end[start >= 0]
+        in_range = (start >= lo) & (start < hi)
+        starts = np.bincount(start[in_range] - lo, minlength=hi - lo)
+        # Active from max(start, lo) through min(end, hi - 1); unknown end means still active
+        first = np.maximum(start, lo)
+        last = np.where(end >= 0, np.minimum(np.maximum(end, start), hi - 1), hi - 1)
+        overlaps = (first < hi) & (last >= first)
+        delta = np.bincount(first[overlaps] - lo, minlength=hi - lo + 1)
+        delta -= np.bincount(last[overlaps] - lo + 1, minlength=hi - lo + 1)
+        return starts, np.cumsum(delta[:hi - lo])
+
+    def stats(self) -> dict:
+        return {
+            "loading": self.loading,
+            "calls": self.size,
+            "agents": len(self._agents) - 1,
+            "loaded": self.loaded,
+            "updates": self.updates,
+            "memory_bytes": sum(a.nbytes for a in (
+                self._agent, self._status, self._start, self._end, self._duration, self._keys, self._rows,
+                self._status_counts, self._duration_hist, self._duration_sum, self._starts, self._delta,
+            )),
+            "series_since": self.base_minute * 60,
+        }
+
+
+def status_breakdown(counts: np.ndarray) -> dict:
+    return {status: int(count) for status, count in zip(STATUSES, counts) if count}
+
+
+def duration_stats(hist: np.ndarray, sums: np.ndarray) -> List[dict]:
+    """Count, mean and percentiles (nearest rank) for each row of duration histograms."""
+    cumulative = np.cumsum(hist, axis=1)
+    counts = cumulative[:, -1]
+    stats = [{"count": int(count), "mean": round(float(total / count), 1) if count else None}
+             for count, total in zip(counts, sums)]
+    for pct in PERCENTILES:
+        rank = np.ceil(counts * pct / 100)
+        values = BIN_VALUES[np.argmax(cumulative >= rank[:, None], axis=1)]
+        for row, count, value in zip(stats, counts, values):
+            row[f"p{pct}"] = round(float(value), 1) if count else None
+    return stats
+
+
+call_analytics = CallAnalytics(settings.analytics_max_days)
@@ -0,0 +1,10 @@
+# Benchmarks package
+from pathlib import Path
+import sys
+
+# Make the shared retell_gateway package (at the repository root) importable
+for _root in Path(__file__).resolve().parents:
+    if (_root / "retell_gateway").is_dir():
+        if str(_root) not in sys.path:
+            sys.path.insert(0, str(_root))
+        break
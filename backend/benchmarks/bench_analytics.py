@@ -0,0 +1,156 @@
+"""
+Call analytics at scale: load, incremental updates and query latency.
+
+Loads --calls synthetic calls (spread over --agents agents and --days days)
+into CallAnalytics through the same chunked path the registry scan uses,
+then applies batches of registry updates (new calls registering, starting
+and ending) and times the /analytics/calls queries against recomputing the
+same numbers from the columns on every request.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_analytics --calls 5000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+import numpy as np
+
+from analytics import CallAnalytics
+from benchmarks.bench_client_pool import percentile
+from config import settings
+
+DAY = 86400
+
+
+class SyntheticRegistry:
+    """Stands in for CallRegistry.scan_calls with generated rows."""
+
+    def __init__(self, calls: int, agents: int, days: int, now: float):
+        self.calls, self.agents, self.days, self.now = calls, agents, days, now
+        self.listeners = []
+        self.generating = 0.0  # seconds spent making rows, not loading them
+
+    def scan_calls(self, chunk_size: int):
+        rng = np.random.default_rng(0)
+        for offset in range(0, self.calls, chunk_size):
+            started = time.perf_counter()
+            n = min(chunk_size, self.calls - offset)
+            start = ((self.now - rng.random(n) * self.days * DAY) * 1000).astype(np.int64)
+            duration = rng.lognormal(11.5, 0.8, n).astype(np.int64)  # median ~100 s
+            agent = rng.integers(0, self.agents, n)
+            failed = rng.random(n) < 0.03
+            rows = [
+                (f"call_{offset + i:012d}", f"agent_{agent[i]:05d}", "error" if failed[i] else "ended",
+                 int(start[i]), int(start[i] + duration[i]), int(duration[i]))
+                for i in range(n)
+            ]
+            self.generating += time.perf_counter() - started
+            yield rows
+
+
+def time_it(func, repeats: int):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    print(f"  {name:<28} p50={percentile(latencies, 50):8.2f}ms p99={percentile(latencies, 99):8.2f}ms")
+
+
+def updates(count: int, agents: int, now: float, rng: random.Random):
+    """Registry update batches: each new call registers, starts, then ends in a later batch."""
+    batch, ongoing = [], []
+    for n in range(count):
+        call_id = f"live_{n:09d}"
+        agent_id = f"agent_{rng.randrange(agents):05d}"
+        start = int(now * 1000) + n
+        batch.append(("created", now, {"call_id": call_id, "agent_id": agent_id, "call_status": "registered"}, None))
+        batch.append(("call_started", now, {"call_id": call_id, "agent_id": agent_id, "call_status": "ongoing",
+                                             "start_timestamp": start}, None))
+        ongoing.append((call_id, agent_id, start))
+        if len(ongoing) > 100:
+            call_id, agent_id, start = ongoing.pop(0)
+            duration = rng.randrange(10_000, 600_000)
+            batch.append(("call_ended", now, {"call_id": call_id, "agent_id": agent_id, "call_status": "ended",
+                                              "start_timestamp": start, "end_timestamp": start + duration,
+                                              "duration": duration}, {}))
+        if len(batch) >= settings.call_registry_batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5_000_000)
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--updates", type=int, default=100_000, help="Live calls applied incrementally")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    now = time.time()
+    analytics = CallAnalytics(max_days=args.days + 1)
+    registry = SyntheticRegistry(args.calls, args.agents, args.days, now)
+    print(f"Loading {args.calls:,} calls")
+    start = time.perf_counter()
+    asyncio.run(analytics.start(registry))
+    elapsed = time.perf_counter() - start - registry.generating
+    stats = analytics.stats()
+    print(f"  {elapsed:.1f}s ({args.calls / elapsed:,.0f} calls/s), "
+          f"{stats['memory_bytes'] / 1e6:.0f} MB of arrays")
+
+    print(f"Incremental updates ({args.updates:,} live calls):")
+    rng = random.Random(1)
+    batch_ms, applied = [], 0
+    for batch in updates(args.updates, args.agents, now, rng):
+        started = time.perf_counter()
+        analytics.apply(batch)
+        batch_ms.append((time.perf_counter() - started) * 1000)
+        applied += len(batch)
+    print(f"  {applied:,} updates in {len(batch_ms)} batches: "
+          f"{sum(batch_ms) * 1000 / applied:.1f}us per update, batch p50={percentile(batch_ms, 50):.2f}ms "
+          f"p99={percentile(batch_ms, 99):.2f}ms")
+
+    agent = "agent_00042"
+    print(f"Queries ({args.repeats} each):")
+    report("summary (top 20 agents)", time_it(lambda: analytics.summary(top=20), args.repeats))
+    report("summary (one agent)", time_it(lambda: analytics.summary(agent), args.repeats))
+    report("timeline hour, 7 days", time_it(lambda: analytics.timeline("hour", now - 7 * DAY, now), args.repeats))
+    report(f"timeline day, {args.days} days",
+           time_it(lambda: analytics.timeline("day", now - args.days * DAY, now), args.repeats))
+    report("timeline minute, 1 day", time_it(lambda: analytics.timeline("minute", now - DAY, now), args.repeats))
+    report("timeline hour, one agent",
+           time_it(lambda: analytics.timeline("hour", now - 7 * DAY, now, agent), args.repeats))
+
+    # The same answers recomputed from the columns on each request
+    size = analytics.size
+    durations, agents = analytics._duration[:size], analytics._agent[:size]
+    starts, ends = analytics._start[:size], analytics._end[:size]
+
+    def recompute():
+        np.bincount(agents)
+        timed = durations[~np.isnan(durations)]
+        np.percentile(timed, [50, 90, 95, 99])
+        started = starts[starts >= 0]
+        np.bincount(started // 60)
+        delta = np.bincount(started, minlength=len(analytics._delta))
+        delta[:len(delta) - 1] -= np.bincount(np.maximum(ends[starts >= 0], started) + 1,
+                                              minlength=len(delta))[:len(delta) - 1]
+        np.cumsum(delta)
+
+    report("recompute from columns", time_it(recompute, max(3, args.repeats // 10)))
+
+
+if __name__ == "__main__":
+    main()
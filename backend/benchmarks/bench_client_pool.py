@@ -0,0 +1,100 @@
+"""
+Before/after benchmark for the shared Retell client.
+
+Runs POST /calls/create-web-call against a local stand-in of the Retell API
+with a fresh SDK client per request (the original behaviour), with a fresh
+httpx transport per request, and with the process-wide pooled transport, and
+prints p50/p99 latency for each.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_client_pool --requests 500
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.standin import base_url, start_standin
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(client, requests):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.post("/calls/create-web-call", json={"agent_id": "agent_bench"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    server = start_standin()
+
+    from fastapi.testclient import TestClient
+    from config import settings
+    import main as backend
+    import upstream
+
+    settings.retell_base_url = base_url(server)
+
+    class PerRequestSDK:
+        """The original handler: a new SDK client per request, called inline."""
+
+        async def create_web_call(self, agent_id, metadata=None):
+            from retell import Retell
+
+            client = Retell(api_key=settings.retell_api_key, base_url=settings.retell_base_url)
+            web_call = client.call.create_web_call(agent_id=agent_id, metadata=metadata or {})
+            return web_call.model_dump()
+
+    async def per_request_sdk():
+        return PerRequestSDK()
+
+    async def per_request_httpx():
+        transport = upstream.HTTPXTransport(settings.retell_api_key, settings.retell_base_url)
+        try:
+            yield transport
+        finally:
+            await transport.aclose()
+
+    results = {}
+    with TestClient(backend.app) as client:
+        # Before: a brand-new SDK client (and connection pool) per request
+        backend.app.dependency_overrides[upstream.get_upstream] = per_request_sdk
+        run(client, 20)
+        results["per_request_sdk"] = run(client, args.requests)
+
+        # A brand-new httpx transport per request, to separate pooling from the SDK's own cost
+        backend.app.dependency_overrides[upstream.get_upstream] = per_request_httpx
+        run(client, 20)
+        results["per_request_httpx"] = run(client, args.requests)
+
+        # After: the lifespan-managed pooled client
+        backend.app.dependency_overrides.clear()
+        run(client, 20)
+        results["pooled_client"] = run(client, args.requests)
+
+    server.shutdown()
+
+    for mode, latencies in results.items():
+        print(
+            f"{mode:>20}: p50={percentile(latencies, 50):.2f}ms "
+            f"p99={percentile(latencies, 99):.2f}ms "
+            f"mean={statistics.mean(latencies):.2f}ms (n={len(latencies)})"
+        )
+
+
+if __name__ == "__main__":
+    main()
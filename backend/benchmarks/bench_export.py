@@ -0,0 +1,99 @@
+"""
+Call history export: throughput and server memory while streaming.
+
+Starts the stand-in Retell API with --calls history calls and the backend
+under uvicorn (a real server, so the response is streamed rather than
+buffered as over ASGI), then downloads GET /calls in each format, with and
+without gzip, and reports calls/s, bytes on the wire and the server's
+resident memory before and at the end of the export. Run it with two
+--calls sizes to see the peak stay flat as the history grows.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_export --calls 200000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.standin import start_standin_process
+
+
+def rss_mb(pid: int, field: str = "VmRSS") -> float:
+    """Resident memory of pid from /proc (Linux); VmHWM is the peak."""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def wait_ready(client, url: str):
+    for _ in range(100):
+        try:
+            client.get(f"{url}/health")
+            return
+        except Exception:
+            time.sleep(0.1)
+    raise RuntimeError("backend did not start")
+
+
+def export(client, url: str, pid: int, fmt: str, gzip: bool):
+    headers = {"Accept-Encoding": "gzip" if gzip else "identity"}
+    before = rss_mb(pid)
+    start = time.perf_counter()
+    lines = 0
+    with client.stream("GET", f"{url}/calls", params={"format": fmt}, headers=headers) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes():
+            lines += chunk.count(b"\n")
+        wire = response.num_bytes_downloaded
+    elapsed = time.perf_counter() - start
+    calls = lines - (fmt == "csv")  # CSV header row
+    return elapsed, calls, wire, before, rss_mb(pid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000, help="Calls in the stand-in's history")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    import httpx
+
+    standin, upstream_url = start_standin_process(history=args.calls)
+    env = {
+        **os.environ,
+        "RETELL_BASE_URL": upstream_url,
+        "CALL_EXPORT_PAGE_SIZE": str(args.page_size),
+        "CALL_REGISTRY_PATH": os.path.join(tempfile.mkdtemp(), "calls.db"),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        with httpx.Client(timeout=None) as client:
+            wait_ready(client, url)
+            print(f"Exporting {args.calls:,} calls, {args.page_size} per page "
+                  f"(server RSS at start {rss_mb(server.pid):.0f} MB)")
+            for fmt in ("ndjson", "csv"):
+                for gzip in (False, True):
+                    elapsed, calls, wire, before, after = export(client, url, server.pid, fmt, gzip)
+                    print(f"  {fmt:<6} gzip={'on ' if gzip else 'off'} {calls:,} calls in {elapsed:6.2f}s "
+                          f"{calls / elapsed:9,.0f} calls/s {wire / 1e6:8.1f} MB on the wire  "
+                          f"RSS {before:.0f} -> {after:.0f} MB")
+            print(f"Server peak RSS: {rss_mb(server.pid, 'VmHWM'):.0f} MB")
+    finally:
+        server.terminate()
+        standin.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Upstream guard behaviour against a latency- and fault-injecting stand-in.
+
+Runs three phases of concurrent GET /calls/{call_id} bursts (in-process, over
+ASGI) and prints response codes, latency and the guard state from /health:
+
+    healthy  - fast upstream, limit grows
+    slow     - upstream slower than the latency target, limit shrinks and
+               excess requests are shed with 503 + Retry-After
+    failing  - every upstream call fails, circuit opens and requests are
+               rejected without touching upstream
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_guard --concurrency 40
+"""
+from collections import Counter
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.bench_client_pool import percentile
+from benchmarks.standin import base_url, start_standin
+
+
+async def phase(client, name, concurrency, rounds):
+    codes, latencies = Counter(), []
+
+    async def one(n):
+        start = time.perf_counter()
+        response = await client.get(f"/calls/call_{n}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        codes[response.status_code] += 1
+
+    for _ in range(rounds):
+        await asyncio.gather(*(one(n) for n in range(concurrency)))
+
+    upstream = (await client.get("/health")).json()["upstream"]
+    print(
+        f"{name:>8}: codes={dict(codes)} p50={percentile(latencies, 50):.0f}ms "
+        f"p99={percentile(latencies, 99):.0f}ms guard={upstream}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    server = start_standin()
+
+    import httpx
+    from config import settings
+    import main as backend
+    import upstream
+
+    settings.retell_base_url = base_url(server)
+    settings.upstream_latency_target = 0.5
+    settings.upstream_open_seconds = 2.0
+
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://guard", timeout=None) as client:
+        server.latency, server.error_rate = 0.01, 0.0
+        await phase(client, "healthy", args.concurrency, args.rounds)
+
+        server.latency = 1.0
+        await phase(client, "slow", args.concurrency, args.rounds)
+
+        server.latency, server.error_rate = 0.01, 1.0
+        await phase(client, "failing", args.concurrency, args.rounds)
+
+        server.error_rate = 0.0
+        await asyncio.sleep(settings.upstream_open_seconds)
+        await phase(client, "recovery", args.concurrency, args.rounds)
+
+    await upstream.close_upstream()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
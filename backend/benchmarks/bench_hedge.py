@@ -0,0 +1,76 @@
+"""
+Tail latency with and without hedged reads, and create-web-call retries.
+
+GET /calls/{call_id} is run sequentially against a stand-in where a small
+fraction of responses are very slow, first with the default policy and then
+with hedging enabled for retrieve_call. A second phase creates web calls
+against a stand-in that fails a fraction of requests with 503 and reports
+how many succeed with and without retries.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_hedge --requests 300
+"""
+from collections import Counter
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.bench_client_pool import percentile
+from benchmarks.standin import base_url, start_standin
+
+
+async def run(app, method, path, requests, body=None):
+    import httpx
+    import upstream
+
+    codes, latencies = Counter(), []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://hedge", timeout=None) as client:
+        for n in range(requests):
+            start = time.perf_counter()
+            response = await client.request(method, path.format(n=n), json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            codes[response.status_code] += 1
+        policies = (await client.get("/health")).json()["upstream"]["policies"]
+    await upstream.close_upstream()
+    return codes, latencies, policies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    server = start_standin(latency=0.01, tail_rate=0.05, tail_latency=0.5)
+
+    from config import settings
+    import main as backend
+
+    settings.retell_base_url = base_url(server)
+
+    for label, policies in (("no hedge", {}), ("hedged", {"retrieve_call": {"hedge": True}})):
+        settings.upstream_policies = policies
+        codes, latencies, stats = await run(backend.app, "GET", "/calls/call_{n}", args.requests)
+        print(
+            f"retrieve_call {label:>8}: codes={dict(codes)} p50={percentile(latencies, 50):.0f}ms "
+            f"p99={percentile(latencies, 99):.0f}ms stats={stats['retrieve_call']}"
+        )
+
+    server.tail_rate, server.error_rate, server.error_status = 0.0, 0.2, 503
+    body = {"agent_id": "agent_bench"}
+    for label, policies in (("no retry", {}), ("retries", {"create_web_call": {"retries": 2}})):
+        settings.upstream_policies = policies
+        codes, latencies, stats = await run(backend.app, "POST", "/calls/create-web-call", args.requests, body)
+        print(
+            f"create_web_call {label:>8}: codes={dict(codes)} p50={percentile(latencies, 50):.0f}ms "
+            f"p99={percentile(latencies, 99):.0f}ms stats={stats['create_web_call']}"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
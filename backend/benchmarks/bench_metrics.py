@@ -0,0 +1,104 @@
+"""
+Per-request cost of the metrics recorder.
+
+Times the raw recorder calls (counter increment, histogram observe and the
+upstream context manager), then calls a bare FastAPI app's GET /ping
+directly over ASGI with and without MetricsMiddleware, taking the best of
+several interleaved rounds, and reports the difference per request.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_metrics --requests 1000 --rounds 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+
+def per_call_ns(func, iterations):
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def recorder_costs(iterations):
+    from metrics import Counter, Histogram, track_upstream
+
+    counter = Counter("bench_total", "bench", ("method", "route", "status"))
+    histogram = Histogram("bench_seconds", "bench", ("method", "route", "status"))
+    labels = ("GET", "/calls/{call_id}", "200")
+
+    def upstream():
+        with track_upstream("bench"):
+            pass
+
+    print(f"counter.inc:        {per_call_ns(lambda: counter.inc(labels), iterations):6.0f} ns")
+    print(f"histogram.observe:  {per_call_ns(lambda: histogram.observe(labels, 0.042), iterations):6.0f} ns")
+    print(f"track_upstream:     {per_call_ns(upstream, iterations):6.0f} ns")
+
+
+def make_app(with_metrics):
+    from fastapi import FastAPI
+    from metrics import MetricsMiddleware
+
+    app = FastAPI()
+
+    @app.get("/ping/{item}")
+    async def ping(item: str):
+        return {"item": item}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def call(app, path):
+    """Invoke the ASGI app directly, without a client, so only app time is measured."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def request_cost(requests, rounds):
+    apps = {"without": make_app(False), "with": make_app(True)}
+    best = {}
+    for _ in range(rounds):
+        for label, app in apps.items():
+            start = time.perf_counter()
+            for n in range(requests):
+                await call(app, f"/ping/{n}")
+            per_request = (time.perf_counter() - start) / requests * 1e6
+            best[label] = min(best.get(label, per_request), per_request)
+
+    print(f"GET /ping without metrics: {best['without']:7.1f} us/request")
+    print(f"GET /ping with metrics:    {best['with']:7.1f} us/request")
+    print(f"overhead:                  {best['with'] - best['without']:7.1f} us/request "
+          f"({(best['with'] - best['without']) / best['without']:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    recorder_costs(args.iterations)
+    asyncio.run(request_cost(args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Call registry at scale: bulk write throughput and indexed query latency.
+
+Fills a SQLite registry with --rows calls (spread over --agents agents and
+--days days, --active-fraction still registered/ongoing) through the same
+batched upsert the background writer uses, then times the registry
+queries and prints each one's query plan:
+
+    point      - one call by ID
+    active     - active calls for one agent (partial index)
+    range      - calls created in a 10 minute window
+    agent+range- one agent's calls in a one day window
+    status     - ongoing calls in a one day window (index on status)
+    agent+status - one agent's ended calls (index on agent, filtered)
+
+Finally measures the cost of CallRegistry.record() on the event loop and
+the background writer's throughput.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_registry --rows 10000000
+    python -m benchmarks.bench_registry --db /tmp/registry.db --skip-fill   # reuse a filled db
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.bench_client_pool import percentile
+from store import ACTIVE_STATUSES, CallRegistry, CallStore
+
+DAY = 86400
+
+
+def fill(store: CallStore, rows: int, agents: int, days: int, active_fraction: float, batch: int):
+    now = time.time()
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        updates = []
+        for n in range(offset, min(rows, offset + batch)):
+            created_at = now - days * DAY * (1 - n / rows)
+            status = rng.choice(ACTIVE_STATUSES) if rng.random() < active_fraction else "ended"
+            call = {
+                "call_id": f"call_{n:012d}",
+                "agent_id": f"agent_{rng.randrange(agents):05d}",
+                "call_status": status,
+                "metadata": {"n": n},
+                "duration": rng.randrange(10_000, 600_000) if status == "ended" else None,
+            }
+            updates.append(("created", created_at, call, None))
+        store.write_batch(updates)
+        done = min(rows, offset + batch)
+        if done % (batch * 100) == 0 or done == rows:
+            elapsed = time.perf_counter() - start
+            print(f"  {done:>11,} rows  {done / elapsed:9,.0f} rows/s", flush=True)
+    return now
+
+
+def time_query(name, func, args_for, repeats):
+    latencies = []
+    rows = 0
+    for i in range(repeats):
+        start = time.perf_counter()
+        rows += len(func(*args_for(i)))
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"  {name:<12} p50={percentile(latencies, 50):7.3f}ms p99={percentile(latencies, 99):7.3f}ms "
+          f"rows/query={rows / repeats:.0f}")
+
+
+def explain(store: CallStore, sql: str, params: tuple):
+    plan = store._reader().execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return "; ".join(row[-1] for row in plan)
+
+
+async def writer_throughput(path: str, updates: int):
+    registry = CallRegistry("bench_registry", path, queue_size=updates + 1, batch_size=500,
+                            flush_interval=0.05, max_age=30, max_entries=0)
+    await registry.start()
+    call = {"call_id": None, "agent_id": "agent_bench", "call_status": "registered"}
+    start = time.perf_counter()
+    for n in range(updates):
+        registry.record("created", {**call, "call_id": f"bench_{n}"})
+    enqueued = time.perf_counter() - start
+    await registry.stop()
+    total = time.perf_counter() - start
+    print(f"  record(): {enqueued / updates * 1e6:.2f}us per call on the event loop")
+    print(f"  writer:   {updates:,} updates written in {total:.2f}s ({updates / total:,.0f}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--active-fraction", type=float, default=0.02)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--db", help="Registry file (default: a temporary file)")
+    parser.add_argument("--skip-fill", action="store_true", help="Query an already filled --db")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "registry.db")
+    store = CallStore(path)
+    if args.skip_fill:
+        now = store._reader().execute("SELECT max(created_at) FROM calls").fetchone()[0] or time.time()
+    else:
+        print(f"Filling {path} with {args.rows:,} calls")
+        now = fill(store, args.rows, args.agents, args.days, args.active_fraction, args.batch)
+    rows = store._reader().execute("SELECT count(*) FROM calls").fetchone()[0]
+    print(f"{rows:,} rows, {os.path.getsize(path) / 1e9:.2f} GB")
+
+    rng = random.Random(1)
+    agent = lambda: f"agent_{rng.randrange(args.agents):05d}"
+    moment = lambda: now - rng.random() * args.days * DAY
+
+    print("Query plans:")
+    plans = [
+        ("active", "SELECT call_id FROM calls WHERE agent_id = ? AND call_status IN ('registered', 'ongoing') "
+                   "AND created_at < ? ORDER BY created_at DESC LIMIT 50", ("a", now)),
+        ("range", "SELECT call_id FROM calls WHERE created_at >= ? AND created_at < ? "
+                  "ORDER BY created_at DESC LIMIT 100", (0, now)),
+        ("agent+range", "SELECT call_id FROM calls WHERE agent_id = ? AND created_at >= ? AND created_at < ? "
+                        "ORDER BY created_at DESC LIMIT 100", ("a", 0, now)),
+        ("status", "SELECT call_id FROM calls WHERE call_status = ? AND created_at >= ? AND created_at < ? "
+                   "ORDER BY created_at DESC LIMIT 100", ("ongoing", 0, now)),
+        ("agent+status", "SELECT call_id FROM calls WHERE agent_id = ? AND +call_status = ? "
+                         "ORDER BY created_at DESC LIMIT 100", ("a", "ended")),
+    ]
+    for name, sql, params in plans:
+        print(f"  {name:<12} {explain(store, sql, params)}")
+
+    print(f"Query latency ({args.repeats} queries each):")
+    time_query("point", lambda call_id: [c for c in [store.get_call(call_id)] if c],
+               lambda i: (f"call_{rng.randrange(max(rows, 1)):012d}",), args.repeats)
+    time_query("active", lambda a: store.active_calls(a, limit=50), lambda i: (agent(),), args.repeats)
+    time_query("range", lambda t: store.query_calls(since=t - 600, until=t, limit=100),
+               lambda i: (moment(),), args.repeats)
+    time_query("agent+range", lambda a, t: store.query_calls(agent_id=a, since=t - DAY, until=t, limit=100),
+               lambda i: (agent(), moment()), args.repeats)
+    time_query("status", lambda t: store.query_calls(status="ongoing", since=t - DAY, until=t, limit=100),
+               lambda i: (moment(),), args.repeats)
+    time_query("agent+status", lambda a: store.query_calls(agent_id=a, status="ended", limit=100),
+               lambda i: (agent(),), args.repeats)
+    store.close()
+
+    print("Batched writer:")
+    asyncio.run(writer_throughput(path, 100_000))
+
+
+if __name__ == "__main__":
+    main()
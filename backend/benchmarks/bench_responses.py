@@ -0,0 +1,185 @@
+"""
+Hot read endpoints: pre-encoded, compressed responses vs per-request JSON.
+
+Serves GET /agents/ and GET /agents/{agent_id} for a catalog of --agents
+agents with --prompt-kb KB prompts, calling the ASGI app directly (no
+client or socket) so only app time is measured:
+
+- per-request: formats the upstream agents and returns the dicts for
+  FastAPI to validate and encode on every request (what the routes did
+  before responses were cached)
+- pre-encoded identity / gzip / br: the real routes, serving the body
+  encoded once, in the coding the Accept-Encoding header selects
+
+Also reports the one-off cost of building the payload with stdlib json and
+orjson, and each compressed variant.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_responses --agents 1000 --prompt-kb 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import string
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+os.environ.setdefault("AGENT_CACHE_TTL", "3600")
+os.environ.setdefault("AGENT_CACHE_STALE_TTL", "3600")
+
+
+def make_catalog(agents: int, prompt_kb: int) -> list:
+    rng = random.Random(0)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(2000)]
+
+    def prompt():
+        text = []
+        while sum(len(word) + 1 for word in text) < prompt_kb * 1024:
+            text.append(rng.choice(words))
+        return " ".join(text)
+
+    return [{
+        "agent_id": f"agent_{n:05d}",
+        "agent_name": f"Support agent {n}",
+        "voice_id": "11labs-Adrian",
+        "language": "en-US",
+        "response_engine": {"type": "retell-llm", "llm_id": f"llm_{n:05d}"},
+        "prompt": prompt(),
+        "webhook_url": "https://example.com/webhooks/retell",
+    } for n in range(agents)]
+
+
+class CatalogUpstream:
+    def __init__(self, catalog: list):
+        self.catalog = catalog
+        self.by_id = {agent["agent_id"]: agent for agent in catalog}
+
+    async def list_agents(self):
+        return self.catalog
+
+    async def retrieve_agent(self, agent_id):
+        return self.by_id[agent_id]
+
+
+def make_apps(upstream: CatalogUpstream):
+    from fastapi import FastAPI
+    from routes import agents
+    from upstream import get_upstream
+
+    before = FastAPI()
+
+    @before.get("/agents/")
+    async def list_agents():
+        formatted = [{
+            "agent_id": agent.get("agent_id", agent.get("id")),
+            "agent_name": agent.get("agent_name", agent.get("name", "Unknown")),
+            "voice_id": agent.get("voice_id"),
+            "language": agent.get("language", "en-US"),
+            "response_engine": agent.get("response_engine"),
+        } for agent in await upstream.list_agents()]
+        return {"agents": formatted, "count": len(formatted)}
+
+    @before.get("/agents/{agent_id}")
+    async def get_agent(agent_id: str):
+        agent = await upstream.retrieve_agent(agent_id)
+        return {key: agent.get(key) for key in (
+            "agent_id", "agent_name", "voice_id", "language", "response_engine", "prompt", "webhook_url")}
+
+    after = FastAPI()
+    after.include_router(agents.router)
+
+    async def catalog_upstream():
+        return upstream
+
+    after.dependency_overrides[get_upstream] = catalog_upstream
+    return before, after
+
+
+async def call(app, path: str, accept_encoding: str) -> int:
+    """Invoke the ASGI app directly; returns the response body size."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [(b"accept-encoding", accept_encoding.encode())],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+
+async def throughput(app, paths: list, accept_encoding: str, seconds: float):
+    size = await call(app, paths[0], accept_encoding)  # warm the cache
+    done, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        await call(app, paths[done % len(paths)], accept_encoding)
+        done += 1
+    return done / (time.perf_counter() - start), size
+
+
+def build_costs(value):
+    from responses import ENCODINGS, compress, encode_json
+
+    def timed(func):
+        start = time.perf_counter()
+        result = func()
+        return (time.perf_counter() - start) * 1000, result
+
+    stdlib_ms, _ = timed(lambda: json.dumps(value, separators=(",", ":"), default=str).encode())
+    fast_ms, body = timed(lambda: encode_json(value))
+    costs = [f"json {stdlib_ms:.1f}ms", f"orjson {fast_ms:.1f}ms"]
+    for encoding in ENCODINGS:
+        compress_ms, compressed = timed(lambda: compress(body, encoding))
+        costs.append(f"{encoding} {compress_ms:.1f}ms ({len(compressed) / len(body):.0%})")
+    return len(body), ", ".join(costs)
+
+
+async def run(args):
+    from responses import ENCODINGS
+
+    catalog = make_catalog(args.agents, args.prompt_kb)
+    upstream = CatalogUpstream(catalog)
+    before, after = make_apps(upstream)
+    detail_paths = [f"/agents/{agent['agent_id']}" for agent in catalog[:100]]
+    endpoints = [("GET /agents/", ["/agents/"]), ("GET /agents/{agent_id}", detail_paths)]
+
+    list_value = {"agents": [{key: agent[key] for key in (
+        "agent_id", "agent_name", "voice_id", "language", "response_engine")} for agent in catalog],
+        "count": len(catalog)}
+    for name, value in (("agent list", list_value), ("one agent", catalog[0])):
+        size, costs = build_costs(value)
+        print(f"Building the {name} payload ({size / 1024:,.0f} KB): {costs}")
+
+    for name, paths in endpoints:
+        print(f"{name} ({args.seconds:.0f}s each):")
+        rps, size = await throughput(before, paths, "gzip, br", args.seconds)
+        print(f"  {'per-request':<22} {rps:9,.0f} req/s {size / 1024:9,.1f} KB")
+        for encoding in ("identity",) + ENCODINGS:
+            rps, size = await throughput(after, paths, encoding, args.seconds)
+            print(f"  {'pre-encoded ' + encoding:<22} {rps:9,.0f} req/s {size / 1024:9,.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--prompt-kb", type=int, default=8, help="Prompt size per agent")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each run")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Agent list under several uvicorn workers: per-worker caches vs the shared tier.
+
+Starts the stand-in Retell API (in its own process, with --agents agents)
+and the backend under uvicorn with 1, 4 and 16 workers, first with a cache
+per worker and then with AGENT_SHARED_CACHE_PATH set. Each run drives
+GET /agents/ for --duration seconds and reports requests/s, p50/p99
+latency, list-agents pages the stand-in served (per minute, including
+startup; RETELL_AGENT_PAGE_SIZE agents each) and the workers' total
+proportional memory (PSS, Linux).
+
+AGENT_CACHE_TTL is --ttl (short, so refreshes happen during the run).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_shared_cache --workers 1,4,16 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.bench_client_pool import percentile
+from benchmarks.standin import start_standin_process
+
+
+def worker_pids(pid: int) -> list:
+    """pid and its child processes, from /proc (Linux)."""
+    pids = [pid]
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    if int(stat.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        pids.append(int(entry))
+            except (OSError, ValueError, IndexError):
+                pass
+    return pids
+
+
+def pss_mb(pids) -> float:
+    """Total proportional set size: shared pages are split between the processes mapping them."""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as rollup:
+                for line in rollup:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+async def drive(url: str, duration: float, concurrency: int):
+    import httpx
+
+    latencies = []
+    deadline = time.perf_counter() + duration
+    headers = {"Accept-Encoding": "br, gzip"}
+
+    async def loop(client):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            # Raw (still compressed) bytes: decoding here would make the client the bottleneck
+            async with client.stream("GET", "/agents/", headers=headers) as response:
+                response.raise_for_status()
+                async for _ in response.aiter_raw():
+                    pass
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(loop(client) for _ in range(concurrency)))
+    return latencies
+
+
+def wait_ready(url: str, timeout: float = 60.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("backend did not start")
+
+
+def agent_lists(upstream_url: str) -> int:
+    """list-agents requests the stand-in has answered."""
+    import httpx
+
+    stats = httpx.get(f"{upstream_url}/_fake/stats").json()["endpoints"]
+    return stats.get("list_agents", {}).get("requests", 0)
+
+
+def run(args, upstream_url: str, workers: int, shared: bool):
+    scratch = tempfile.mkdtemp()
+    env = {
+        **os.environ,
+        "RETELL_BASE_URL": upstream_url,
+        "AGENT_CACHE_TTL": str(args.ttl),
+        "CALL_REGISTRY_PATH": os.path.join(scratch, "calls.db"),
+        "ANALYTICS_ENABLED": "false",
+    }
+    if shared:
+        env["AGENT_SHARED_CACHE_PATH"] = os.path.join(scratch, "agents.shared")
+    before = agent_lists(upstream_url)
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(url)
+        latencies = asyncio.run(drive(url, args.duration, args.concurrency))
+        elapsed = time.perf_counter() - started
+        memory = pss_mb(worker_pids(server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+    lists = agent_lists(upstream_url) - before
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "lists": lists,
+        "lists_per_min": lists * 60 / elapsed,
+        "pss": memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", default="1,4,16", help="Comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--agents", type=int, default=2000, help="Agents in the stand-in's catalog")
+    parser.add_argument("--ttl", type=float, default=2.0, help="AGENT_CACHE_TTL for the runs")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in latency (s)")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    standin, upstream_url = start_standin_process(latency=args.latency, agents=args.agents)
+    print(f"GET /agents/ for {args.duration:.0f}s at concurrency {args.concurrency}, "
+          f"{args.agents} agents, AGENT_CACHE_TTL={args.ttl}s")
+    print(f"{'workers':>7} {'cache':<10}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'list-agents':>13}{'per min':>9}{'PSS MB':>9}")
+    try:
+        for workers in (int(count) for count in args.workers.split(",")):
+            for shared in (False, True):
+                result = run(args, upstream_url, workers, shared)
+                print(f"{workers:>7} {'shared' if shared else 'per-worker':<10}{result['rps']:>8.0f}"
+                      f"{result['p50']:>9.2f}{result['p99']:>9.2f}{result['lists']:>13}"
+                      f"{result['lists_per_min']:>9.1f}{result['pss']:>9.0f}")
+    finally:
+        standin.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Concurrency benchmark: SDK-on-thread-pool vs asyncio-native httpx transport.
+
+Fires a burst of concurrent POST /calls/create-web-call requests at the app
+(in-process, over ASGI) with a fixed-latency local stand-in of the Retell API,
+once per RETELL_TRANSPORT mode, and reports wall time, throughput and latency.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_transport --concurrency 500 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.bench_client_pool import percentile
+from benchmarks.standin import start_standin_process
+
+
+def executor_threads():
+    # The loop's default executor names its workers "asyncio_N"
+    return sum(1 for t in threading.enumerate() if t.name.startswith("asyncio"))
+
+
+async def burst(app, concurrency):
+    import httpx
+
+    latencies = []
+    peak_threads = executor_threads()
+
+    async def one(client):
+        nonlocal peak_threads
+        start = time.perf_counter()
+        response = await client.post("/calls/create-web-call", json={"agent_id": "agent_bench"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        peak_threads = max(peak_threads, executor_threads())
+        response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await one(client)  # warm up
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies, peak_threads
+
+
+async def run_mode(app, mode, concurrency):
+    from config import settings
+    import upstream
+
+    settings.retell_transport = mode
+    try:
+        return await burst(app, concurrency)
+    finally:
+        await upstream.close_upstream()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in latency in seconds")
+    args = parser.parse_args()
+
+    standin, upstream_url = start_standin_process(latency=args.latency)
+
+    from config import settings
+    import main as backend
+
+    settings.retell_base_url = upstream_url
+    settings.retell_max_connections = args.concurrency
+    settings.upstream_limit_initial = settings.upstream_limit_max = args.concurrency
+    settings.sdk_executor_max_queue = args.concurrency  # measure the burst, not load shedding
+
+    for mode in ("sdk", "httpx"):
+        # Fresh event loop per mode so each starts with an empty default executor
+        elapsed, latencies, peak_threads = asyncio.run(run_mode(backend.app, mode, args.concurrency))
+        print(
+            f"{mode:>6}: {args.concurrency} requests in {elapsed:.2f}s "
+            f"({args.concurrency / elapsed:.0f} req/s) "
+            f"p50={percentile(latencies, 50):.0f}ms p99={percentile(latencies, 99):.0f}ms "
+            f"executor_threads={peak_threads}"
+        )
+
+    standin.terminate()
+
+
+if __name__ == "__main__":
+    main()
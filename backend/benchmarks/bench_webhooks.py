@@ -0,0 +1,101 @@
+"""
+Webhook ingestion: acknowledgement latency and batched persistence.
+
+Posts signed call_started/call_ended events for --calls calls to
+POST /webhooks/retell over ASGI at --concurrency, and reports the
+acknowledgement latency (which must not wait on the disk), how long the
+writer took to persist everything, and then how many GET /calls/{call_id}
+reads were answered locally instead of by the Retell API.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_webhooks --calls 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.bench_client_pool import percentile
+
+
+def sign(body: bytes, key: str) -> str:
+    timestamp = str(int(time.time() * 1000))
+    return f"v={timestamp},d=" + hmac.new(key.encode(), body + timestamp.encode(), hashlib.sha256).hexdigest()
+
+
+async def run(args):
+    import httpx
+    from benchmarks.standin import base_url, start_standin
+    from config import settings
+
+    settings.call_registry_path = os.path.join(tempfile.mkdtemp(), "calls.db")
+    standin = start_standin(latency=args.latency)
+    settings.retell_base_url = base_url(standin)
+
+    import main as backend
+    from store import call_registry
+
+    # call_registry was created at import time; point it at the temporary store
+    call_registry.path = settings.call_registry_path
+    await backend.startup_event()
+    transport = httpx.ASGITransport(app=backend.app)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def post(event: str, status: str, n: int):
+            body = json.dumps({
+                "event": event,
+                "call": {"call_id": f"call_{n}", "agent_id": "agent_0", "call_status": status},
+            }).encode()
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/webhooks/retell", content=body,
+                    headers={"x-retell-signature": sign(body, settings.retell_api_key)},
+                )
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*[post("call_started", "ongoing", n) for n in range(args.calls)])
+        await asyncio.gather(*[post("call_ended", "ended", n) for n in range(args.calls)])
+        acked = time.perf_counter() - start
+        while call_registry.stats()["written"] < 2 * args.calls:
+            await asyncio.sleep(0.01)
+        persisted = time.perf_counter() - start
+
+        latencies.sort()
+        events = 2 * args.calls
+        print(f"{events} events acknowledged in {acked:.2f}s ({events / acked:.0f}/s), "
+              f"persisted after {persisted:.2f}s")
+        print(f"ack latency: p50={percentile(latencies, 50) * 1000:.2f}ms "
+              f"p99={percentile(latencies, 99) * 1000:.2f}ms max={latencies[-1] * 1000:.2f}ms")
+
+        upstream_before = standin.requests
+        for n in range(args.calls):
+            (await client.get(f"/calls/call_{n}")).raise_for_status()
+        print(f"{args.calls} GET /calls/{{call_id}} reads: "
+              f"{standin.requests - upstream_before} upstream requests")
+
+    await backend.shutdown_event()
+    standin.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in Retell API latency (s)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Open-loop load generator
@@ -0,0 +1,187 @@
+"""
+Open-loop load generator for the call-setup hot path.
+
+Drives /agents/, /calls/create-web-call and /calls/{call_id} at a fixed
+arrival rate against the backend app with the Retell upstream stubbed
+locally, and reports p50/p90/p99/p99.9 latency, throughput and error rates.
+Results are written as JSON so runs can be compared between commits with
+``python -m benchmarks.loadgen.compare``.
+
+Targets:
+    asgi    - the app in this process, over httpx.ASGITransport (default)
+    socket  - the app in a uvicorn child process on a local port
+    --url   - an already running backend
+
+Usage (from the backend directory):
+    python -m benchmarks.loadgen --scenario call-burst --rate 200 --duration 10
+    python -m benchmarks.loadgen --scenario mixed --target socket --output results/mixed.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.loadgen.runner import open_loop, wall_clock
+from benchmarks.loadgen.scenarios import SCENARIOS, operation_picker
+from benchmarks.standin import start_standin_process
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_backend(upstream_url: str, log_level: str):
+    """Run the backend under uvicorn in a child process; returns (process, url)."""
+    port = free_port()
+    env = {**os.environ, "RETELL_BASE_URL": upstream_url}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", log_level.lower(), "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_healthy(client, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+
+async def run(args, upstream_url: str) -> dict:
+    import httpx
+
+    scenario = SCENARIOS[args.scenario]
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    backend_process = None
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+    elif args.target == "socket":
+        backend_process, url = start_backend(upstream_url, args.log_level)
+        client = httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits)
+    else:
+        from config import settings
+        import main as backend
+
+        settings.retell_base_url = upstream_url
+        transport = httpx.ASGITransport(app=backend.app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=args.timeout)
+
+    try:
+        async with client:
+            await wait_healthy(client)
+            state = {}
+            if "setup" in scenario:
+                await scenario["setup"](client, state, args.calls, args.ended_fraction)
+            pick = operation_picker(scenario, args.seed)
+            if args.warmup > 0:
+                await open_loop(client, pick, state, args.rate, args.warmup, args.max_in_flight)
+            result = await open_loop(client, pick, state, args.rate, args.duration, args.max_in_flight)
+    finally:
+        if backend_process is not None:
+            backend_process.terminate()
+            backend_process.wait()
+        elif not args.url:
+            import upstream
+
+            await upstream.close_upstream()
+    return result
+
+
+def print_summary(results: dict) -> None:
+    print(
+        f"{results['scenario']} @ {results['offered_rps']:.0f} rps ({results['target']}): "
+        f"throughput={results['throughput_rps']:.1f} rps completed={results['completed']} "
+        f"dropped={results['dropped']} errors={results['error_rate']:.2%} "
+        f"send_lag_max={results['max_send_lag_ms']:.1f}ms"
+    )
+    rows = [("all", results["latency"], results["error_rate"])]
+    rows += [(name, op["latency"], op["error_rate"]) for name, op in results["operations"].items()]
+    for name, latency, error_rate in rows:
+        print(
+            f"  {name:>16}: n={latency['count']:<7} p50={latency['p50_ms']:8.1f}ms "
+            f"p90={latency['p90_ms']:8.1f}ms p99={latency['p99_ms']:8.1f}ms "
+            f"p99.9={latency['p99_9_ms']:8.1f}ms errors={error_rate:.2%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--rate", type=float, default=200, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=1, help="Seconds of unmeasured load first")
+    parser.add_argument("--target", choices=["asgi", "socket"], default="asgi")
+    parser.add_argument("--url", help="Benchmark an already running backend instead")
+    parser.add_argument("--upstream-url", help="Retell stand-in to use, e.g. fake-retell (default: start one)")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Seconds, for the stand-in started here")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--calls", type=int, default=200, help="Fleet size for polling scenarios")
+    parser.add_argument("--ended-fraction", type=float, default=0.25)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING", help="Backend log level")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    logging.getLogger().setLevel(args.log_level)
+
+    standin = None
+    upstream_url = args.upstream_url
+    if not upstream_url and not args.url:
+        standin, upstream_url = start_standin_process(args.upstream_latency, args.upstream_error_rate)
+
+    try:
+        result = asyncio.run(run(args, upstream_url))
+    finally:
+        if standin is not None:
+            standin.terminate()
+
+    results = {
+        "scenario": args.scenario,
+        "target": args.url or args.target,
+        "git_commit": git_commit(),
+        "timestamp": wall_clock(),
+        "config": vars(args),
+        **result,
+    }
+    print_summary(results)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare two load generator result files (e.g. from two commits).
+
+Prints p50/p99/p99.9 latency, throughput and error-rate changes overall and
+per operation, and exits with status 1 if p99 latency or the error rate got
+worse than --threshold allows, so it can gate CI.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadgen.compare results/base.json results/new.json --threshold 0.10
+"""
+import argparse
+import json
+import sys
+
+
+def change(base: float, new: float) -> float:
+    if not base:
+        return 0.0 if not new else float("inf")
+    return (new - base) / base
+
+
+def compare(base: dict, new: dict, threshold: float) -> list:
+    """Print a comparison table and return the regressions found."""
+    regressions = []
+    print(f"base {base['git_commit']} ({base['timestamp']})  vs  new {new['git_commit']} ({new['timestamp']})")
+    print(
+        f"  throughput: {base['throughput_rps']:.1f} -> {new['throughput_rps']:.1f} rps "
+        f"({change(base['throughput_rps'], new['throughput_rps']):+.1%})"
+    )
+
+    rows = [("all", base["latency"], new["latency"], base["error_rate"], new["error_rate"])]
+    for name, op in new["operations"].items():
+        if name in base["operations"]:
+            old = base["operations"][name]
+            rows.append((name, old["latency"], op["latency"], old["error_rate"], op["error_rate"]))
+
+    for name, old, cur, old_errors, new_errors in rows:
+        cells = []
+        for key in ("p50_ms", "p99_ms", "p99_9_ms"):
+            cells.append(f"{key[:-3]}={old[key]:.1f}->{cur[key]:.1f}ms ({change(old[key], cur[key]):+.0%})")
+        print(f"  {name:>16}: {'  '.join(cells)}  errors={old_errors:.2%}->{new_errors:.2%}")
+        if change(old["p99_ms"], cur["p99_ms"]) > threshold:
+            regressions.append(f"{name} p99 {old['p99_ms']:.1f}ms -> {cur['p99_ms']:.1f}ms")
+        if new_errors > old_errors + threshold / 10:
+            regressions.append(f"{name} error rate {old_errors:.2%} -> {new_errors:.2%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative p99 increase")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    if base["scenario"] != new["scenario"] or base["offered_rps"] != new["offered_rps"]:
+        print("Warning: comparing different scenarios or arrival rates")
+
+    regressions = compare(base, new, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
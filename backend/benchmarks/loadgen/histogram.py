@@ -0,0 +1,75 @@
+"""Log-bucketed latency histogram with ~1% relative precision."""
+from typing import Dict, Optional
+import math
+
+# Bucket boundaries grow by 1% so any recorded value is reported within 1%
+_GROWTH = 1.01
+_LOG_GROWTH = math.log(_GROWTH)
+_MIN_MS = 0.01
+
+
+class LatencyHistogram:
+    """Counts latencies (in ms) into geometric buckets; cheap to record and merge."""
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms = 0.0
+
+    @staticmethod
+    def _bucket(ms: float) -> int:
+        return int(math.log(max(ms, _MIN_MS) / _MIN_MS) / _LOG_GROWTH)
+
+    @staticmethod
+    def _upper_bound(bucket: int) -> float:
+        return _MIN_MS * _GROWTH ** (bucket + 1)
+
+    def record(self, ms: float) -> None:
+        bucket = self._bucket(ms)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.sum_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.sum_ms += other.sum_ms
+        if other.min_ms is not None:
+            self.min_ms = other.min_ms if self.min_ms is None else min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th percentile, capped at the max."""
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * self.total))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self._upper_bound(bucket), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.total,
+            "mean_ms": self.sum_ms / self.total if self.total else 0.0,
+            "min_ms": self.min_ms or 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "p99_9_ms": self.percentile(99.9),
+            "max_ms": self.max_ms,
+        }
+
+    def to_dict(self) -> dict:
+        """Summary plus raw buckets, so runs can be merged or re-analysed later."""
+        return {
+            **self.summary(),
+            "buckets": {f"{self._upper_bound(b):.3f}": c for b, c in sorted(self.counts.items())},
+        }
@@ -0,0 +1,100 @@
+"""Open-loop request generator and result collection."""
+from collections import Counter
+from typing import Callable, Dict
+import asyncio
+import time
+
+from benchmarks.loadgen.histogram import LatencyHistogram
+
+
+class OperationStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.status_codes = Counter()
+        self.errors = 0
+
+    def to_dict(self) -> dict:
+        completed = self.latency.total
+        codes = sorted((str(code), count) for code, count in self.status_codes.items())
+        return {
+            "status_codes": dict(codes),
+            "errors": self.errors,
+            "error_rate": self.errors / completed if completed else 0.0,
+            "latency": self.latency.to_dict(),
+        }
+
+
+async def open_loop(client, pick_operation: Callable, state: dict, rate: float,
+                    duration: float, max_in_flight: int) -> dict:
+    """
+    Send requests at a fixed arrival rate, whether or not earlier ones finished.
+
+    Latency is measured from each request's scheduled send time, so a backend
+    that falls behind shows the queueing delay instead of silently lowering
+    the offered load (coordinated omission). Requests that would exceed
+    max_in_flight are counted as dropped rather than sent.
+    """
+    loop = asyncio.get_running_loop()
+    operations: Dict[str, OperationStats] = {}
+    in_flight = set()
+    dropped = 0
+    max_send_lag = 0.0
+    peak_in_flight = 0
+
+    async def send(n: int, scheduled: float) -> None:
+        name, method, path, body = pick_operation()(n, state)
+        stats = operations.setdefault(name, OperationStats())
+        try:
+            response = await client.request(method, path, json=body)
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        stats.latency.record((loop.time() - scheduled) * 1000)
+        stats.status_codes[status] += 1
+        if not isinstance(status, int) or status >= 400:
+            stats.errors += 1
+
+    total = int(rate * duration)
+    start = loop.time()
+    for n in range(total):
+        scheduled = start + n / rate
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            max_send_lag = max(max_send_lag, -delay)
+        if len(in_flight) >= max_in_flight:
+            dropped += 1
+            continue
+        task = asyncio.ensure_future(send(n, scheduled))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        peak_in_flight = max(peak_in_flight, len(in_flight))
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    elapsed = loop.time() - start
+
+    overall = LatencyHistogram()
+    errors = 0
+    for stats in operations.values():
+        overall.merge(stats.latency)
+        errors += stats.errors
+    completed = overall.total
+    return {
+        "requests": total,
+        "completed": completed,
+        "dropped": dropped,
+        "elapsed_s": elapsed,
+        "offered_rps": rate,
+        "throughput_rps": completed / elapsed if elapsed else 0.0,
+        "error_rate": errors / completed if completed else 0.0,
+        "max_send_lag_ms": max_send_lag * 1000,
+        "peak_in_flight": peak_in_flight,
+        "latency": overall.to_dict(),
+        "operations": {name: stats.to_dict() for name, stats in sorted(operations.items())},
+    }
+
+
+def wall_clock() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
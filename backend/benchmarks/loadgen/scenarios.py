@@ -0,0 +1,67 @@
+"""
+Load scenarios for the call-setup hot path.
+
+A scenario is a weighted mix of operations. Each operation turns a request
+number into (name, method, path, json body). Scenarios with a setup step
+create the state they need (e.g. a fleet of calls to poll) through the
+backend before the timed run starts.
+"""
+import asyncio
+import random
+
+# A catalog agent, so it also works against a fake-retell with strict IDs
+AGENT_ID = "agent_000000"
+
+
+def list_agents(n, state):
+    return "list_agents", "GET", "/agents/", None
+
+
+def create_web_call(n, state):
+    return "create_web_call", "POST", "/calls/create-web-call", {"agent_id": AGENT_ID}
+
+
+def poll_call(n, state):
+    call_ids = state["call_ids"]
+    return "get_call", "GET", f"/calls/{call_ids[n % len(call_ids)]}", None
+
+
+async def create_fleet(client, state, calls: int, ended_fraction: float) -> None:
+    """Create `calls` web calls to poll, and end a fraction of them."""
+    semaphore = asyncio.Semaphore(50)
+
+    async def create(n):
+        async with semaphore:
+            response = await client.post("/calls/create-web-call", json={"agent_id": AGENT_ID})
+            response.raise_for_status()
+            call_id = response.json()["call_id"]
+            if n < calls * ended_fraction:
+                (await client.delete(f"/calls/{call_id}")).raise_for_status()
+            return call_id
+
+    call_ids = await asyncio.gather(*(create(n) for n in range(calls)))
+    random.Random(0).shuffle(call_ids)
+    state["call_ids"] = call_ids
+
+
+SCENARIOS = {
+    # Many clients opening the agent picker at once
+    "agent-storm": {"operations": [(1, list_agents)]},
+    # Users starting calls in a burst
+    "call-burst": {"operations": [(1, create_web_call)]},
+    # Clients polling the status of their live (and recently ended) calls
+    "status-poll": {"operations": [(1, poll_call)], "setup": create_fleet},
+    # Rough production mix: mostly polling, some agent lists and new calls
+    "mixed": {
+        "operations": [(10, poll_call), (2, list_agents), (1, create_web_call)],
+        "setup": create_fleet,
+    },
+}
+
+
+def operation_picker(scenario: dict, seed: int):
+    """Deterministic weighted choice of the next operation."""
+    rng = random.Random(seed)
+    weights = [weight for weight, _ in scenario["operations"]]
+    operations = [operation for _, operation in scenario["operations"]]
+    return lambda: rng.choices(operations, weights)[0]
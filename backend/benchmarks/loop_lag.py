@@ -0,0 +1,112 @@
+"""
+Event-loop lag regression check for the call status endpoints.
+
+Hammers GET /calls/{call_id} and DELETE /calls/{call_id} (in-process, over
+ASGI) against a local stand-in whose responses take --latency seconds, while a
+heartbeat task measures how late the loop wakes it up. Any handler that blocks
+the loop on an upstream round trip shows up as lag of at least --latency.
+
+Exits with status 1 when the --percentile lag (p99 by default) exceeds
+--threshold, so it can gate CI. The single max is printed but not gated on:
+one GC pause or scheduler hiccup on a busy runner would make it flaky. The
+default threshold sits below --latency, so a handler that blocks the loop on
+every request still fails.
+
+Usage (from the backend directory):
+    python -m benchmarks.loop_lag --duration 5 --threshold 0.08
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("RETELL_API_KEY", "bench_key")
+
+from benchmarks.bench_client_pool import percentile
+from benchmarks.standin import start_standin_process
+
+
+async def heartbeat(interval, lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def hammer(app, workers, duration):
+    import httpx
+
+    deadline = time.monotonic() + duration
+    requests = 0
+
+    async def worker(client, n):
+        nonlocal requests
+        while time.monotonic() < deadline:
+            call_id = f"call_{n}_{requests}"
+            (await client.get(f"/calls/{call_id}")).raise_for_status()
+            (await client.delete(f"/calls/{call_id}")).raise_for_status()
+            requests += 2
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://lag", timeout=None) as client:
+        await asyncio.gather(*(worker(client, n) for n in range(workers)))
+    return requests
+
+
+async def measure(app, args):
+    import upstream
+
+    # Create the client and warm it up first, as startup and real traffic would
+    upstream.init_upstream()
+    await hammer(app, args.workers, min(args.duration, 0.5))
+    lags, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(args.interval, lags, stop))
+    try:
+        requests = await hammer(app, args.workers, args.duration)
+    finally:
+        stop.set()
+        await beat
+        await upstream.close_upstream()
+    return requests, lags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to hammer for")
+    parser.add_argument("--workers", type=int, default=20, help="concurrent clients")
+    parser.add_argument("--latency", type=float, default=0.1, help="stand-in latency in seconds")
+    parser.add_argument("--interval", type=float, default=0.01, help="heartbeat interval in seconds")
+    parser.add_argument("--threshold", type=float, default=0.08, help="allowed lag in seconds at --percentile")
+    parser.add_argument("--percentile", type=float, default=99, help="lag percentile to gate on")
+    parser.add_argument("--transport", choices=["httpx", "sdk"], default=None)
+    args = parser.parse_args()
+
+    server, url = start_standin_process(latency=args.latency)
+
+    from config import settings
+    import main as backend
+
+    settings.retell_base_url = url
+    if args.transport:
+        settings.retell_transport = args.transport
+
+    requests, lags = asyncio.run(measure(backend.app, args))
+    server.terminate()
+
+    max_lag = max(lags, default=0.0)
+    gated = percentile(lags, args.percentile) if lags else 0.0
+    print(
+        f"transport={settings.retell_transport} requests={requests} "
+        f"lag p50={percentile(lags, 50) * 1000:.1f}ms "
+        f"p99={percentile(lags, 99) * 1000:.1f}ms max={max_lag * 1000:.1f}ms "
+        f"(threshold {args.threshold * 1000:.0f}ms at p{args.percentile:g})"
+    )
+    if gated > args.threshold:
+        print(f"FAIL: p{args.percentile:g} event loop lag above threshold", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Run fake-retell (the repo's one Retell stand-in) locally for the benchmarks.
+
+The app is loaded from fake-retell/main.py, the same code the fake-retell
+container serves, with strict_ids off so benchmarks can use arbitrary agent
+and call IDs. Its state is module-level, so run one stand-in per process.
+"""
+from pathlib import Path
+import importlib.util
+import multiprocessing
+import socket
+import sys
+import threading
+import time
+
+import uvicorn
+
+FAKE_RETELL = Path(__file__).resolve().parents[2] / "fake-retell" / "main.py"
+
+
+def load_fake():
+    """fake-retell's main module, imported once per process as fake_retell."""
+    module = sys.modules.get("fake_retell")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("fake_retell", FAKE_RETELL)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["fake_retell"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def _configure(fake, latency, error_rate, tail_rate, tail_latency, history, agents):
+    fake.calls.clear()
+    fake.stats.clear()
+    for key, value in {
+        "latency_dist": "constant",
+        "latency_ms": latency * 1000,
+        "tail_rate": tail_rate,
+        "tail_ms": tail_latency * 1000,
+        "error_rate": error_rate,
+        "error_status": 500,
+        "rate_limit_rps": 0.0,
+        "rate_limit_rate": 0.0,
+        "agent_count": agents,
+        "call_history": history,
+        "strict_ids": False,
+    }.items():
+        setattr(fake.settings, key, value)
+
+
+def _listen() -> socket.socket:
+    # asyncio only sets TCP_NODELAY on connections accepted from an IPPROTO_TCP
+    # socket; without it every response stalls on a delayed ACK (~40ms)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(2048)
+    return sock
+
+
+def _server(fake) -> uvicorn.Server:
+    return uvicorn.Server(uvicorn.Config(fake.app, lifespan="off", log_level="warning", access_log=False))
+
+
+def _knob(name: str):
+    return property(lambda self: getattr(self.fake.settings, name),
+                    lambda self, value: setattr(self.fake.settings, name, value))
+
+
+def _seconds(name: str):
+    """A knob in seconds over a setting in milliseconds."""
+    return property(lambda self: getattr(self.fake.settings, name) / 1000,
+                    lambda self, value: setattr(self.fake.settings, name, value * 1000))
+
+
+class StandIn:
+    """A fake-retell app serving from a background thread of this process.
+
+    latency and tail_latency are in seconds; these knobs write through to
+    the app's settings, so they can be changed at any time.
+    """
+
+    latency = _seconds("latency_ms")
+    tail_latency = _seconds("tail_ms")
+    tail_rate = _knob("tail_rate")
+    error_rate = _knob("error_rate")
+    error_status = _knob("error_status")
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.sock = _listen()
+        self.server = _server(fake)
+        self.thread = threading.Thread(target=self.server.run, kwargs={"sockets": [self.sock]}, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+
+    @property
+    def requests(self) -> int:
+        """Retell API requests answered so far."""
+        return sum(counters["requests"] for counters in self.fake.stats.values())
+
+    def shutdown(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def start_standin(latency: float = 0.0, error_rate: float = 0.0,
+                  tail_rate: float = 0.0, tail_latency: float = 0.0) -> StandIn:
+    """Start the stand-in on a free local port; returns the running server.
+
+    A tail_rate fraction of responses take tail_latency instead of latency,
+    and an error_rate fraction fail with error_status (500 unless changed).
+    These knobs can be changed on the returned server at any time.
+    """
+    fake = load_fake()
+    _configure(fake, latency, error_rate, tail_rate, tail_latency, history=0, agents=10)
+    return StandIn(fake)
+
+
+def base_url(server: StandIn) -> str:
+    return server.url
+
+
+def _serve(latency, error_rate, history, agents, port_queue):
+    fake = load_fake()
+    _configure(fake, latency, error_rate, 0.0, 0.0, history, agents)
+    sock = _listen()
+    port_queue.put(sock.getsockname()[1])
+    _server(fake).run(sockets=[sock])
+
+
+def start_standin_process(latency: float = 0.0, error_rate: float = 0.0, history: int = 0, agents: int = 10):
+    """Run the stand-in in a child process so it does not compete for our GIL.
+
+    Returns (process, base_url); terminate the process when done. Counters
+    are at {base_url}/_fake/stats.
+    """
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(latency, error_rate, history, agents, port_queue), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{port_queue.get(timeout=10)}"
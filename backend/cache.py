@@ -0,0 +1,4 @@
+# The caches live in the shared gateway core; re-exported for the backend modules
+from retell_gateway.cache import AsyncTTLCache, CacheEntry, LRUCache, caches
+
+__all__ = ["AsyncTTLCache", "CacheEntry", "LRUCache", "caches"]
@@ -12,6 +12,108 @@ class Settings(BaseSettings):
         "https://localhost:3000",
         "https://127.0.0.1:3000"
     ]
+
+    # Upstream Retell client (shared across requests)
+    retell_transport: str = "httpx"  # "httpx" (asyncio-native) or "sdk"
+    retell_base_url: Optional[str] = None
+    retell_timeout: float = 30.0
+    retell_max_connections: int = 100
+    retell_max_keepalive_connections: int = 20
+    retell_keepalive_expiry: float = 30.0
+    # Agents per list-agents page; every page is fetched when listing agents
+    retell_agent_page_size: int = 1000
+
+    # Thread pool for blocking SDK calls (RETELL_TRANSPORT=sdk): jobs beyond
+    # workers + max_queue, or waiting longer than queue_timeout, get a 503
+    sdk_executor_workers: int = 32
+    sdk_executor_max_queue: int = 64
+    sdk_executor_queue_timeout: float = 5.0
+
+    # Upstream guard: adaptive in-flight limit and circuit breaker
+    upstream_limit_initial: int = 50
+    upstream_limit_min: int = 1
+    upstream_limit_max: int = 200
+    upstream_latency_target: float = 2.0  # slower successes shrink the limit
+    upstream_failure_threshold: int = 5  # consecutive failures that open the circuit
+    upstream_open_seconds: float = 10.0
+    upstream_half_open_probes: int = 1
+
+    # Per-endpoint hedging/retry overrides, e.g. (as JSON in UPSTREAM_POLICIES)
+    # {"retrieve_call": {"hedge": true}, "create_web_call": {"retries": 3}}
+    upstream_policies: dict[str, dict] = {}
+
+    # Agent list cache (seconds); stale entries are served while refreshing
+    agent_cache_ttl: float = 30.0
+    agent_cache_stale_ttl: float = 300.0
+    # File (ideally on tmpfs, e.g. /dev/shm/retell-agents) through which all
+    # uvicorn workers on a host share one agent list; one elected worker
+    # refreshes it. Unset keeps a separate cache per worker.
+    agent_shared_cache_path: Optional[str] = None
+
+    # Details of ended/errored calls kept locally (they never change)
+    terminal_call_cache_size: int = 10000
+
+    # POST /calls/batch limits
+    batch_max_calls: int = 1000
+    batch_concurrency: int = 20
+
+    # POST /calls/create-web-calls limits
+    bulk_create_max_calls: int = 500
+    bulk_create_concurrency: int = 20
+
+    # Retell webhooks (POST /webhooks/retell), verified with
+    # RETELL_WEBHOOK_KEY (defaults to the API key)
+    retell_webhook_key: str = ""
+    webhook_verify_signature: bool = True
+    # Non-terminal call state from webhooks is served for this many seconds
+    call_state_max_age: float = 30.0
+
+    # SQLite call registry (created calls, webhook events, fetched details),
+    # written in batches by a background writer
+    call_registry_path: str = "calls.db"
+    call_registry_queue_size: int = 10000
+    call_registry_batch_size: int = 500
+    call_registry_flush_interval: float = 0.2
+    registry_max_page_size: int = 1000
+
+    # Call status streams (GET /calls/{call_id}/events, /calls/events): one
+    # watcher per call polls every call_watch_interval seconds and is kept
+    # call_watch_linger seconds after its last subscriber leaves
+    call_watch_interval: float = 2.0
+    call_watch_linger: float = 60.0
+    sse_heartbeat_interval: float = 15.0
+    sse_retry_ms: int = 3000
+    sse_max_calls_per_stream: int = 100
+
+    # GET /calls export: calls per Retell list-calls page (Retell allows up
+    # to 1000) and gzip level when the response is compressed
+    call_export_page_size: int = 1000
+    call_export_gzip_level: int = 6
+
+    # In-memory call analytics (/analytics/calls) over the call registry;
+    # the time series covers analytics_max_days before startup onwards
+    analytics_enabled: bool = True
+    analytics_max_days: int = 400
+    analytics_load_chunk_size: int = 100000
+    analytics_max_buckets: int = 5000
+
+    # Cache-Control max-age for ETag-validated responses (0 = always revalidate)
+    response_max_age: int = 0
+    # Pre-encoded responses (agents, terminal calls) at least this many bytes
+    # are also kept gzip- and brotli-compressed, served per Accept-Encoding
+    response_compress_min_size: int = 1024
+    response_gzip_level: int = 6
+    response_brotli_quality: int = 5
+
+    # Request tracing: slow (seconds) or failed requests are always kept,
+    # others sampled at trace_sample_rate; see /debug/traces
+    trace_enabled: bool = True
+    trace_buffer_size: int = 200
+    trace_slow_threshold: float = 1.0
+    trace_sample_rate: float = 0.01
+
+    # Token required in X-Admin-Token for /admin and /debug; unset disables them (404)
+    admin_token: str = ""
     
     class Config:
         env_file = "../.env"
@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from resilience import UpstreamUnavailable
+import asyncio
+import logging
+import threading
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    __slots__ = ("func", "started", "cancelled", "loop", "on_start")
+
+    def __init__(self, func: Callable[[], Any], loop: asyncio.AbstractEventLoop, on_start: asyncio.Future):
+        self.func = func
+        self.loop = loop
+        self.on_start = on_start
+        self.started = False
+        self.cancelled = False
+
+
+class BoundedExecutor:
+    """
+    Dedicated thread pool for blocking upstream calls, with backpressure.
+
+    At most ``workers`` jobs run and ``max_queue`` wait. Submissions beyond
+    that are rejected at once with 503, and a job that has not started
+    within ``queue_timeout`` seconds is abandoned with 503 instead of
+    running late for a client that has likely given up.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def run(self, func: Callable[[], Any]) -> Any:
+        """Run func() on the pool and return its result, or raise UpstreamUnavailable."""
+        with self._lock:
+            if self.active + self.queued >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise UpstreamUnavailable(f"{self.name} pool saturated", 1)
+            self.queued += 1
+
+        loop = asyncio.get_running_loop()
+        job = _Job(func, loop, loop.create_future())
+        future = loop.run_in_executor(self._pool, self._work, job)
+        try:
+            # Not wait_for: on 3.11 it returns instead of raising when cancelled as on_start resolves
+            async with asyncio.timeout(self.queue_timeout):
+                await asyncio.shield(job.on_start)
+        except BaseException as e:
+            with self._lock:
+                abandoned = not job.started
+                if abandoned:
+                    # The worker skips it when it gets there; stop counting it as queued now
+                    job.cancelled = True
+                    self.queued -= 1
+            if not isinstance(e, asyncio.TimeoutError):
+                # Cancelled (or failed) while waiting; a job that already started runs to completion unawaited
+                raise
+            if abandoned:
+                self.timed_out += 1
+                logger.warning(f"{self.name}: job waited over {self.queue_timeout}s for a thread")
+                raise UpstreamUnavailable(f"{self.name} queue wait timeout", self.queue_timeout)
+            # Started just as the wait timed out: it has a thread, so wait for its result
+        return await future
+
+    def _work(self, job: _Job) -> Any:
+        with self._lock:
+            if job.cancelled:
+                return None
+            job.started = True
+            self.queued -= 1
+            self.active += 1
+        job.loop.call_soon_threadsafe(_set_started, job.on_start)
+        try:
+            return job.func()
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def status(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _set_started(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
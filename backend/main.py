@@ -1,8 +1,26 @@
+from pathlib import Path
+import sys
+
+# Make the shared retell_gateway package (at the repository root) importable
+for _root in Path(__file__).resolve().parents:
+    if (_root / "retell_gateway").is_dir():
+        if str(_root) not in sys.path:
+            sys.path.insert(0, str(_root))
+        break
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
+from analytics import call_analytics
 from config import settings
-from routes import agents, calls
+from metrics import MetricsMiddleware, registry as metrics_registry
+from tracing import TracingMiddleware
+from routes import admin, agents, analytics, calls, debug, registry, webhooks
+from store import call_registry
+from upstream import init_upstream, close_upstream, upstream_status
+from watchers import hub
+import asyncio
 import logging
 
 # Configure logging
@@ -29,11 +47,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
 # Include routers
 app.include_router(agents.router)
 app.include_router(calls.router)
+app.include_router(admin.router)
+app.include_router(debug.router)
+app.include_router(registry.router)
+app.include_router(webhooks.router)
+app.include_router(analytics.router)
 
 @app.get("/")
 async def root():
@@ -52,15 +78,23 @@ async def health_check():
         # Basic health check
         api_key_configured = bool(settings.retell_api_key)
         
+        upstream = upstream_status()
+        
         return {
-            "status": "healthy",
+            "status": "degraded" if upstream and upstream["state"] != "closed" else "healthy",
             "api_key_configured": api_key_configured,
-            "debug_mode": settings.debug
+            "debug_mode": settings.debug,
+            "upstream": upstream
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Service unhealthy")
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled errors"""
@@ -84,12 +118,31 @@ async def startup_event():
     if not settings.retell_api_key:
         logger.warning("⚠️  RETELL_API_KEY not configured!")
         logger.warning("   Please set your Retell API key in environment variables")
+    else:
+        init_upstream()
+        if agents.shared_agent_cache is not None:
+            # Workers elect one leader to refresh the host-wide agent list
+            agents.shared_agent_cache.start(lambda: agents.fetch_agents(init_upstream()))
+
+    await call_registry.start()
+    if settings.analytics_enabled:
+        # Loads the registry in the background; /analytics answers 503 until done
+        app.state.analytics_loader = asyncio.create_task(call_analytics.start(call_registry))
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown tasks"""
     logger.info("Shutting down Retell Web Voice Call API")
+    await hub.close()
+    if agents.shared_agent_cache is not None:
+        await agents.shared_agent_cache.stop()
+    await close_upstream()
+    loader = getattr(app.state, "analytics_loader", None)
+    if loader is not None:
+        call_analytics.stop()
+        await loader
+    await call_registry.stop()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,250 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+import asyncio
+import time
+
+# Recording happens on the event loop thread only, so plain dict and list
+# updates are safe without locks. Values that live elsewhere (guard state,
+# thread pool, caches) are read by collectors when /metrics is scraped.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, labels: Labels, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (last is +Inf)..., sum]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        bounds = self.buckets + (float("inf"),)
+        for labels, series in self._values.items():
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {series[-1]!r}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}"
+
+
+class Registry:
+    """Metrics plus collectors that refresh scrape-time gauges before rendering."""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            collect()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")))
+REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and status.", ("method", "route", "status")))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."))
+
+UPSTREAM_DURATION = registry.register(Histogram(
+    "retell_upstream_request_duration_seconds", "Retell API call latency per method and outcome.",
+    ("method", "outcome")))
+UPSTREAM_IN_FLIGHT = registry.register(Gauge(
+    "retell_upstream_in_flight", "Retell API calls currently in flight per method.", ("method",)))
+UPSTREAM_GUARD = registry.register(Gauge(
+    "retell_upstream_guard", "Upstream guard state: limit, in_flight, shed, open (1 if circuit open).",
+    ("field",)))
+
+EXECUTOR_QUEUE = registry.register(Gauge(
+    "executor_queue_depth", "Jobs waiting for a thread in the default thread pool."))
+EXECUTOR_THREADS = registry.register(Gauge(
+    "executor_threads", "Threads started by the default thread pool."))
+
+SDK_EXECUTOR = registry.register(Gauge(
+    "retell_sdk_executor", "SDK thread pool: workers, max_queue, active, queued, completed, rejected, timed_out.",
+    ("field",)))
+
+WEBHOOK_EVENTS = registry.register(Counter(
+    "retell_webhook_events_total", "Retell webhook deliveries by event and outcome.", ("event", "outcome")))
+
+CALL_WATCHERS = registry.register(Gauge(
+    "call_watchers", "Call status streams: watched_calls, polling, subscribers, polls, events, dropped_subscribers.",
+    ("field",)))
+
+CACHE_LOOKUPS = registry.register(Gauge(
+    "cache_lookups", "Lookups per in-process cache and result (hit, stale_hit, miss).", ("cache", "result")))
+CACHE_HIT_RATIO = registry.register(Gauge(
+    "cache_hit_ratio", "Fraction of lookups served from cache.", ("cache",)))
+CACHE_ENTRIES = registry.register(Gauge(
+    "cache_entries", "Entries currently held per cache.", ("cache",)))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request counts, latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Route template (not the raw path) keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (scope["method"], route, str(status))
+            REQUESTS.inc(labels)
+            REQUEST_DURATION.observe(labels, time.perf_counter() - start)
+
+
+class track_upstream:
+    """Context manager timing one Retell API call: ``with track_upstream("retrieve_call"):``"""
+
+    __slots__ = ("method", "start")
+
+    def __init__(self, method: str):
+        self.method = method
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.inc((self.method,))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        UPSTREAM_IN_FLIGHT.dec((self.method,))
+        if exc_type is None:
+            outcome = "ok"
+        else:
+            outcome = str(getattr(exc, "status_code", None) or exc_type.__name__)
+        UPSTREAM_DURATION.observe((self.method, outcome), time.perf_counter() - self.start)
+        return False
+
+
+def _collect_executor() -> None:
+    try:
+        executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    except RuntimeError:
+        executor = None
+    EXECUTOR_QUEUE.set((), executor._work_queue.qsize() if executor else 0)
+    EXECUTOR_THREADS.set((), len(executor._threads) if executor else 0)
+
+
+def _collect_caches() -> None:
+    from cache import caches
+
+    for name, cache in caches.items():
+        stats = cache.stats()
+        for key, result in (("hits", "hit"), ("stale_hits", "stale_hit"), ("misses", "miss")):
+            if key in stats:
+                CACHE_LOOKUPS.set((name, result), stats[key])
+        CACHE_HIT_RATIO.set((name,), stats["hit_ratio"])
+        CACHE_ENTRIES.set((name,), stats["entries"])
+
+
+def _collect_guard() -> None:
+    from upstream import upstream_status
+
+    status = upstream_status()
+    if status is None:
+        return
+    for field in ("limit", "in_flight", "shed"):
+        UPSTREAM_GUARD.set((field,), status[field])
+    UPSTREAM_GUARD.set(("open",), 1 if status["state"] == "open" else 0)
+    for field, value in status.get("executor", {}).items():
+        SDK_EXECUTOR.set((field,), value)
+
+
+def _collect_watchers() -> None:
+    from watchers import hub
+
+    for field, value in hub.stats().items():
+        CALL_WATCHERS.set((field,), value)
+
+
+registry.collectors.extend([_collect_executor, _collect_caches, _collect_guard, _collect_watchers])
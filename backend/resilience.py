@@ -0,0 +1,298 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from typing import Any, Awaitable, Callable, Optional
+from config import settings
+from retell_gateway.errors import parse_retry_after
+import asyncio
+import httpx
+import logging
+import math
+import random
+import time
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(HTTPException):
+    """Request shed without calling upstream (circuit open or over the limit)."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"Retell API unavailable: {reason}",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Errors that say the upstream is unhealthy (not our own bad requests)."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        return True  # timeouts, connection errors
+    return status_code == 429 or status_code >= 500
+
+
+def is_retryable(error: BaseException, idempotent: bool = False) -> bool:
+    """
+    Failures that are safe to retry. For non-idempotent calls (creating a
+    web call) only those where Retell cannot have processed the request:
+    it was never sent (connect errors, pool timeout) or Retell itself
+    refused it (429, 503). A 502 or 504 comes from a gateway that may have
+    passed the request on, so only idempotent calls retry those.
+    """
+    if isinstance(error, UpstreamUnavailable):
+        return False  # shed by our own guard; retrying only adds load
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in ((429, 502, 503, 504) if idempotent else (429, 503))
+    cause = error.__cause__ or error
+    return isinstance(cause, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """The Retry-After (seconds) an upstream error asked for, from our client or the SDK."""
+    seconds = getattr(error, "retry_after", None)
+    if seconds is not None:
+        return seconds
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    return parse_retry_after(headers.get("retry-after")) if headers is not None else None
+
+
+class UpstreamGuard:
+    """
+    Adaptive concurrency limit plus circuit breaker for upstream calls.
+
+    The in-flight limit follows AIMD: each fast success raises it by about
+    one per limit's worth of requests, while failures and slow responses
+    (over latency_target) cut it by 10%, at most once per latency_target so
+    a single slow burst does not collapse it. Requests over the limit are
+    shed immediately instead of queueing. After failure_threshold
+    consecutive failures the circuit opens for open_seconds, then lets
+    half_open_probes requests through to decide whether to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, initial_limit: int = 50, min_limit: int = 1, max_limit: int = 200,
+                 latency_target: float = 2.0, failure_threshold: int = 5,
+                 open_seconds: float = 10.0, half_open_probes: int = 1):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = self.CLOSED
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._last_decrease = 0.0
+        self._probes = 0
+        self.shed = 0
+        self.successes = 0
+        self.failures = 0
+
+    @classmethod
+    def from_settings(cls) -> "UpstreamGuard":
+        return cls(
+            initial_limit=settings.upstream_limit_initial,
+            min_limit=settings.upstream_limit_min,
+            max_limit=settings.upstream_limit_max,
+            latency_target=settings.upstream_latency_target,
+            failure_threshold=settings.upstream_failure_threshold,
+            open_seconds=settings.upstream_open_seconds,
+            half_open_probes=settings.upstream_half_open_probes,
+        )
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one in-flight slot for an upstream call, or raise UpstreamUnavailable."""
+        probe = self._admit()
+        self.in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        except UpstreamUnavailable:
+            raise  # shed locally (e.g. SDK pool saturated); says nothing about upstream health
+        except Exception as e:
+            if is_upstream_failure(e):
+                self._on_failure(probe)
+            else:
+                self._on_success(probe, time.monotonic() - start)
+            raise
+        else:
+            self._on_success(probe, time.monotonic() - start)
+        finally:
+            self.in_flight -= 1
+            if probe:
+                self._probes -= 1
+
+    def _admit(self) -> bool:
+        """Returns True if this request is a half-open probe."""
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self.shed += 1
+                raise UpstreamUnavailable("circuit open", remaining)
+            self.state = self.HALF_OPEN
+            logger.info("Upstream circuit half-open, probing")
+
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                self.shed += 1
+                raise UpstreamUnavailable("circuit half-open", 1)
+            self._probes += 1
+            return True
+
+        if self.in_flight >= int(self.limit):
+            self.shed += 1
+            raise UpstreamUnavailable("too many requests in flight", 1)
+        return False
+
+    def _on_success(self, probe: bool, latency: float) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        if probe:
+            self.state = self.CLOSED
+            logger.info("Upstream circuit closed")
+        if latency > self.latency_target:
+            self._decrease()
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _on_failure(self, probe: bool) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._decrease()
+        if probe or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"Upstream circuit open after {self.consecutive_failures} consecutive failures"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease >= self.latency_target:
+            self._last_decrease = now
+            self.limit = max(self.min_limit, self.limit * 0.9)
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "shed": self.shed,
+        }
+
+
+class RequestPolicy:
+    """
+    Per-endpoint hedging and retry policy.
+
+    With hedge enabled (idempotent reads only), a second attempt is started
+    if the first has not finished after the endpoint's recent p95 latency
+    (never less than hedge_min_delay), and whichever succeeds first wins.
+    Hedges are capped at hedge_budget times the request count. Retryable
+    failures (see is_retryable) get up to ``retries`` more attempts with
+    full-jitter exponential backoff, or after the upstream's Retry-After
+    when it sends one; a Retry-After longer than retry_max_delay is not
+    waited out, the error is returned instead.
+    """
+
+    def __init__(self, name: str, hedge: bool = False, hedge_min_delay: float = 0.05,
+                 hedge_budget: float = 0.1, retries: int = 0,
+                 retry_base_delay: float = 0.1, retry_max_delay: float = 2.0,
+                 window: int = 200, idempotent: bool = False):
+        self.name = name
+        self.idempotent = idempotent
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_budget = hedge_budget
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._latencies = deque(maxlen=window)
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.retries_made = 0
+
+    async def run(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        """Run attempt() under this policy and return the first successful result."""
+        self.requests += 1
+        for n in range(self.retries + 1):
+            try:
+                if self.hedge:
+                    return await self._hedged(attempt)
+                return await self._timed(attempt)
+            except Exception as e:
+                if n >= self.retries or not is_retryable(e, self.idempotent):
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** n))
+                elif delay > self.retry_max_delay:
+                    raise  # the caller is better off with the 429/503 than a long wait
+                self.retries_made += 1
+                logger.info(f"Retrying {self.name} after {e} in {delay:.2f}s (attempt {n + 2})")
+                await asyncio.sleep(delay)
+
+    async def _timed(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.monotonic()
+        result = await attempt()
+        self._latencies.append(time.monotonic() - start)
+        return result
+
+    def hedge_delay(self) -> float:
+        if len(self._latencies) < 20:
+            return max(self.hedge_min_delay, settings.upstream_latency_target)
+        ordered = sorted(self._latencies)
+        return max(self.hedge_min_delay, ordered[int(0.95 * (len(ordered) - 1))])
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        first = asyncio.ensure_future(self._timed(attempt))
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_delay())
+            if done or self.hedges >= self.hedge_budget * self.requests:
+                return await first
+
+            self.hedges += 1
+            second = asyncio.ensure_future(self._timed(attempt))
+            pending.add(second)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "hedge": self.hedge,
+            "retries": self.retries,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "retries_made": self.retries_made,
+        }
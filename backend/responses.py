@@ -0,0 +1,36 @@
+from fastapi import Request
+from fastapi.responses import Response
+from typing import Any
+from config import settings
+from retell_gateway import responses as gateway_responses
+from retell_gateway.responses import ENCODINGS, encode_json, etag_matches, negotiate_encoding, variant_etag
+
+__all__ = [
+    "ENCODINGS", "EncodedPayload", "cached_json_response", "compress", "encode_json",
+    "etag_matches", "negotiate_encoding", "variant_etag",
+]
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return gateway_responses.compress(
+        body, encoding, settings.response_gzip_level, settings.response_brotli_quality
+    )
+
+
+class EncodedPayload(gateway_responses.EncodedPayload):
+    """The gateway core's pre-encoded payload, compressed per RESPONSE_* settings."""
+
+    __slots__ = ()
+
+    def __init__(self, value: Any, compressed: bool = False):
+        super().__init__(
+            value, compressed,
+            min_size=settings.response_compress_min_size,
+            gzip_level=settings.response_gzip_level,
+            brotli_quality=settings.response_brotli_quality,
+        )
+
+
+def cached_json_response(request: Request, payload: EncodedPayload) -> Response:
+    """Serve a pre-encoded payload (see the gateway core) with RESPONSE_MAX_AGE."""
+    return gateway_responses.cached_json_response(request, payload, settings.response_max_age)
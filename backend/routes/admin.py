@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Depends, Header
+from typing import Optional
+from cache import caches
+from config import settings
+import hmac
+import logging
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency that checks X-Admin-Token; without ADMIN_TOKEN the routes do not exist"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_admin_token or "", settings.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/cache")
+async def cache_stats():
+    """Hit/miss/refresh counters for every in-process cache."""
+    return {name: cache.stats() for name, cache in caches.items()}
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(name: Optional[str] = None):
+    """
+    Invalidate cached entries.
+
+    Args:
+        name: Cache to invalidate (e.g. "agents"); all caches when omitted
+
+    Returns:
+        Number of entries removed per cache
+    """
+    if name is not None and name not in caches:
+        raise HTTPException(status_code=404, detail=f"Cache {name} not found")
+
+    targets = [name] if name is not None else list(caches)
+    removed = {target: caches[target].invalidate() for target in targets}
+    logger.info(f"Invalidated caches: {removed}")
+    return {"invalidated": removed}
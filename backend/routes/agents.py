@@ -1,72 +1,82 @@
-from fastapi import APIRouter, HTTPException, Depends
-from retell import Retell
+from fastapi import APIRouter, Depends, Request
+from cache import AsyncTTLCache
 from config import settings
-import logging
+from responses import EncodedPayload, cached_json_response
+from retell_gateway import SharedPayloadCache, normalize_agent, upstream_http_error
+from tracing import TracedRoute
+from upstream import get_upstream
 import asyncio
+import logging
 
-router = APIRouter(prefix="/agents", tags=["agents"])
+router = APIRouter(prefix="/agents", tags=["agents"], route_class=TracedRoute)
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-def get_retell_client():
-    """Dependency to get Retell client instance"""
-    if not settings.retell_api_key:
-        raise HTTPException(status_code=500, detail="Retell API key not configured")
-    return Retell(api_key=settings.retell_api_key)
+# Formatted, pre-encoded agent payloads, shared by every request
+agent_cache = AsyncTTLCache(
+    "agents",
+    ttl=settings.agent_cache_ttl,
+    stale_ttl=settings.agent_cache_stale_ttl,
+)
+agent_detail_cache = AsyncTTLCache(
+    "agent_details",
+    ttl=settings.agent_cache_ttl,
+    stale_ttl=settings.agent_cache_stale_ttl,
+)
+# Agent list shared by every worker on the host (AGENT_SHARED_CACHE_PATH);
+# started on startup, None when each worker keeps its own
+shared_agent_cache = (
+    SharedPayloadCache(
+        "agents_shared",
+        settings.agent_shared_cache_path,
+        ttl=settings.agent_cache_ttl,
+        stale_ttl=settings.agent_cache_stale_ttl,
+    )
+    if settings.agent_shared_cache_path else None
+)
+
+async def fetch_agents(upstream) -> EncodedPayload:
+    """Fetch and format the agent list from the Retell API."""
+    logger.info("Fetching agents from Retell API")
+    raw_agents = await upstream.list_agents()
+    logger.info(f"Retrieved {len(raw_agents)} agents")
+
+    def encode() -> EncodedPayload:
+        formatted_agents = [normalize_agent(agent) for agent in raw_agents]
+        return EncodedPayload({"agents": formatted_agents, "count": len(formatted_agents)}, True)
+
+    # Normalizing, encoding and compressing a large catalog takes a while; keep it off the loop
+    return await asyncio.to_thread(encode)
+
+async def fetch_agent(upstream, agent_id: str) -> EncodedPayload:
+    """Fetch and format a single agent from the Retell API."""
+    logger.info(f"Fetching agent details for ID: {agent_id}")
+    agent = await upstream.retrieve_agent(agent_id)
+
+    return await asyncio.to_thread(EncodedPayload, normalize_agent(agent, detail=True), True)
 
 @router.get("/")
-async def list_agents(retell_client: Retell = Depends(get_retell_client)):
+async def list_agents(request: Request, upstream=Depends(get_upstream)):
     """List all available Retell AI agents for the authenticated account."""
-    logger.info("Fetching agents from Retell API")
     try:
-        loop = asyncio.get_running_loop()
-        agents_response = await loop.run_in_executor(None, retell_client.agent.list)
+        if shared_agent_cache is not None:
+            payload = await shared_agent_cache.get(lambda: fetch_agents(upstream))
+        else:
+            payload = await agent_cache.get("agents", lambda: fetch_agents(upstream))
     except Exception as e:
         logger.error(f"Error calling Retell API (list agents): {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch agents: {e}")
-
-    # Extract raw agent list
-    if hasattr(agents_response, 'data'):
-        raw_agents = agents_response.data
-    elif isinstance(agents_response, list):
-        raw_agents = agents_response
-    else:
-        raw_agents = []
+        raise upstream_http_error(e, "Agents not found", "Failed to fetch agents")
 
-    logger.info(f"Retrieved {len(raw_agents)} agents")
-
-    formatted_agents = []
-    for agent in raw_agents:
-        formatted_agents.append({
-            "agent_id": getattr(agent, 'agent_id', getattr(agent, 'id', None)),
-            "agent_name": getattr(agent, 'agent_name', getattr(agent, 'name', 'Unknown')),
-            "voice_id": getattr(agent, 'voice_id', None),
-            "language": getattr(agent, 'language', 'en-US'),
-            "response_engine": getattr(agent, 'response_engine', None)
-        })
-
-    return {"agents": formatted_agents, "count": len(formatted_agents)}
+    return cached_json_response(request, payload)
 
 @router.get("/{agent_id}")
-async def get_agent(agent_id: str, retell_client: Retell = Depends(get_retell_client)):
+async def get_agent(agent_id: str, request: Request, upstream=Depends(get_upstream)):
     """Get details of a specific agent by ID."""
-    logger.info(f"Fetching agent details for ID: {agent_id}")
     try:
-        loop = asyncio.get_running_loop()
-        agent = await loop.run_in_executor(None, lambda: retell_client.agent.retrieve(agent_id))
+        payload = await agent_detail_cache.get(agent_id, lambda: fetch_agent(upstream, agent_id))
     except Exception as e:
         logger.error(f"Error fetching agent {agent_id}: {e}")
-        if "not found" in str(e).lower():
-            raise HTTPException(status_code=404, detail=f"Agent {agent_id} not found")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch agent: {e}")
+        raise upstream_http_error(e, f"Agent {agent_id} not found", "Failed to fetch agent")
 
-    return {
-        "agent_id": getattr(agent, 'agent_id', getattr(agent, 'id', None)),
-        "agent_name": getattr(agent, 'agent_name', getattr(agent, 'name', 'Unknown')),
-        "voice_id": getattr(agent, 'voice_id', None),
-        "language": getattr(agent, 'language', 'en-US'),
-        "response_engine": getattr(agent, 'response_engine', None),
-        "prompt": getattr(agent, 'prompt', None),
-        "webhook_url": getattr(agent, 'webhook_url', None)
-    }
+    return cached_json_response(request, payload)
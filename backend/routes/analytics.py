@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Literal, Optional
+from analytics import BUCKETS, call_analytics
+from config import settings
+from tracing import TracedRoute
+import asyncio
+import logging
+import time
+
+router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=TracedRoute)
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Window shown when since is omitted
+DEFAULT_WINDOW = {"minute": 86400, "hour": 7 * 86400, "day": 90 * 86400}
+
+@router.get("/calls")
+async def call_analytics_summary(
+    agent_id: Optional[str] = None,
+    bucket: Literal["minute", "hour", "day"] = "hour",
+    since: Optional[float] = Query(None, description="Timeline start (unix seconds)"),
+    until: Optional[float] = Query(None, description="Timeline end (unix seconds, default now)"),
+    top: int = Query(20, ge=1, le=1000, description="Busiest agents to break down")
+):
+    """
+    Call volume, duration and concurrency stats over every call in the registry.
+
+    Args:
+        agent_id: Only this agent's calls
+        bucket: Timeline resolution (UTC minutes, hours or days)
+        since, until: Timeline window
+        top: Number of agents listed, busiest first
+
+    Returns:
+        Counts by status, duration count/mean/percentiles (ms), per-agent
+        breakdown, and a timeline of calls started plus peak and mean
+        concurrent calls per bucket
+    """
+    if not settings.analytics_enabled:
+        raise HTTPException(status_code=404, detail="Call analytics are disabled")
+    if call_analytics.loading:
+        raise HTTPException(status_code=503, detail="Call analytics are still loading",
+                            headers={"Retry-After": "5"})
+
+    until = until if until is not None else time.time()
+    since = since if since is not None else until - DEFAULT_WINDOW[bucket]
+    if (until - since) / 60 / BUCKETS[bucket] > settings.analytics_max_buckets:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.analytics_max_buckets} {bucket} buckets per request"
+        )
+
+    def compute() -> dict:
+        summary = call_analytics.summary(agent_id, top)
+        summary["timeline"] = call_analytics.timeline(bucket, since, until, agent_id)
+        return summary
+
+    try:
+        return await asyncio.to_thread(compute)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No calls recorded for agent {agent_id}")
+    except Exception as e:
+        logger.error(f"Error computing call analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to compute analytics: {str(e)}")
@@ -1,10 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends
-from retell import Retell
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from typing import List, Literal, Optional
+from cache import LRUCache
 from config import settings
+from responses import EncodedPayload, cached_json_response
+from retell_gateway import is_not_found, upstream_http_error
+from store import TERMINAL_STATUSES, call_registry
+from tracing import TracedRoute, exclude_current_trace
+from upstream import get_upstream
+from watchers import event_stream, hub
+from contextlib import aclosing
+import asyncio
+import csv
+import io
+import json
 import logging
+import time
+import zlib
 
-router = APIRouter(prefix="/calls", tags=["calls"])
+router = APIRouter(prefix="/calls", tags=["calls"], route_class=TracedRoute)
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -18,16 +33,105 @@ class WebCallResponse(BaseModel):
     access_token: str
     sample_rate: int = 24000
 
-def get_retell_client():
-    """Dependency to get Retell client instance"""
-    if not settings.retell_api_key:
-        raise HTTPException(status_code=500, detail="Retell API key not configured")
-    return Retell(api_key=settings.retell_api_key)
+class BulkWebCallRequest(BaseModel):
+    calls: List[CreateWebCallRequest]
+
+class BatchCallRequest(BaseModel):
+    call_ids: List[str]
+
+# Statuses Retell's list-calls can filter on; "registered" is filtered here
+UPSTREAM_CALL_STATUSES = {"not_connected", "ongoing", "ended", "error"}
+CALL_STATUSES = UPSTREAM_CALL_STATUSES | {"registered"}
+CSV_FIELDS = ("call_id", "agent_id", "call_status", "start_timestamp", "end_timestamp", "duration", "metadata")
+
+terminal_calls = LRUCache("terminal_calls", max_entries=settings.terminal_call_cache_size)
+
+def format_call(call: dict) -> dict:
+    """Normalize an upstream call object into our response shape."""
+    return {
+        "call_id": call['call_id'],
+        "agent_id": call.get('agent_id'),
+        "call_status": call.get('call_status'),
+        "start_timestamp": call.get('start_timestamp'),
+        "end_timestamp": call.get('end_timestamp'),
+        "duration": call.get('duration', call.get('duration_ms')),
+        "metadata": call.get('metadata', {})
+    }
+
+def _percentile(ordered: list, pct: float):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def start_web_call(upstream, request: CreateWebCallRequest) -> WebCallResponse:
+    """Create one web call upstream and shape the response."""
+    logger.info(f"Creating web call for agent: {request.agent_id}")
+
+    web_call = await upstream.create_web_call(
+        agent_id=request.agent_id,
+        metadata=request.metadata
+    )
+
+    logger.info(f"Web call created successfully: {web_call['call_id']}")
+    call_registry.record("created", {
+        "call_id": web_call['call_id'],
+        "agent_id": request.agent_id,
+        "call_status": web_call.get('call_status') or "registered",
+        "metadata": request.metadata,
+    })
+
+    return WebCallResponse(
+        call_id=web_call['call_id'],
+        access_token=web_call['access_token'],
+        sample_rate=web_call.get('sample_rate') or 24000
+    )
+
+def web_call_error(e: Exception, agent_id: str) -> HTTPException:
+    """Map an upstream create-web-call failure to an HTTP error."""
+    if isinstance(e, HTTPException):
+        return e
+    if is_not_found(e):
+        return HTTPException(
+            status_code=404, 
+            detail=f"Agent {agent_id} not found"
+        )
+    elif getattr(e, "status_code", None) == 401 or "unauthorized" in str(e).lower():
+        return HTTPException(
+            status_code=401, 
+            detail="Invalid API key or insufficient permissions"
+        )
+    return HTTPException(
+        status_code=500, 
+        detail=f"Failed to create web call: {str(e)}"
+    )
+
+async def fetch_call(upstream, call_id: str) -> dict:
+    """
+    Call details, served locally once the call has reached a terminal state
+    or while webhook events keep its state fresh.
+    """
+    cached = terminal_calls.get(call_id)
+    if cached is not None:
+        return cached.value
+    return await load_call(upstream, call_id)
+
+async def load_call(upstream, call_id: str) -> dict:
+    """fetch_call past the terminal call cache."""
+    cached = call_registry.get(call_id)
+    if cached is not None:
+        return cached
+
+    call = format_call(await upstream.retrieve_call(call_id))
+    call_registry.record("observed", call)
+    if call["call_status"] in TERMINAL_STATUSES:
+        # Pre-encoded: GET /calls/{call_id} serves it as is from now on
+        terminal_calls.put(call_id, EncodedPayload(call, compressed=True))
+    return call
 
 @router.post("/create-web-call", response_model=WebCallResponse)
 async def create_web_call(
     request: CreateWebCallRequest,
-    retell_client: Retell = Depends(get_retell_client)
+    upstream=Depends(get_upstream)
 ):
     """
     Create a new web call session with the specified agent.
@@ -39,50 +143,364 @@ async def create_web_call(
         Web call details including access token and call ID
     """
     try:
-        logger.info(f"Creating web call for agent: {request.agent_id}")
+        return await start_web_call(upstream, request)
+    except Exception as e:
+        logger.error(f"Error creating web call: {str(e)}")
+        raise web_call_error(e, request.agent_id)
+
+@router.post("/create-web-calls")
+async def create_web_calls(
+    bulk: BulkWebCallRequest,
+    upstream=Depends(get_upstream)
+):
+    """
+    Create many web call sessions concurrently.
+    
+    Args:
+        bulk: List of {agent_id, metadata} items
         
-        # Create the web call using Retell SDK
-        # Offload potentially blocking SDK call to thread pool
-        import asyncio
-        loop = asyncio.get_running_loop()
-        web_call = await loop.run_in_executor(
-            None,
-            lambda: retell_client.call.create_web_call(
-                agent_id=request.agent_id,
-                metadata=request.metadata
-            )
+    Returns:
+        NDJSON stream with one record per item in completion order (with
+        its index, and either a WebCallResponse or an error), followed by
+        a summary trailer with per-batch timing stats
+    """
+    if len(bulk.calls) > settings.bulk_create_max_calls:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.bulk_create_max_calls} calls per request"
         )
+
+    logger.info(f"Creating {len(bulk.calls)} web calls")
+    semaphore = asyncio.Semaphore(settings.bulk_create_concurrency)
+
+    async def create_one(index: int, item: CreateWebCallRequest) -> dict:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                web_call = await start_web_call(upstream, item)
+                record = {"index": index, "agent_id": item.agent_id, "status_code": 200,
+                          "call": web_call.model_dump()}
+            except Exception as e:
+                logger.error(f"Error creating web call: {str(e)}")
+                error = web_call_error(e, item.agent_id)
+                record = {"index": index, "agent_id": item.agent_id,
+                          "status_code": error.status_code, "error": error.detail}
+            record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return record
+
+    async def ndjson():
+        started = time.perf_counter()
+        tasks = [asyncio.ensure_future(create_one(i, item)) for i, item in enumerate(bulk.calls)]
+        latencies, failed = [], 0
+        try:
+            for next_record in asyncio.as_completed(tasks):
+                record = await next_record
+                latencies.append(record["elapsed_ms"])
+                failed += record["status_code"] != 200
+                yield json.dumps(record) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        latencies.sort()
+        summary = {
+            "requested": len(tasks),
+            "created": len(tasks) - failed,
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.post("/batch")
+async def batch_call_details(
+    batch: BatchCallRequest,
+    request: Request,
+    stream: bool = False,
+    upstream=Depends(get_upstream)
+):
+    """
+    Get details of many calls in one request.
+    
+    Args:
+        batch: Call IDs to fetch; duplicates are fetched once
+        stream: Stream results as NDJSON in completion order (also selected
+            by Accept: application/x-ndjson)
         
-        logger.info(f"Web call created successfully: {web_call.call_id}")
-        
-        return WebCallResponse(
-            call_id=web_call.call_id,
-            access_token=web_call.access_token,
-            sample_rate=getattr(web_call, 'sample_rate', 24000)
+    Returns:
+        One record per call ID with either the call details or an error
+    """
+    call_ids = list(dict.fromkeys(batch.call_ids))
+    if len(call_ids) > settings.batch_max_calls:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_max_calls} call IDs per batch"
         )
-        
+
+    logger.info(f"Fetching {len(call_ids)} calls in batch")
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+    async def fetch_one(call_id: str) -> dict:
+        async with semaphore:
+            try:
+                call = await fetch_call(upstream, call_id)
+                return {"call_id": call_id, "status_code": 200, "call": call}
+            except Exception as e:
+                logger.error(f"Error fetching call {call_id}: {str(e)}")
+                error = upstream_http_error(e, f"Call {call_id} not found", "Failed to fetch call")
+                return {"call_id": call_id, "status_code": error.status_code, "error": error.detail}
+
+    tasks = [asyncio.ensure_future(fetch_one(call_id)) for call_id in call_ids]
+
+    if stream or "application/x-ndjson" in request.headers.get("accept", ""):
+        async def ndjson():
+            try:
+                for next_result in asyncio.as_completed(tasks):
+                    yield json.dumps(await next_result) + "\n"
+            finally:
+                # Client went away: stop fetching the rest
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    results = await asyncio.gather(*tasks)
+    return {"calls": results, "count": len(results)}
+
+def export_filter(agent_id: Optional[str], statuses: set,
+                  since: Optional[float], until: Optional[float]) -> dict:
+    """Retell list-calls filter_criteria for the export filters it supports."""
+    criteria = {}
+    if agent_id:
+        criteria["agent"] = [{"agent_id": agent_id}]
+    if statuses and statuses <= UPSTREAM_CALL_STATUSES:
+        criteria["call_status"] = {"op": "in", "type": "enum", "value": sorted(statuses)}
+    # Retell timestamps are epoch milliseconds; until is exclusive
+    if since is not None and until is not None:
+        criteria["start_timestamp"] = {"op": "bt", "type": "range",
+                                       "value": [int(since * 1000), int(until * 1000) - 1]}
+    elif since is not None:
+        criteria["start_timestamp"] = {"op": "ge", "type": "number", "value": int(since * 1000)}
+    elif until is not None:
+        criteria["start_timestamp"] = {"op": "lt", "type": "number", "value": int(until * 1000)}
+    return criteria
+
+async def call_pages(upstream, first: dict, criteria: dict, page_size: int, order: str):
+    """Items of each list-calls page, fetching the next page while one is sent."""
+    page, next_page = first, None
+    try:
+        while True:
+            if page["has_more"] and page["pagination_key"]:
+                next_page = asyncio.ensure_future(upstream.list_calls(
+                    criteria, limit=page_size, pagination_key=page["pagination_key"], sort_order=order
+                ))
+            yield page["items"]
+            if next_page is None:
+                return
+            page = await next_page
+            next_page = None
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+def csv_rows(calls: List[dict]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for call in calls:
+        writer.writerow([
+            json.dumps(call["metadata"]) if field == "metadata" else call[field]
+            for field in CSV_FIELDS
+        ])
+    return buffer.getvalue()
+
+@router.get("")
+async def export_calls(
+    request: Request,
+    agent_id: Optional[str] = None,
+    status: Optional[str] = Query(None, description="Comma-separated call statuses"),
+    since: Optional[float] = Query(None, description="Started at or after (unix seconds)"),
+    until: Optional[float] = Query(None, description="Started before (unix seconds)"),
+    order: Literal["descending", "ascending"] = "descending",
+    limit: Optional[int] = Query(None, ge=1, description="Stop after this many calls"),
+    export_format: Optional[Literal["ndjson", "csv"]] = Query(None, alias="format"),
+    gzip: Optional[bool] = None,
+    upstream=Depends(get_upstream)
+):
+    """
+    Export call history from Retell, page by page.
+
+    Args:
+        agent_id: Only calls for this agent
+        status: Only calls in these statuses
+        since, until: Start time range
+        order: By start time
+        limit: Maximum number of calls to export
+        format: ndjson (default) or csv; also chosen by Accept: text/csv
+        gzip: Compress the stream (default: if Accept-Encoding allows it)
+
+    Returns:
+        Streamed NDJSON (one call per line) or CSV with a header row. Only
+        one page is held in memory (plus the next, being fetched). If Retell
+        fails part-way, NDJSON ends with an {"error": ...} line and a CSV
+        response is aborted.
+    """
+    statuses = {s.strip() for s in (status or "").split(",") if s.strip()}
+    unknown = statuses - CALL_STATUSES
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown call status: {', '.join(sorted(unknown))}")
+    if export_format is None:
+        export_format = "csv" if "text/csv" in request.headers.get("accept", "") else "ndjson"
+    if gzip is None:
+        gzip = "gzip" in request.headers.get("accept-encoding", "")
+
+    # Passed upstream where Retell supports the filter, and always checked here
+    criteria = export_filter(agent_id, statuses, since, until)
+    since_ms = since * 1000 if since is not None else None
+    until_ms = until * 1000 if until is not None else None
+
+    def matches(call: dict) -> bool:
+        if agent_id and call["agent_id"] != agent_id:
+            return False
+        if statuses and call["call_status"] not in statuses:
+            return False
+        if since_ms is not None or until_ms is not None:
+            started = call["start_timestamp"]
+            if started is None:
+                return False
+            if (since_ms is not None and started < since_ms) or (until_ms is not None and started >= until_ms):
+                return False
+        return True
+
+    exclude_current_trace()
+    page_size = min(settings.call_export_page_size, limit or settings.call_export_page_size)
+    logger.info(f"Exporting calls as {export_format} (filter: {criteria})")
+    try:
+        # First page before responding, so failures still get a proper status
+        first = await upstream.list_calls(criteria, limit=page_size, sort_order=order)
     except Exception as e:
-        logger.error(f"Error creating web call: {str(e)}")
-        if "not found" in str(e).lower():
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Agent {request.agent_id} not found"
-            )
-        elif "unauthorized" in str(e).lower():
-            raise HTTPException(
-                status_code=401, 
-                detail="Invalid API key or insufficient permissions"
-            )
-        else:
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Failed to create web call: {str(e)}"
-            )
+        logger.error(f"Error listing calls: {str(e)}")
+        raise upstream_http_error(e, "Calls not found", "Failed to list calls")
+
+    compressor = zlib.compressobj(settings.call_export_gzip_level, zlib.DEFLATED, 31) if gzip else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        if compressor is None:
+            return data
+        # Sync flush: each page reaches the client as soon as it is ready
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    async def body():
+        exported = 0
+        if export_format == "csv":
+            yield encode(",".join(CSV_FIELDS) + "\r\n")
+        try:
+            async with aclosing(call_pages(upstream, first, criteria, page_size, order)) as pages:
+                async for items in pages:
+                    calls = [call for call in map(format_call, items) if matches(call)]
+                    if limit is not None:
+                        calls = calls[:limit - exported]
+                    exported += len(calls)
+                    if calls:
+                        if export_format == "csv":
+                            yield encode(csv_rows(calls))
+                        else:
+                            yield encode("".join(json.dumps(call) + "\n" for call in calls))
+                    if limit is not None and exported >= limit:
+                        break
+        except Exception as e:
+            logger.error(f"Call export failed after {exported} calls: {str(e)}")
+            if export_format == "csv":
+                raise  # abort the response: a cut-off CSV would look complete
+            error = upstream_http_error(e, "Calls not found", "Failed to list calls")
+            yield encode(json.dumps({"error": error.detail, "status_code": error.status_code,
+                                     "exported": exported}) + "\n")
+        logger.info(f"Exported {exported} calls")
+        if compressor is not None:
+            yield compressor.flush()
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="calls.{export_format}"',
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if compressor is not None:
+        headers["Content-Encoding"] = "gzip"
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+def sse_response(call_ids: List[str], upstream, last_event_id: Optional[str]) -> Response:
+    """text/event-stream of status transitions for call_ids."""
+    exclude_current_trace()
+    if hub.caught_up(call_ids, last_event_id):
+        # Tells EventSource to stop reconnecting: nothing more will happen
+        return Response(status_code=204)
+
+    async def fetch(call_id: str) -> dict:
+        return await fetch_call(upstream, call_id)
+
+    return StreamingResponse(
+        event_stream(call_ids, fetch, last_event_id),
+        media_type="text/event-stream",
+        # No caching, and no buffering by reverse proxies such as nginx
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/events")
+async def call_events(
+    ids: str = Query(..., description="Comma-separated call IDs"),
+    last_event_id: Optional[str] = Header(None),
+    upstream=Depends(get_upstream)
+):
+    """
+    Server-sent events with status transitions for many calls.
+
+    Args:
+        ids: Comma-separated call IDs to follow
+
+    Returns:
+        text/event-stream of "status" events (the call object) and "error"
+        events, with heartbeats; ends once every call has ended. Reconnects
+        with Last-Event-ID are replayed what they missed.
+    """
+    call_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if not call_ids or len(call_ids) > settings.sse_max_calls_per_stream:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Between 1 and {settings.sse_max_calls_per_stream} call IDs per stream"
+        )
+    logger.info(f"Streaming status for {len(call_ids)} calls")
+    return sse_response(call_ids, upstream, last_event_id)
+
+@router.get("/{call_id}/events")
+async def call_status_events(
+    call_id: str,
+    last_event_id: Optional[str] = Header(None),
+    upstream=Depends(get_upstream)
+):
+    """
+    Server-sent events with status transitions for one call.
+
+    Args:
+        call_id: The ID of the call to follow
+
+    Returns:
+        text/event-stream of "status" events (the call object), ending after
+        the call ends; an "error" event if the call cannot be found
+    """
+    logger.info(f"Streaming status for call: {call_id}")
+    return sse_response([call_id], upstream, last_event_id)
 
 @router.get("/{call_id}")
 async def get_call_details(
     call_id: str, 
-    retell_client: Retell = Depends(get_retell_client)
+    request: Request,
+    upstream=Depends(get_upstream)
 ):
     """
     Get details of a specific call by ID.
@@ -93,33 +511,21 @@ async def get_call_details(
     Returns:
         Call object with details
     """
+    cached = terminal_calls.get(call_id)
+    if cached is not None:
+        return cached_json_response(request, cached)
     try:
         logger.info(f"Fetching call details for ID: {call_id}")
-        call = retell_client.call.retrieve(call_id)
-        
-        return {
-            "call_id": call.call_id,
-            "agent_id": getattr(call, 'agent_id', None),
-            "call_status": getattr(call, 'call_status', None),
-            "start_timestamp": getattr(call, 'start_timestamp', None),
-            "end_timestamp": getattr(call, 'end_timestamp', None),
-            "duration": getattr(call, 'duration', None),
-            "metadata": getattr(call, 'metadata', {})
-        }
+        return await load_call(upstream, call_id)
         
     except Exception as e:
         logger.error(f"Error fetching call {call_id}: {str(e)}")
-        if "not found" in str(e).lower():
-            raise HTTPException(status_code=404, detail=f"Call {call_id} not found")
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Failed to fetch call: {str(e)}"
-        )
+        raise upstream_http_error(e, f"Call {call_id} not found", "Failed to fetch call")
 
 @router.delete("/{call_id}")
 async def end_call(
     call_id: str, 
-    retell_client: Retell = Depends(get_retell_client)
+    upstream=Depends(get_upstream)
 ):
     """
     End an active call.
@@ -133,17 +539,10 @@ async def end_call(
     try:
         logger.info(f"Ending call: {call_id}")
         
-        # Note: The actual method name might vary based on the SDK version
-        # Check the Retell SDK documentation for the correct method
-        result = retell_client.call.end_call(call_id)
+        await upstream.end_call(call_id)
         
         return {"message": f"Call {call_id} ended successfully"}
         
     except Exception as e:
         logger.error(f"Error ending call {call_id}: {str(e)}")
-        if "not found" in str(e).lower():
-            raise HTTPException(status_code=404, detail=f"Call {call_id} not found")
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Failed to end call: {str(e)}"
-        )
+        raise upstream_http_error(e, f"Call {call_id} not found", "Failed to end call")
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from routes.admin import require_admin
+from tracing import traces
+import logging
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_admin)])
+
+@router.get("/traces")
+async def slowest_traces(
+    limit: int = Query(20, ge=1, le=500),
+    min_duration_ms: float = 0.0,
+    route: Optional[str] = None,
+):
+    """
+    Slowest recent traces, with their span breakdown.
+
+    Args:
+        limit: Maximum number of traces to return
+        min_duration_ms: Only traces at least this slow
+        route: Only traces for this route template (e.g. "/calls/{call_id}")
+
+    Returns:
+        Buffer stats and traces sorted by duration, slowest first
+    """
+    selected = traces.slowest(limit, min_duration_ms / 1000, route)
+    return {"buffer": traces.stats(), "traces": [trace.to_dict() for trace in selected]}
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """One recorded trace by ID (from the X-Trace-Id response header)."""
+    trace = traces.find(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found or not sampled")
+    return trace.to_dict()
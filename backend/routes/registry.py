@@ -0,0 +1,96 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from config import settings
+from store import call_registry
+from tracing import TracedRoute
+import logging
+
+router = APIRouter(prefix="/registry", tags=["registry"], route_class=TracedRoute)
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+def page(calls: list, limit: int) -> dict:
+    """Response for one page of calls, newest first, with the cursor for the next page."""
+    return {
+        "calls": calls,
+        "count": len(calls),
+        # Pass as ?until= to continue after the last call
+        "next_until": calls[-1]["created_at"] if len(calls) == limit else None,
+    }
+
+@router.get("/calls")
+async def list_calls(
+    agent_id: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[float] = Query(None, description="Created at or after (unix seconds)"),
+    until: Optional[float] = Query(None, description="Created before (unix seconds)"),
+    limit: int = Query(100, ge=1)
+):
+    """
+    Calls recorded by this backend, newest first.
+
+    Args:
+        agent_id: Only calls for this agent
+        status: Only calls in this status (registered, ongoing, ended, error)
+        since, until: Creation time range; until is also the paging cursor
+
+    Returns:
+        Page of calls with next_until for the following page
+    """
+    limit = min(limit, settings.registry_max_page_size)
+    try:
+        calls = await call_registry.query_calls(
+            agent_id=agent_id, status=status, since=since, until=until, limit=limit
+        )
+    except Exception as e:
+        logger.error(f"Error querying call registry: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to query calls: {str(e)}")
+    return page(calls, limit)
+
+@router.get("/calls/{call_id}")
+async def get_registered_call(call_id: str):
+    """
+    One call as last recorded locally; does not contact Retell.
+
+    Args:
+        call_id: The ID of the call
+
+    Returns:
+        Call object with its creation time
+    """
+    try:
+        call = await call_registry.get_call(call_id)
+    except Exception as e:
+        logger.error(f"Error reading call {call_id} from registry: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to read call: {str(e)}")
+    if call is None:
+        raise HTTPException(status_code=404, detail=f"Call {call_id} not in registry")
+    return call
+
+@router.get("/agents/{agent_id}/active")
+async def active_calls(
+    agent_id: str,
+    until: Optional[float] = Query(None, description="Created before (unix seconds)"),
+    limit: int = Query(100, ge=1)
+):
+    """
+    Registered or ongoing calls for an agent, newest first.
+
+    Statuses are as fresh as the last webhook or call lookup; without
+    webhooks, calls nobody looked up after they ended still show here.
+
+    Args:
+        agent_id: The agent
+        until: Paging cursor from next_until
+
+    Returns:
+        Page of active calls
+    """
+    limit = min(limit, settings.registry_max_page_size)
+    try:
+        calls = await call_registry.active_calls(agent_id, until=until, limit=limit)
+    except Exception as e:
+        logger.error(f"Error querying active calls for {agent_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to query calls: {str(e)}")
+    return page(calls, limit)
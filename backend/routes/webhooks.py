@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, Header, Request
+from typing import Optional
+from config import settings
+from metrics import WEBHOOK_EVENTS
+from routes.calls import format_call
+from store import LIFECYCLE_EVENTS, call_registry
+from tracing import TracedRoute
+from watchers import hub
+import hashlib
+import hmac
+import json
+import logging
+import re
+import time
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"], route_class=TracedRoute)
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# x-retell-signature: "v=<unix ms>,d=<hex HMAC-SHA256 of body + timestamp>"
+SIGNATURE = re.compile(r"^v=(\d+),d=([0-9a-f]+)$")
+
+# Signed deliveries older (or newer) than this are rejected as replays
+SIGNATURE_TOLERANCE_MS = 5 * 60 * 1000
+
+def verify_signature(body: bytes, key: str, signature: str) -> bool:
+    """Check a Retell webhook signature against the raw request body."""
+    match = SIGNATURE.match(signature or "")
+    if not match:
+        return False
+    timestamp = match.group(1)
+    if abs(time.time() * 1000 - int(timestamp)) > SIGNATURE_TOLERANCE_MS:
+        return False
+    expected = hmac.new(key.encode(), body + timestamp.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, match.group(2))
+
+@router.post("/retell")
+async def retell_webhook(
+    request: Request,
+    x_retell_signature: Optional[str] = Header(None)
+):
+    """
+    Receive a Retell call lifecycle webhook.
+
+    call_started, call_ended and call_analyzed update local call state,
+    which GET /calls/{call_id} serves instead of polling Retell; events
+    are written to the local store in the background. Other events are
+    acknowledged and ignored.
+
+    Returns:
+        Whether the event was queued or ignored
+    """
+    body = await request.body()
+
+    if settings.webhook_verify_signature:
+        key = settings.retell_webhook_key or settings.retell_api_key
+        if not key or not verify_signature(body, key, x_retell_signature):
+            WEBHOOK_EVENTS.inc(("unknown", "bad_signature"))
+            logger.warning("Rejected Retell webhook with invalid signature")
+            raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    try:
+        payload = json.loads(body)
+        event = payload["event"]
+        call = payload["call"]
+        call_id = call["call_id"]
+    except (ValueError, KeyError, TypeError):
+        WEBHOOK_EVENTS.inc(("unknown", "invalid"))
+        raise HTTPException(status_code=400, detail="Expected {\"event\": ..., \"call\": {\"call_id\": ...}}")
+
+    if event not in LIFECYCLE_EVENTS:
+        WEBHOOK_EVENTS.inc(("other", "ignored"))
+        return {"status": "ignored", "event": event}
+
+    call = format_call(call)
+    if not call_registry.publish(event, call, payload):
+        # Retell redelivers on non-2xx responses
+        WEBHOOK_EVENTS.inc((event, "rejected"))
+        logger.error(f"Webhook queue full, rejected {event} for call {call_id}")
+        raise HTTPException(status_code=503, detail="Webhook queue full", headers={"Retry-After": "1"})
+
+    hub.notify(call)
+    WEBHOOK_EVENTS.inc((event, "queued"))
+    logger.debug(f"Queued {event} for call {call_id}")
+    return {"status": "queued", "event": event, "call_id": call_id}
@@ -0,0 +1,407 @@
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from cache import caches
+from config import settings
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Webhook events that carry call lifecycle state
+LIFECYCLE_EVENTS = {"call_started", "call_ended", "call_analyzed"}
+
+# Calls in these states never change again
+TERMINAL_STATUSES = {"ended", "error"}
+# Spelled out in active_calls_by_agent and CallStore.active_calls as well
+ACTIVE_STATUSES = ("registered", "ongoing")
+
+# Status only moves forward: a late call_started never overwrites call_ended
+STATUS_ORDER = {"registered": 0, "ongoing": 1, "ended": 2, "error": 2}
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS call_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    call_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    received_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calls (
+    call_id TEXT PRIMARY KEY,
+    agent_id TEXT,
+    call_status TEXT,
+    status_order INTEGER NOT NULL DEFAULT 0,
+    metadata TEXT,
+    created_at REAL NOT NULL,
+    start_timestamp INTEGER,
+    end_timestamp INTEGER,
+    duration INTEGER,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_by_created ON calls (created_at);
+CREATE INDEX IF NOT EXISTS calls_by_agent ON calls (agent_id, created_at);
+CREATE INDEX IF NOT EXISTS calls_by_status ON calls (call_status, created_at);
+CREATE INDEX IF NOT EXISTS active_calls_by_agent ON calls (agent_id, created_at)
+    WHERE call_status IN ('registered', 'ongoing');
+"""
+
+UPSERT_CALL = """
+INSERT INTO calls (call_id, agent_id, call_status, status_order, metadata, created_at,
+                   start_timestamp, end_timestamp, duration, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(call_id) DO UPDATE SET
+    agent_id = coalesce(excluded.agent_id, calls.agent_id),
+    metadata = coalesce(excluded.metadata, calls.metadata),
+    created_at = min(calls.created_at, excluded.created_at),
+    call_status = CASE WHEN excluded.status_order >= calls.status_order
+                       THEN coalesce(excluded.call_status, calls.call_status) ELSE calls.call_status END,
+    status_order = max(calls.status_order, excluded.status_order),
+    start_timestamp = coalesce(excluded.start_timestamp, calls.start_timestamp),
+    end_timestamp = coalesce(excluded.end_timestamp, calls.end_timestamp),
+    duration = coalesce(excluded.duration, calls.duration),
+    updated_at = excluded.updated_at
+"""
+
+CALL_COLUMNS = "call_id, agent_id, call_status, metadata, created_at, start_timestamp, end_timestamp, duration"
+
+# (source, received_at, formatted call, webhook payload or None); source is
+# "created", "observed" (fetched from Retell) or the webhook event name
+Update = Tuple[str, float, dict, Optional[dict]]
+
+
+def _row_to_call(row: tuple) -> dict:
+    call_id, agent_id, call_status, metadata, created_at, start_timestamp, end_timestamp, duration = row
+    return {
+        "call_id": call_id,
+        "agent_id": agent_id,
+        "call_status": call_status,
+        "start_timestamp": start_timestamp,
+        "end_timestamp": end_timestamp,
+        "duration": duration,
+        "metadata": json.loads(metadata) if metadata else {},
+        "created_at": created_at,
+    }
+
+
+class CallStore:
+    """
+    SQLite call registry plus the raw webhook event log.
+
+    Writes are blocking and come from one writer at a time. WAL mode lets
+    readers run alongside the writer; each reader thread gets its own
+    connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # 64 MB page cache keeps the index pages the upserts touch in memory
+        self._conn.execute("PRAGMA cache_size=-65536")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # Version 1 kept only webhook state in calls; it is rebuilt as the registry
+            self._conn.execute("DROP TABLE IF EXISTS calls")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._readers = threading.local()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._readers.conn = sqlite3.connect(self.path, check_same_thread=False)
+        return conn
+
+    def write_batch(self, updates: List[Update]) -> None:
+        """Upsert call rows and append webhook events, in one transaction."""
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO call_events (call_id, event, received_at, payload) VALUES (?, ?, ?, ?)",
+                [(call["call_id"], source, received_at, json.dumps(payload))
+                 for source, received_at, call, payload in updates if payload is not None],
+            )
+            self._conn.executemany(UPSERT_CALL, [
+                (
+                    call["call_id"],
+                    call.get("agent_id"),
+                    call.get("call_status"),
+                    STATUS_ORDER.get(call.get("call_status"), 0),
+                    json.dumps(call["metadata"]) if call.get("metadata") else None,
+                    # Calls first seen through a webhook date from when they started
+                    call["start_timestamp"] / 1000 if call.get("start_timestamp") else received_at,
+                    call.get("start_timestamp"),
+                    call.get("end_timestamp"),
+                    call.get("duration"),
+                    received_at,
+                )
+                for source, received_at, call, payload in updates
+            ])
+
+    def load_latest(self, limit: int) -> List[Tuple[float, dict]]:
+        """Most recently created ended/errored calls as (updated_at, call), newest first."""
+        rows = self._reader().execute(
+            f"""
+            SELECT updated_at, {CALL_COLUMNS} FROM calls
+            WHERE call_status IN ('ended', 'error') ORDER BY created_at DESC LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        return [(row[0], _row_to_call(row[1:])) for row in rows]
+
+    def get_call(self, call_id: str) -> Optional[dict]:
+        row = self._reader().execute(f"SELECT {CALL_COLUMNS} FROM calls WHERE call_id = ?", (call_id,)).fetchone()
+        return _row_to_call(row) if row else None
+
+    def active_calls(self, agent_id: str, until: Optional[float] = None, limit: int = 100) -> List[dict]:
+        """Registered or ongoing calls for one agent created before until, newest first (uses active_calls_by_agent)."""
+        rows = self._reader().execute(
+            f"""
+            SELECT {CALL_COLUMNS} FROM calls
+            WHERE agent_id = ? AND call_status IN ('registered', 'ongoing') AND created_at < ?
+            ORDER BY created_at DESC LIMIT ?
+            """,
+            (agent_id, until if until is not None else float("inf"), limit),
+        ).fetchall()
+        return [_row_to_call(row) for row in rows]
+
+    def query_calls(self, agent_id: Optional[str] = None, status: Optional[str] = None,
+                    since: Optional[float] = None, until: Optional[float] = None,
+                    limit: int = 100) -> List[dict]:
+        """Calls created in [since, until), newest first, optionally for one agent and status."""
+        clauses, params = [], []
+        if agent_id is not None:
+            clauses.append("agent_id = ?")
+            params.append(agent_id)
+        if status is not None:
+            # With an agent, calls_by_agent is the selective index; the unary +
+            # keeps the planner off calls_by_status, where "ended" is most rows
+            clauses.append("+call_status = ?" if agent_id is not None else "call_status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._reader().execute(
+            f"SELECT {CALL_COLUMNS} FROM calls {where} ORDER BY created_at DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        return [_row_to_call(row) for row in rows]
+
+    def scan_calls(self, chunk_size: int) -> Iterator[List[tuple]]:
+        """Every call as (call_id, agent_id, call_status, start_timestamp, end_timestamp, duration), in chunks."""
+        cursor = self._reader().execute(
+            "SELECT call_id, agent_id, call_status, start_timestamp, end_timestamp, duration FROM calls"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CallRegistry:
+    """
+    Every call this backend created or heard about, kept in SQLite.
+
+    Updates (created calls, webhook events, call details fetched from
+    Retell) never block: ``record`` queues them and a background writer
+    takes up to ``batch_size`` at a time, or whatever arrived within
+    ``flush_interval``, and writes them in one transaction. Queries run on
+    worker threads.
+
+    Webhook events are also applied to in-memory call state at once, so
+    GET /calls/{call_id} can answer without waiting for the write.
+
+    Listeners (e.g. call analytics) are called on a worker thread with each
+    batch after it is written.
+    """
+
+    def __init__(self, name: str, path: str, queue_size: int, batch_size: int,
+                 flush_interval: float, max_age: float, max_entries: int):
+        self.name = name
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._store: Optional[CallStore] = None
+        # call_id -> (wall-clock time updated, formatted call)
+        self._state: Dict[str, Tuple[float, dict]] = {}
+        self.listeners: List[Callable[[List[Update]], None]] = []
+        self.received = 0
+        self.written = 0
+        self.rejected = 0
+        self.write_errors = 0
+        self.hits = 0
+        self.misses = 0
+        caches[name] = self
+
+    async def start(self) -> None:
+        """Open the store, load recently finished calls and start the writer."""
+        if self._writer is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self._store = await asyncio.to_thread(CallStore, self.path)
+        latest = await asyncio.to_thread(self._store.load_latest, self.max_entries)
+        # Oldest first, so eviction order matches publish()
+        for updated_at, call in reversed(latest):
+            call.pop("created_at")  # same shape as GET /calls/{call_id}
+            self._state[call["call_id"]] = (updated_at, call)
+        self._writer = asyncio.create_task(self._write_loop(self._queue))
+        logger.info(f"Call registry ready ({self.path}, {len(self._state)} calls loaded)")
+
+    async def stop(self) -> None:
+        """Write out queued updates and close the store."""
+        if self._writer is None:
+            return
+        queue, self._queue = self._queue, None
+        await queue.put(None)  # tells the writer to finish after what is queued
+        await self._writer
+        await asyncio.to_thread(self._store.close)
+        self._writer = None
+        self._store = None
+
+    def record(self, source: str, call: dict, payload: Optional[dict] = None) -> bool:
+        """Queue one call update for the registry; False if the queue is full (or not started)."""
+        if self._queue is None or self._queue.full():
+            self.rejected += 1
+            return False
+        self.received += 1
+        self._queue.put_nowait((source, time.time(), call, payload))
+        return True
+
+    def publish(self, event: str, call: dict, payload: dict) -> bool:
+        """Apply a webhook event to local state and queue it; False if the queue is full."""
+        if not self.record(event, call, payload):
+            return False
+        call_id = call["call_id"]
+        current = self._state.get(call_id)
+        status_order = STATUS_ORDER.get(call.get("call_status"), 0)
+        if current is None or status_order >= STATUS_ORDER.get(current[1].get("call_status"), 0):
+            # Re-insert so the most recently updated calls are evicted last
+            self._state.pop(call_id, None)
+            self._state[call_id] = (time.time(), call)
+            if len(self._state) > self.max_entries:
+                # Dicts keep insertion order: drop the oldest call
+                self._state.pop(next(iter(self._state)))
+        return True
+
+    def get(self, call_id: str) -> Optional[dict]:
+        """Call details from webhook state, if terminal or updated within max_age."""
+        entry = self._state.get(call_id)
+        if entry is not None:
+            updated_at, call = entry
+            if call.get("call_status") in TERMINAL_STATUSES or time.time() - updated_at < self.max_age:
+                self.hits += 1
+                return call
+        self.misses += 1
+        return None
+
+    async def get_call(self, call_id: str) -> Optional[dict]:
+        return await self._read(CallStore.get_call, call_id)
+
+    async def active_calls(self, agent_id: str, **filters) -> List[dict]:
+        return await self._read(CallStore.active_calls, agent_id, **filters)
+
+    async def query_calls(self, **filters) -> List[dict]:
+        return await self._read(CallStore.query_calls, **filters)
+
+    def scan_calls(self, chunk_size: int) -> Iterator[List[tuple]]:
+        """Blocking scan over every stored call (see CallStore.scan_calls); run it on a worker thread."""
+        if self._store is None:
+            raise RuntimeError("Call registry is not running")
+        return self._store.scan_calls(chunk_size)
+
+    async def _read(self, method, *args, **kwargs):
+        if self._store is None:
+            raise RuntimeError("Call registry is not running")
+        return await asyncio.to_thread(method, self._store, *args, **kwargs)
+
+    async def _write_loop(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        item = ()
+        while item is not None:
+            batch = []
+            item = await queue.get()
+            deadline = loop.time() + self.flush_interval
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                if not queue.empty():
+                    item = queue.get_nowait()
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list) -> None:
+        if not batch:
+            return
+        try:
+            await asyncio.to_thread(self._store.write_batch, batch)
+            self.written += len(batch)
+        except Exception as e:
+            # Webhook state is already in memory; only durability is lost
+            self.write_errors += len(batch)
+            logger.error(f"Failed to write {len(batch)} call updates: {str(e)}")
+        for listener in self.listeners:
+            try:
+                await asyncio.to_thread(listener, batch)
+            except Exception as e:
+                logger.error(f"Call registry listener failed: {str(e)}")
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """Drop in-memory state for one call, or all calls; the store is untouched."""
+        if key is None:
+            removed = len(self._state)
+            self._state.clear()
+            return removed
+        return 1 if self._state.pop(key, None) is not None else 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._state),
+            "max_age": self.max_age,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "received": self.received,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "rejected": self.rejected,
+            "write_errors": self.write_errors,
+        }
+
+
+call_registry = CallRegistry(
+    "call_state",
+    path=settings.call_registry_path,
+    queue_size=settings.call_registry_queue_size,
+    batch_size=settings.call_registry_batch_size,
+    flush_interval=settings.call_registry_flush_interval,
+    max_age=settings.call_state_max_age,
+    max_entries=settings.terminal_call_cache_size,
+)
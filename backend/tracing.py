@@ -0,0 +1,302 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from itertools import chain
+from typing import Any, Dict, List, Optional
+from config import settings
+import functools
+import inspect
+import random
+import re
+import time
+
+# Spans are recorded for every request and kept or dropped when the request
+# finishes (tail sampling): slow and failed requests are always kept, the
+# rest at trace_sample_rate.
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_trace: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+_span: ContextVar[Optional[str]] = ContextVar("span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    # Not security sensitive; getrandbits avoids a syscall per span
+    return f"{random.getrandbits(nbytes * 8):0{nbytes * 2}x}"
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attrs")
+
+    def __init__(self, name: str, parent_id: Optional[str], start: float, attrs: Dict[str, Any]):
+        self.name = name
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start = start
+        self.end: Optional[float] = None
+        self.attrs = attrs
+
+
+class Trace:
+    def __init__(self, method: str, path: str, traceparent: Optional[str] = None):
+        match = TRACEPARENT.match(traceparent or "")
+        self.trace_id = match.group(1) if match else _new_id(16)
+        self.remote_parent_id = match.group(2) if match else None
+        # Honour an upstream caller's sampling decision
+        self.sampled = bool(match and int(match.group(3), 16) & 1)
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status = 500
+        self.timestamp = time.time()
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.spans: List[Span] = []
+        # Long-lived streams (SSE, exports) opt out: they would always look
+        # slow, and their spans would grow for as long as they run
+        self.excluded = False
+        # Open route spans, see TracedRoute
+        self.dependencies: Optional[Span] = None
+        self.endpoint: Optional[Span] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self) -> dict:
+        def ms(seconds: float) -> float:
+            return round(seconds * 1000, 3)
+
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "timestamp": self.timestamp,
+            "duration_ms": ms(self.duration),
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "start_ms": ms(span.start - self.start),
+                    "duration_ms": ms((span.end or self.end or span.start) - span.start),
+                    **({"attrs": span.attrs} if span.attrs else {}),
+                }
+                for span in sorted(self.spans, key=lambda span: span.start)
+            ],
+        }
+
+
+class TraceBuffer:
+    """Bounded buffers of finished traces: slow/failed ones and a sample of the rest."""
+
+    def __init__(self, size: int, slow_threshold: float, sample_rate: float):
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+        self.slow: deque = deque(maxlen=size)
+        self.sampled: deque = deque(maxlen=size)
+        self.seen = 0
+
+    def add(self, trace: Trace) -> None:
+        self.seen += 1
+        if trace.excluded:
+            return
+        if trace.duration >= self.slow_threshold or trace.status >= 500:
+            self.slow.append(trace)
+        elif trace.sampled or random.random() < self.sample_rate:
+            self.sampled.append(trace)
+
+    def find(self, trace_id: str) -> Optional[Trace]:
+        return next((t for t in chain(self.slow, self.sampled) if t.trace_id == trace_id), None)
+
+    def slowest(self, limit: int, min_duration: float = 0.0, route: Optional[str] = None) -> List[Trace]:
+        traces = [
+            t for t in chain(self.slow, self.sampled)
+            if t.duration >= min_duration and (route is None or t.route == route)
+        ]
+        return sorted(traces, key=lambda t: t.duration, reverse=True)[:limit]
+
+    def stats(self) -> dict:
+        return {
+            "seen": self.seen,
+            "slow": len(self.slow),
+            "sampled": len(self.sampled),
+            "slow_threshold": self.slow_threshold,
+            "sample_rate": self.sample_rate,
+        }
+
+
+traces = TraceBuffer(settings.trace_buffer_size, settings.trace_slow_threshold, settings.trace_sample_rate)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+def exclude_current_trace() -> None:
+    """Keep the current request out of the trace buffers and stop recording its spans."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.excluded = True
+
+
+@contextmanager
+def span(name: str, parent_id: Optional[str] = None, **attrs):
+    """Record a child span of the current span; a no-op outside a traced request."""
+    trace = _trace.get()
+    if trace is None or trace.excluded:
+        yield None
+        return
+    current = Span(name, parent_id or _span.get(), time.perf_counter(), attrs)
+    trace.spans.append(current)
+    token = _span.set(current.span_id)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _span.reset(token)
+
+
+def record_span(name: str, start: float, end: float, **attrs) -> None:
+    """Add an already finished span (e.g. timed in another thread) under the current span."""
+    trace = _trace.get()
+    if trace is not None and not trace.excluded:
+        finished = Span(name, _span.get(), start, attrs)
+        finished.end = end
+        trace.spans.append(finished)
+
+
+def traceparent_header() -> Optional[str]:
+    """W3C traceparent for an outgoing request made from the current span."""
+    trace = _trace.get()
+    if trace is None:
+        return None
+    return f"00-{trace.trace_id}-{_span.get() or _new_id(8)}-01"
+
+
+class HTTPXTraceHook:
+    """
+    httpx "trace" extension callback that turns connection events into spans:
+    connect_tcp, start_tls, send_request_headers/body, receive_response_headers
+    (network round trip plus Retell server time) and receive_response_body.
+    """
+
+    def __init__(self):
+        self._started: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        name, _, phase = event_name.rpartition(".")
+        step = name.rpartition(".")[2]
+        if phase == "started":
+            self._started[step] = time.perf_counter()
+        elif phase in ("complete", "failed") and step in self._started:
+            attrs = {"failed": True} if phase == "failed" else {}
+            record_span(step, self._started.pop(step), time.perf_counter(), **attrs)
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware: one trace per HTTP request, kept by tail sampling."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.trace_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1")
+        trace = Trace(scope["method"], scope["path"], traceparent)
+        trace_token = _trace.set(trace)
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-trace-id", trace.trace_id.encode())]
+            await send(message)
+
+        try:
+            with span("request", parent_id=trace.remote_parent_id, method=scope["method"]):
+                await self.app(scope, receive, send_with_trace_id)
+        finally:
+            trace.end = time.perf_counter()
+            trace.route = trace.route or getattr(scope.get("route"), "path", None)
+            _trace.reset(trace_token)
+            traces.add(trace)
+
+
+def _traced_endpoint(endpoint):
+    """Wrap a route endpoint so the time before it runs counts as dependency resolution."""
+
+    def enter(trace: Trace) -> Optional[str]:
+        dependencies = trace.dependencies
+        if dependencies is None:
+            return None
+        dependencies.end = time.perf_counter()
+        return dependencies.parent_id
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def traced(*args, **kwargs):
+            trace = _trace.get()
+            if trace is None:
+                return await endpoint(*args, **kwargs)
+            with span("endpoint", parent_id=enter(trace)) as current:
+                trace.endpoint = current
+                return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def traced(*args, **kwargs):
+            trace = _trace.get()
+            if trace is None:
+                return endpoint(*args, **kwargs)
+            with span("endpoint", parent_id=enter(trace)) as current:
+                trace.endpoint = current
+                return endpoint(*args, **kwargs)
+
+    traced.__traced__ = True
+    return traced
+
+
+class TracedRoute(APIRoute):
+    """
+    APIRoute that splits a request into dependencies (body validation and
+    Depends(), e.g. get_upstream), endpoint and serialization spans.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not getattr(endpoint, "__traced__", False):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route_path = self.path_format
+
+        async def traced_handler(request):
+            trace = _trace.get()
+            if trace is None:
+                return await handler(request)
+            trace.route = route_path
+            trace.endpoint = None
+            with span("dependencies") as dependencies:
+                trace.dependencies = dependencies
+                try:
+                    response = await handler(request)
+                finally:
+                    trace.dependencies = None
+            endpoint = trace.endpoint
+            if endpoint is not None:
+                # Closed early when the endpoint started; what is left is serialization
+                dependencies.end = endpoint.start
+                record_span("serialize", endpoint.end or endpoint.start, time.perf_counter())
+            return response
+
+        return traced_handler
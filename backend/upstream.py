@@ -0,0 +1,316 @@
+from fastapi import HTTPException
+from typing import Any, Optional
+from config import settings
+from executor import BoundedExecutor
+from metrics import track_upstream
+from resilience import RequestPolicy, UpstreamGuard
+from retell_gateway import DEFAULT_BASE_URL, RetellClient
+from tracing import HTTPXTraceHook, record_span, span, traceparent_header
+import httpx
+import logging
+import time
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Retell REST endpoints used by the routers; the same ones the SDK calls
+# (retell-sdk 6), so RETELL_TRANSPORT only changes how requests are sent
+ENDPOINTS = {
+    "list_agents": ("POST", "/v2/list-agents"),
+    "retrieve_agent": ("GET", "/get-agent/{agent_id}"),
+    "create_web_call": ("POST", "/v3/create-web-call"),
+    "retrieve_call": ("GET", "/v2/get-call/{call_id}"),
+    "end_call": ("POST", "/v2/stop-call/{call_id}"),
+    "list_calls": ("POST", "/v3/list-calls"),
+}
+
+# Default hedging/retry policy per endpoint; UPSTREAM_POLICIES overrides these.
+# Hedging is opt-in and only honoured for idempotent reads; so are retries of
+# create_web_call, which only retry failures Retell cannot have processed.
+DEFAULT_POLICIES = {
+    "list_agents": {},
+    "retrieve_agent": {},
+    "create_web_call": {},
+    "retrieve_call": {},
+    "end_call": {},
+    # A failed page would otherwise end an export part-way through
+    "list_calls": {"retries": 2},
+}
+IDEMPOTENT_ENDPOINTS = {"list_agents", "retrieve_agent", "retrieve_call", "list_calls"}
+
+
+def build_policies() -> dict:
+    """RequestPolicy per endpoint from DEFAULT_POLICIES and UPSTREAM_POLICIES."""
+    policies = {}
+    for endpoint, defaults in DEFAULT_POLICIES.items():
+        options = {**defaults, **settings.upstream_policies.get(endpoint, {})}
+        options.pop("idempotent", None)  # a property of the endpoint, not configurable
+        if options.get("hedge") and endpoint not in IDEMPOTENT_ENDPOINTS:
+            logger.warning(f"Ignoring hedge for non-idempotent endpoint {endpoint}")
+            options["hedge"] = False
+        policies[endpoint] = RequestPolicy(endpoint, idempotent=endpoint in IDEMPOTENT_ENDPOINTS, **options)
+    return policies
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.retell_max_connections,
+        max_keepalive_connections=settings.retell_max_keepalive_connections,
+        keepalive_expiry=settings.retell_keepalive_expiry,
+    )
+
+
+class HTTPXTransport:
+    """
+    asyncio-native client for the Retell endpoints we use: the gateway
+    core's pooled RetellClient behind the guard, policies, metrics and spans.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 guard: Optional[UpstreamGuard] = None):
+        self.guard = guard or UpstreamGuard.from_settings()
+        self.policies = build_policies()
+        self._client = RetellClient(
+            api_key,
+            base_url=base_url or DEFAULT_BASE_URL,
+            timeout=settings.retell_timeout,
+            limits=_pool_limits(),
+            transport=transport,
+        )
+
+    async def _request(self, endpoint: str, json: Optional[dict] = None, query: Optional[dict] = None,
+                       **params) -> Any:
+        method, path = ENDPOINTS[endpoint]
+        url = path.format(**params)
+
+        async def attempt() -> Any:
+            with track_upstream(endpoint), span(f"upstream.{endpoint}", url=url) as current:
+                headers, extensions = None, None
+                if current is not None:
+                    headers = {"traceparent": traceparent_header()}
+                    extensions = {"trace": HTTPXTraceHook()}
+                async with self.guard.slot():
+                    response = await self._client.send(
+                        method, url, json=json, params=query, headers=headers, extensions=extensions
+                    )
+                    if current is not None:
+                        current.attrs["status"] = response.status_code
+                    return self._client.parse(response)
+
+        return await self.policies[endpoint].run(attempt)
+
+    async def list_agents(self) -> list:
+        async def page(pagination_key: Optional[str]) -> dict:
+            query = {"limit": settings.retell_agent_page_size}
+            if pagination_key:
+                query["pagination_key"] = pagination_key
+            return _agent_page(await self._request("list_agents", json={}, query=query))
+
+        return await _all_agents(page)
+
+    async def retrieve_agent(self, agent_id: str) -> dict:
+        return await self._request("retrieve_agent", agent_id=agent_id)
+
+    async def create_web_call(self, agent_id: str, metadata: Optional[dict] = None) -> dict:
+        body = {"agent_id": agent_id, "metadata": metadata or {}}
+        return await self._request("create_web_call", json=body)
+
+    async def retrieve_call(self, call_id: str) -> dict:
+        return await self._request("retrieve_call", call_id=call_id)
+
+    async def end_call(self, call_id: str) -> None:
+        await self._request("end_call", call_id=call_id)
+
+    async def list_calls(self, filter_criteria: Optional[dict] = None, limit: int = 1000,
+                         pagination_key: Optional[str] = None, sort_order: str = "descending") -> dict:
+        body = {"limit": limit, "sort_order": sort_order}
+        if filter_criteria:
+            body["filter_criteria"] = filter_criteria
+        if pagination_key:
+            body["pagination_key"] = pagination_key
+        return _call_page(await self._request("list_calls", json=body))
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class SDKTransport:
+    """Same interface as HTTPXTransport, backed by the sync Retell SDK on a thread pool."""
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 guard: Optional[UpstreamGuard] = None):
+        from retell import Retell
+
+        self.guard = guard or UpstreamGuard.from_settings()
+        self.policies = build_policies()
+        self.executor = BoundedExecutor(
+            "retell-sdk",
+            workers=settings.sdk_executor_workers,
+            max_queue=settings.sdk_executor_max_queue,
+            queue_timeout=settings.sdk_executor_queue_timeout,
+        )
+        self._http_client = httpx.Client(timeout=settings.retell_timeout, limits=_pool_limits())
+        # Retries are handled by our request policies, not the SDK
+        self._client = Retell(api_key=api_key, base_url=base_url or None, http_client=self._http_client,
+                              max_retries=0)
+
+    async def _run(self, endpoint: str, func, *args, **kwargs) -> Any:
+        async def attempt() -> Any:
+            with track_upstream(endpoint), span(f"upstream.{endpoint}") as current:
+                call_kwargs = kwargs
+                if current is not None:
+                    call_kwargs = {**kwargs, "extra_headers": {"traceparent": traceparent_header()}}
+                submitted = time.perf_counter()
+                started = []
+
+                def call():
+                    started.append(time.perf_counter())
+                    return func(*args, **call_kwargs)
+
+                async with self.guard.slot():
+                    try:
+                        return await self.executor.run(call)
+                    finally:
+                        # Time spent queued for a pool thread before the SDK call ran
+                        if current is not None and started:
+                            record_span("executor.wait", submitted, started[0])
+
+        return await self.policies[endpoint].run(attempt)
+
+    async def list_agents(self) -> list:
+        async def page(pagination_key: Optional[str]) -> dict:
+            kwargs = {"limit": settings.retell_agent_page_size}
+            if pagination_key:
+                kwargs["pagination_key"] = pagination_key
+            return _agent_page(_to_dict(await self._run("list_agents", self._client.agent.list, **kwargs)))
+
+        return await _all_agents(page)
+
+    async def retrieve_agent(self, agent_id: str) -> dict:
+        return _to_dict(await self._run("retrieve_agent", self._client.agent.retrieve, agent_id))
+
+    async def create_web_call(self, agent_id: str, metadata: Optional[dict] = None) -> dict:
+        web_call = await self._run(
+            "create_web_call", self._client.call.create_web_call,
+            agent_id=agent_id, metadata=metadata or {}
+        )
+        return _to_dict(web_call)
+
+    async def retrieve_call(self, call_id: str) -> dict:
+        return _to_dict(await self._run("retrieve_call", self._client.call.retrieve, call_id))
+
+    async def end_call(self, call_id: str) -> None:
+        # Method name differs between SDK versions
+        end = getattr(self._client.call, "end_call", None) or self._client.call.stop
+        await self._run("end_call", end, call_id)
+
+    async def list_calls(self, filter_criteria: Optional[dict] = None, limit: int = 1000,
+                         pagination_key: Optional[str] = None, sort_order: str = "descending") -> dict:
+        kwargs = {"limit": limit, "sort_order": sort_order}
+        if filter_criteria:
+            kwargs["filter_criteria"] = filter_criteria
+        if pagination_key:
+            kwargs["pagination_key"] = pagination_key
+        return _call_page(_to_dict(await self._run("list_calls", self._client.call.list, **kwargs)))
+
+    async def aclose(self) -> None:
+        self.executor.shutdown()
+        self._http_client.close()
+
+
+def _to_dict(obj: Any) -> dict:
+    if obj is None or isinstance(obj, dict):
+        return obj or {}
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return dict(vars(obj))
+
+
+def _agent_page(data: Any) -> dict:
+    """One page of /v2/list-agents as {"items", "has_more", "pagination_key"}."""
+    if isinstance(data, list):
+        # Older list-agents responses were a bare array with no cursor
+        return {"items": data, "has_more": False, "pagination_key": None}
+    data = data or {}
+    return {
+        "items": [_to_dict(item) for item in data.get("items") or data.get("data") or []],
+        "has_more": bool(data.get("has_more")),
+        "pagination_key": data.get("pagination_key"),
+    }
+
+
+async def _all_agents(page) -> list:
+    """Every agent, following pagination keys; page(pagination_key) fetches one page."""
+    agents, pagination_key = [], None
+    while True:
+        data = await page(pagination_key)
+        agents.extend(data["items"])
+        if not data["has_more"] or not data["pagination_key"]:
+            return agents
+        pagination_key = data["pagination_key"]
+
+
+def _call_page(data: Any) -> dict:
+    """One page of /v3/list-calls as {"items", "has_more", "pagination_key"}."""
+    if isinstance(data, list):
+        # Older list-calls responses were a bare array with no cursor
+        return {"items": data, "has_more": False, "pagination_key": None}
+    data = data or {}
+    return {
+        "items": [_to_dict(item) for item in data.get("items") or []],
+        "has_more": bool(data.get("has_more")),
+        "pagination_key": data.get("pagination_key"),
+    }
+
+
+# Process-wide transport, created on startup and closed on shutdown
+_upstream = None
+
+
+def init_upstream(transport: Optional[httpx.AsyncBaseTransport] = None):
+    """Create the shared upstream transport selected by RETELL_TRANSPORT."""
+    global _upstream
+    if _upstream is not None:
+        return _upstream
+    if not settings.retell_api_key:
+        return None
+
+    if settings.retell_transport == "sdk":
+        _upstream = SDKTransport(settings.retell_api_key, settings.retell_base_url)
+    else:
+        _upstream = HTTPXTransport(settings.retell_api_key, settings.retell_base_url, transport=transport)
+    logger.info(
+        f"Retell upstream ready (transport={settings.retell_transport}, "
+        f"max_connections={settings.retell_max_connections}, "
+        f"keepalive={settings.retell_max_keepalive_connections})"
+    )
+    return _upstream
+
+
+async def close_upstream() -> None:
+    """Close the shared transport and release pooled connections."""
+    global _upstream
+    if _upstream is not None:
+        await _upstream.aclose()
+    _upstream = None
+
+
+def upstream_status() -> Optional[dict]:
+    """Transport and guard state for /health; None before the client exists."""
+    if _upstream is None:
+        return None
+    return {
+        "transport": settings.retell_transport,
+        **_upstream.guard.status(),
+        "policies": {name: policy.stats() for name, policy in _upstream.policies.items()},
+        **({"executor": _upstream.executor.status()} if hasattr(_upstream, "executor") else {}),
+    }
+
+
+def get_upstream():
+    """Dependency to get the shared Retell upstream transport"""
+    with span("get_upstream"):
+        if not settings.retell_api_key:
+            raise HTTPException(status_code=500, detail="Retell API key not configured")
+        return _upstream or init_upstream()
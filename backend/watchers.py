@@ -0,0 +1,233 @@
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from config import settings
+from store import TERMINAL_STATUSES
+import asyncio
+import json
+import logging
+import time
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Fields whose change is a status transition worth pushing
+WATCHED_FIELDS = ("call_status", "start_timestamp", "end_timestamp", "duration")
+
+# (event id, event name, call_id, data)
+Event = Tuple[str, str, str, dict]
+
+
+class Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class CallWatch:
+    """One call's latest state, recent events and the queues of its subscribers."""
+
+    def __init__(self, call_id: str, fetch: Callable[[], Awaitable[dict]], history: int):
+        self.call_id = call_id
+        self.fetch = fetch
+        self.last: Optional[dict] = None
+        self.history: deque = deque(maxlen=history)
+        self.subscribers: Set[Subscriber] = set()
+        self.idle_since = time.monotonic()
+        self.done = False  # terminal status or error seen; no more polling
+        self.task: Optional[asyncio.Task] = None
+
+
+class CallWatcherHub:
+    """
+    Fans call status changes out to SSE subscribers.
+
+    Each watched call has one watcher task, however many clients follow it.
+    The watcher polls fetch() (which answers from webhook state when it is
+    fresh) every ``interval`` seconds and publishes only transitions;
+    ``notify`` pushes webhook updates without waiting for the next poll.
+    Polling stops at a terminal status. A watch, with its recent events,
+    is kept for ``linger`` seconds after its last subscriber leaves, so a
+    client that reconnects with Last-Event-ID is replayed what it missed
+    without another upstream lookup.
+
+    Event IDs are "<epoch>-<seq>" with one sequence across all calls, so a
+    multiplexed stream resumes from a single Last-Event-ID. IDs from before
+    a restart (another epoch) get the current state instead of a replay.
+    """
+
+    def __init__(self, interval: float, linger: float, history: int = 20, queue_size: int = 100):
+        self.interval = interval
+        self.linger = linger
+        self.history = history
+        self.queue_size = queue_size
+        self.epoch = f"{int(time.time()):x}"
+        self.seq = 0
+        self.watches: Dict[str, CallWatch] = {}
+        self.polls = 0
+        self.events = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, call_ids: List[str], fetch: Callable[[str], Awaitable[dict]],
+                  last_event_id: Optional[str] = None) -> Tuple[Subscriber, List[Event]]:
+        """
+        Follow call_ids; returns the subscriber and the events to send first
+        (a replay after last_event_id, or each call's current state).
+        """
+        subscriber = Subscriber(self.queue_size)
+        after = self._parse_id(last_event_id)
+        initial: List[Event] = []
+        for call_id in call_ids:
+            watch = self.watches.get(call_id)
+            if watch is None:
+                watch = self.watches[call_id] = CallWatch(call_id, lambda call_id=call_id: fetch(call_id), self.history)
+            watch.subscribers.add(subscriber)
+            if after is not None:
+                initial.extend(e for e in watch.history if self._parse_id(e[0]) > after)
+            elif watch.history:
+                initial.append(watch.history[-1])
+            if watch.task is None or watch.task.done():
+                watch.task = asyncio.create_task(self._watch(watch))
+        initial.sort(key=lambda e: self._parse_id(e[0]))
+        return subscriber, initial
+
+    def unsubscribe(self, call_ids: List[str], subscriber: Subscriber) -> None:
+        for call_id in call_ids:
+            watch = self.watches.get(call_id)
+            if watch is not None:
+                watch.subscribers.discard(subscriber)
+                if not watch.subscribers:
+                    watch.idle_since = time.monotonic()
+
+    def caught_up(self, call_ids: List[str], last_event_id: Optional[str]) -> bool:
+        """True if a resuming client already has the final event of every call."""
+        after = self._parse_id(last_event_id)
+        if after is None:
+            return False
+        for call_id in call_ids:
+            watch = self.watches.get(call_id)
+            if watch is None or not watch.done or self._parse_id(watch.history[-1][0]) > after:
+                return False
+        return True
+
+    def notify(self, call: dict) -> None:
+        """Publish an update learned elsewhere (e.g. a webhook) to a watched call."""
+        watch = self.watches.get(call["call_id"])
+        if watch is not None:
+            self._update(watch, call)
+
+    def _parse_id(self, event_id: Optional[str]) -> Optional[int]:
+        epoch, _, seq = (event_id or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def _publish(self, watch: CallWatch, name: str, data: dict) -> None:
+        self.seq += 1
+        self.events += 1
+        event = (f"{self.epoch}-{self.seq}", name, watch.call_id, data)
+        watch.history.append(event)
+        for subscriber in list(watch.subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too slow to keep up: its stream ends after the backlog and
+                # the client resumes by Last-Event-ID
+                self.dropped_subscribers += 1
+                subscriber.dropped = True
+                watch.subscribers.discard(subscriber)
+
+    def _update(self, watch: CallWatch, call: dict) -> None:
+        last = watch.last
+        if last is not None and all(last.get(f) == call.get(f) for f in WATCHED_FIELDS):
+            return
+        watch.last = call
+        self._publish(watch, "status", call)
+        if call.get("call_status") in TERMINAL_STATUSES:
+            watch.done = True
+
+    async def _watch(self, watch: CallWatch) -> None:
+        delay = self.interval
+        while True:
+            if not watch.subscribers and time.monotonic() - watch.idle_since > self.linger:
+                break
+            if not watch.done:
+                try:
+                    self.polls += 1
+                    self._update(watch, await watch.fetch())
+                    delay = self.interval
+                except Exception as e:
+                    status_code = getattr(e, "status_code", 500)
+                    if status_code in (400, 401, 404):
+                        # Will not get better by asking again
+                        watch.done = True
+                        self._publish(watch, "error", {
+                            "call_id": watch.call_id, "status_code": status_code,
+                            "detail": str(getattr(e, "detail", None) or e),
+                        })
+                    else:
+                        logger.warning(f"Watching call {watch.call_id} failed: {str(e)}")
+                        delay = min(delay * 2, 60.0)
+            await asyncio.sleep(delay if not watch.done else min(self.interval, self.linger))
+        if not watch.subscribers:
+            self.watches.pop(watch.call_id, None)
+
+    async def close(self) -> None:
+        tasks = [w.task for w in self.watches.values() if w.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.watches.clear()
+
+    def stats(self) -> dict:
+        return {
+            "watched_calls": len(self.watches),
+            "polling": sum(1 for w in self.watches.values() if not w.done),
+            "subscribers": sum(len(w.subscribers) for w in self.watches.values()),
+            "polls": self.polls,
+            "events": self.events,
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+
+def format_event(event: Event) -> str:
+    event_id, name, _, data = event
+    return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(call_ids: List[str], fetch: Callable[[str], Awaitable[dict]],
+                       last_event_id: Optional[str] = None):
+    """
+    SSE body for call_ids: replay or current state, then transitions and
+    heartbeats until every call has ended (or failed).
+    """
+    subscriber, initial = hub.subscribe(call_ids, fetch, last_event_id)
+    queue = subscriber.queue
+    pending = set(call_ids)
+
+    def finished(event: Event) -> None:
+        _, name, call_id, data = event
+        if name == "error" or data.get("call_status") in TERMINAL_STATUSES:
+            pending.discard(call_id)
+
+    # Finished calls: their last event is either in initial or already seen
+    pending.difference_update(c for c in call_ids if hub.watches[c].done)
+
+    try:
+        yield f"retry: {int(settings.sse_retry_ms)}\n\n"
+        for event in initial:
+            yield format_event(event)
+        while pending and not (subscriber.dropped and queue.empty()):
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.sse_heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            finished(event)
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(call_ids, subscriber)
+
+
+hub = CallWatcherHub(settings.call_watch_interval, settings.call_watch_linger)
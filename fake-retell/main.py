@@ -0,0 +1,413 @@
+"""
+Fake Retell API for offline load testing.
+
+Implements the Retell endpoints our backends call (list agents, get agent,
+create web call, get call, stop call, list calls) with configurable latency,
+error injection, 429 rate limiting, agent catalog size and call history. Point a backend at it
+with RETELL_BASE_URL=http://localhost:8080.
+
+Runtime knobs can be read and changed without a restart through
+GET/PATCH /_fake/config; /_fake/stats reports request counters.
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from starlette.routing import Match
+from typing import Optional
+import asyncio
+import logging
+import math
+import os
+import random
+import time
+import uuid
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+
+class FakeSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="FAKE_", validate_assignment=True)
+
+    # Latency added to every API response
+    latency_dist: str = "constant"  # constant, uniform, normal, lognormal, exponential
+    latency_ms: float = 50.0  # mean (median for lognormal)
+    latency_spread_ms: float = 10.0  # uniform half-width, normal stddev, lognormal sigma * latency_ms
+    tail_rate: float = 0.0  # fraction of responses that take tail_ms instead
+    tail_ms: float = 1000.0
+    endpoint_latency_ms: dict[str, float] = {}  # per-endpoint latency_ms override
+
+    # Fault injection
+    error_rate: float = 0.0  # fraction of requests failing with error_status
+    error_status: int = 500
+    rate_limit_rps: float = 0.0  # token bucket; 0 disables
+    rate_limit_burst: int = 0  # bucket size, defaults to rate_limit_rps
+    rate_limit_rate: float = 0.0  # extra fraction of requests answered with 429
+
+    # Data
+    agent_count: int = 10
+    call_duration: float = 60.0  # seconds until a created call reports "ended"
+    call_history: int = 0  # ended calls listed before the created ones
+    call_history_interval: float = 60.0  # seconds between history calls
+    seed: Optional[int] = None  # fixed seed for reproducible runs
+    strict_ids: bool = True  # False serves unknown agent and call IDs as if they existed
+
+
+settings = FakeSettings()
+rng = random.Random(settings.seed)
+
+app = FastAPI(title="Fake Retell API", version="1.0.0")
+
+# Created web calls by call_id
+calls: dict[str, dict] = {}
+stats: dict[str, dict] = {}
+# History calls end before the fake started
+started_ms = int(time.time() * 1000)
+_bucket = {"tokens": 0.0, "updated": time.monotonic()}
+
+
+def agent(index: int) -> dict:
+    return {
+        "agent_id": f"agent_{index:06d}",
+        "agent_name": f"Fake Agent {index}",
+        "voice_id": "11labs-Adrian",
+        "language": "en-US",
+        "response_engine": {"type": "retell-llm", "llm_id": f"llm_{index:06d}"},
+        "last_modification_timestamp": 1700000000000 + index,
+    }
+
+
+def agent_index(agent_id: str) -> Optional[int]:
+    prefix, _, number = agent_id.partition("_")
+    if prefix != "agent" or not number.isdigit():
+        return None
+    index = int(number)
+    return index if index < settings.agent_count else None
+
+
+def sample_latency(endpoint: str) -> float:
+    """Seconds to wait before answering, drawn from the configured distribution."""
+    if settings.tail_rate and rng.random() < settings.tail_rate:
+        return settings.tail_ms / 1000
+    mean = settings.endpoint_latency_ms.get(endpoint, settings.latency_ms)
+    spread = settings.latency_spread_ms
+    dist = settings.latency_dist
+    if dist == "uniform":
+        ms = rng.uniform(mean - spread, mean + spread)
+    elif dist == "normal":
+        ms = rng.gauss(mean, spread)
+    elif dist == "lognormal":
+        ms = mean * rng.lognormvariate(0, spread / mean if mean else 0)
+    elif dist == "exponential":
+        ms = rng.expovariate(1 / mean) if mean > 0 else 0
+    else:
+        ms = mean
+    return max(0.0, ms) / 1000
+
+
+def take_token() -> Optional[float]:
+    """Consume one rate-limit token; returns seconds to wait if none are left."""
+    if settings.rate_limit_rps <= 0:
+        return None
+    burst = settings.rate_limit_burst or max(1, math.ceil(settings.rate_limit_rps))
+    now = time.monotonic()
+    _bucket["tokens"] = min(burst, _bucket["tokens"] + (now - _bucket["updated"]) * settings.rate_limit_rps)
+    _bucket["updated"] = now
+    if _bucket["tokens"] >= 1:
+        _bucket["tokens"] -= 1
+        return None
+    return (1 - _bucket["tokens"]) / settings.rate_limit_rps
+
+
+def error(status_code: int, message: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"error_message": message}, headers=headers)
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    """Add latency, rate limiting and errors to every API route."""
+    route = next((r for r in app.router.routes if r.matches(request.scope)[0] == Match.FULL), None)
+    endpoint = route.name if route is not None else "unknown"
+    if endpoint.startswith("fake_") or request.url.path in ("/docs", "/openapi.json"):
+        return await call_next(request)
+
+    counters = stats.setdefault(endpoint, {"requests": 0, "errors": 0, "rate_limited": 0})
+    counters["requests"] += 1
+
+    if not request.headers.get("authorization", "").startswith("Bearer "):
+        counters["errors"] += 1
+        return error(401, "Missing API key")
+
+    retry_after = take_token()
+    if retry_after is None and settings.rate_limit_rate and rng.random() < settings.rate_limit_rate:
+        retry_after = 1.0
+    if retry_after is not None:
+        counters["rate_limited"] += 1
+        return error(429, "Rate limit exceeded", {"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+    await asyncio.sleep(sample_latency(endpoint))
+
+    if settings.error_rate and rng.random() < settings.error_rate:
+        counters["errors"] += 1
+        return error(settings.error_status, "Injected failure")
+    return await call_next(request)
+
+
+def agent_summary(index: int) -> dict:
+    """An agent as a list-agents page item: no voice or response engine."""
+    return {
+        "agent_id": f"agent_{index:06d}",
+        "agent_name": f"Fake Agent {index}",
+        "channel": "voice",
+        "tags": {},
+        "user_modified_timestamp": 1700000000000 + index,
+    }
+
+
+# Agents. SDK 6 lists pages with POST /v2/list-agents; older clients get the
+# whole catalog from GET /list-agents, and the minimal demos probe /v2/agent and /v2/agents.
+@app.post("/v2/list-agents", name="list_agents")
+async def list_agents_page(limit: int = 1000, pagination_key: Optional[str] = None):
+    """A page of agents; the pagination key is the position to continue from."""
+    start = int(pagination_key or 0)
+    end = min(settings.agent_count, start + max(1, min(limit, 1000)))
+    has_more = end < settings.agent_count
+    return {
+        "items": [agent_summary(i) for i in range(start, end)],
+        "has_more": has_more,
+        "pagination_key": str(end) if has_more else None,
+    }
+
+
+@app.api_route("/list-agents", methods=["GET", "POST"], name="list_agents")
+@app.get("/v2/agent", name="list_agents")
+@app.get("/v2/agents", name="list_agents")
+async def list_agents():
+    return [agent(i) for i in range(settings.agent_count)]
+
+
+@app.get("/get-agent/{agent_id}", name="retrieve_agent")
+@app.get("/v2/get-agent/{agent_id}", name="retrieve_agent")
+async def get_agent(agent_id: str):
+    index = agent_index(agent_id)
+    if index is None:
+        if settings.strict_ids:
+            return error(404, f"Agent {agent_id} not found")
+        return {**agent(0), "agent_id": agent_id}
+    return agent(index)
+
+
+# Web calls
+async def register_call(request: Request):
+    """Create and keep a call from a create-web-call body; an error response for a bad one."""
+    try:
+        body = await request.json()
+    except ValueError:
+        body = {}
+    agent_id = (body or {}).get("agent_id")
+    if not agent_id:
+        return error(400, "agent_id is required")
+    if settings.strict_ids and agent_index(agent_id) is None:
+        return error(404, f"Agent {agent_id} not found")
+
+    call = {
+        "call_id": f"call_{uuid.UUID(int=rng.getrandbits(128)).hex}",
+        "call_type": "web_call",
+        "agent_id": agent_id,
+        "access_token": uuid.UUID(int=rng.getrandbits(128)).hex,
+        "call_status": "registered",
+        "metadata": body.get("metadata") or {},
+        "start_timestamp": int(time.time() * 1000),
+        "end_timestamp": None,
+    }
+    calls[call["call_id"]] = call
+    return call
+
+
+@app.post("/create-web-call", status_code=201, name="create_web_call")
+@app.post("/v2/create-web-call", status_code=201, name="create_web_call")
+async def create_web_call(request: Request):
+    return await register_call(request)
+
+
+@app.post("/v3/create-web-call", status_code=201, name="create_web_call")
+async def create_web_call_v3(request: Request):
+    """SDK 6 creates web calls here; the reply carries only what the browser needs to join."""
+    call = await register_call(request)
+    if isinstance(call, Response):
+        return call
+    return {
+        "call_id": call["call_id"],
+        "access_token": call["access_token"],
+        "expires_at": call["start_timestamp"] + 30000,  # the token must be used within 30s
+        "ice_servers": [],
+        "transport": "gateway",
+    }
+
+
+def unknown_call(call_id: str) -> dict:
+    """A call we never created, for strict_ids=False: just started, so ongoing."""
+    return {
+        "call_id": call_id,
+        "call_type": "web_call",
+        "agent_id": agent(0)["agent_id"],
+        "call_status": "ongoing",
+        "metadata": {},
+        "start_timestamp": int(time.time() * 1000),
+        "end_timestamp": None,
+    }
+
+
+def call_view(call: dict) -> dict:
+    """The call as Retell would report it now: ongoing, then ended after call_duration."""
+    if call["end_timestamp"] is None:
+        elapsed = time.time() - call["start_timestamp"] / 1000
+        if elapsed >= settings.call_duration:
+            call["call_status"] = "ended"
+            call["end_timestamp"] = call["start_timestamp"] + int(settings.call_duration * 1000)
+        else:
+            call["call_status"] = "ongoing"
+    view = {k: v for k, v in call.items() if k != "access_token"}
+    if call["end_timestamp"] is not None:
+        view["duration_ms"] = call["end_timestamp"] - call["start_timestamp"]
+    return view
+
+
+@app.get("/v2/get-call/{call_id}", name="retrieve_call")
+async def get_call(call_id: str):
+    call = calls.get(call_id)
+    if call is None:
+        if settings.strict_ids:
+            return error(404, f"Call {call_id} not found")
+        call = unknown_call(call_id)
+    return call_view(call)
+
+
+@app.post("/v2/stop-call/{call_id}", status_code=204, name="end_call")
+async def stop_call(call_id: str):
+    call = calls.get(call_id)
+    if call is None:
+        if settings.strict_ids:
+            return error(404, f"Call {call_id} not found")
+        call = calls[call_id] = unknown_call(call_id)
+    if call["end_timestamp"] is None:
+        call["call_status"] = "ended"
+        call["end_timestamp"] = int(time.time() * 1000)
+    return Response(status_code=204)
+
+
+def history_call(index: int) -> dict:
+    """The index-th most recent history call, generated on demand."""
+    start = started_ms - int((index + 1) * settings.call_history_interval * 1000)
+    duration = 5000 + index * 7919 % 120000
+    return {
+        "call_id": f"call_hist_{index:010d}",
+        "call_type": "web_call",
+        "agent_id": f"agent_{index % max(1, settings.agent_count):06d}",
+        "call_status": "ended",
+        "metadata": {},
+        "start_timestamp": start,
+        "end_timestamp": start + duration,
+        "duration_ms": duration,
+    }
+
+
+def matches(call: dict, criteria: dict) -> bool:
+    """Apply the agent, call_status and start_timestamp filters of list-calls."""
+    agents = {a["agent_id"] for a in criteria.get("agent") or []}
+    if agents and call["agent_id"] not in agents:
+        return False
+    status = criteria.get("call_status")
+    if status and call["call_status"] not in status["value"]:
+        return False
+    started = criteria.get("start_timestamp")
+    if started:
+        value, ts = started["value"], call["start_timestamp"]
+        ok = {
+            "eq": lambda: ts == value, "ne": lambda: ts != value,
+            "gt": lambda: ts > value, "ge": lambda: ts >= value,
+            "lt": lambda: ts < value, "le": lambda: ts <= value,
+            "bt": lambda: value[0] <= ts <= value[1],
+        }[started["op"]]
+        if not ok():
+            return False
+    return True
+
+
+@app.post("/v3/list-calls", name="list_calls")
+async def list_calls(request: Request):
+    """
+    Created calls (newest first) followed by call_history older ones, sorted
+    by start time. The pagination key is the position to continue from.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        body = {}
+    limit = min(int(body.get("limit") or 50), 1000)
+    criteria = body.get("filter_criteria") or {}
+    created = sorted(calls.values(), key=lambda c: c["start_timestamp"], reverse=True)
+    total = len(created) + settings.call_history
+    ascending = body.get("sort_order") == "ascending"
+
+    position = int(body.get("pagination_key") or 0)
+    items = []
+    while position < total and len(items) < limit:
+        index = total - 1 - position if ascending else position
+        call = call_view(created[index]) if index < len(created) else history_call(index - len(created))
+        if matches(call, criteria):
+            items.append(call)
+        position += 1
+    has_more = position < total
+    return {"items": items, "has_more": has_more, "pagination_key": str(position) if has_more else None}
+
+
+# Control endpoints (no latency or faults applied)
+@app.get("/_fake/config", name="fake_config")
+async def get_config():
+    return settings.model_dump()
+
+
+@app.patch("/_fake/config", name="fake_update_config")
+async def update_config(changes: dict):
+    """Change knobs at runtime, e.g. {"latency_ms": 200, "error_rate": 0.1}."""
+    global rng
+    for key, value in changes.items():
+        if key not in FakeSettings.model_fields:
+            return error(400, f"Unknown setting {key}")
+        setattr(settings, key, value)
+    if "seed" in changes:
+        rng = random.Random(settings.seed)
+    logger.info(f"Fake Retell config updated: {changes}")
+    return settings.model_dump()
+
+
+@app.get("/_fake/stats", name="fake_stats")
+async def get_stats():
+    return {"calls": len(calls), "endpoints": stats}
+
+
+@app.post("/_fake/reset", name="fake_reset")
+async def reset():
+    """Forget created calls and counters, and reseed the random source."""
+    global rng
+    calls.clear()
+    stats.clear()
+    rng = random.Random(settings.seed)
+    return {"status": "reset"}
+
+
+@app.get("/health", name="fake_health")
+async def health():
+    return {"status": "healthy", "service": "fake-retell"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
@@ -34,7 +34,7 @@ export const useRetellCall = () => {
     const handleCallStarted = (event) => {
       console.log('Call started event:', event);
       setCallStatus('connected');
-      setCallId(event.call_id || event.callId);
+      setCallId(prev => event?.call_id || event?.callId || prev);
       setError(null);
       setIsLoading(false);
     };
@@ -96,6 +96,27 @@ export const useRetellCall = () => {
     };
   }, []);
 
+  // Server-side status: catches calls ended elsewhere (agent hang-up, API)
+  useEffect(() => {
+    if (!callId) {
+      return undefined;
+    }
+
+    return apiService.watchCall(callId, {
+      onStatus: (call) => {
+        if (call.call_status === 'ended' || call.call_status === 'error') {
+          console.log('Call ended on the server:', call);
+          retellService.stopCall().catch((err) => {
+            console.error('Failed to stop call:', err);
+          });
+        }
+      },
+      onError: (event) => {
+        console.error('Call status stream error:', event);
+      },
+    });
+  }, [callId]);
+
   const startCall = useCallback(async (agentId, metadata = {}) => {
     try {
       setIsLoading(true);
@@ -113,6 +134,7 @@ export const useRetellCall = () => {
       const callData = await apiService.createWebCall(agentId, metadata);
       
       console.log('Call data received:', callData);
+      setCallId(callData.call_id);
 
       // Start the call with Retell client
       await retellService.startCall({
@@ -48,6 +48,27 @@ api.interceptors.response.use(
   }
 );
 
+// Last ETag and body per URL, so repeat fetches can be answered with a 304
+const etagCache = new Map();
+
+const getWithETag = async (url) => {
+  const cached = etagCache.get(url);
+  const response = await api.get(url, {
+    headers: cached ? { 'If-None-Match': cached.etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  });
+
+  if (response.status === 304 && cached) {
+    return cached.data;
+  }
+
+  const etag = response.headers.etag;
+  if (etag) {
+    etagCache.set(url, { etag, data: response.data });
+  }
+  return response.data;
+};
+
 export const apiService = {
   // Health check
   async healthCheck() {
@@ -62,8 +83,7 @@ export const apiService = {
   // Get all agents
   async getAgents() {
     try {
-      const response = await api.get('/agents/');
-      return response.data;
+      return await getWithETag('/agents/');
     } catch (error) {
       throw new Error(
         error.response?.data?.detail || 'Failed to fetch agents'
@@ -74,8 +94,7 @@ export const apiService = {
   // Get specific agent
   async getAgent(agentId) {
     try {
-      const response = await api.get(`/agents/${agentId}`);
-      return response.data;
+      return await getWithETag(`/agents/${agentId}`);
     } catch (error) {
       throw new Error(
         error.response?.data?.detail || `Failed to fetch agent ${agentId}`
@@ -110,6 +129,30 @@ export const apiService = {
     }
   },
 
+  // Follow call status changes over server-sent events; returns an unsubscribe function
+  watchCall(callId, { onStatus, onError } = {}) {
+    const source = new EventSource(`${API_BASE_URL}/calls/${callId}/events`);
+
+    source.addEventListener('status', (event) => {
+      const call = JSON.parse(event.data);
+      onStatus?.(call);
+      if (call.call_status === 'ended' || call.call_status === 'error') {
+        source.close();
+      }
+    });
+
+    source.addEventListener('error', (event) => {
+      // Named "error" events come from the server; plain ones are connection
+      // drops, which EventSource retries with Last-Event-ID on its own
+      if (event.data) {
+        onError?.(JSON.parse(event.data));
+        source.close();
+      }
+    });
+
+    return () => source.close();
+  },
+
   // End call
   async endCall(callId) {
     try {
@@ -0,0 +1,149 @@
+# bench.py
+"""
+Latency of /agents and /web-call with a client per request vs the app's shared client.
+
+Runs a local stand-in for the Retell API that only lists agents at the old
+plural /v2/agents (so probing the newer spellings first costs round trips),
+answers after --latency-ms, and delays each new connection by --handshake-ms
+to stand in for TCP + TLS setup. Then calls both versions of the handlers in-process:
+
+- per-request: a new httpx.AsyncClient per request, probing agent then agents
+  every time (how main.py used to work)
+- shared: main.app (the retell_gateway core) with its lifespan run, so the
+  pool is warm, the agents endpoint known and the agent list cached
+
+Usage:
+    python bench.py --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    latency = 0.0
+    handshake = 0.0
+
+    def setup(self):
+        time.sleep(self.handshake)
+        super().setup()
+
+    def reply(self, status, payload):
+        time.sleep(self.latency)
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/v2/agents":
+            self.reply(200, [{"agent_id": f"agent_{n}", "name": f"Agent {n}"} for n in range(20)])
+        else:
+            self.reply(404, {"error": "not found"})
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path in ("/v2/create-web-call", "/v3/create-web-call"):
+            self.reply(201, {"call_id": "call_bench", "access_token": "token_bench"})
+        else:
+            self.reply(404, {"error": "not found"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_standin(latency: float, handshake: float) -> str:
+    StandIn.latency, StandIn.handshake = latency, handshake
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+async def per_request_agents(base_url: str, api_key: str):
+    """main.py's list_agents before the shared client."""
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        for ep in ("agent", "agents"):
+            r = await client.get(f"{base_url}/{ep}", headers={"Authorization": f"Bearer {api_key}"})
+            if r.status_code == 404:
+                continue
+            r.raise_for_status()
+            return r.json()
+
+
+async def per_request_web_call(base_url: str, api_key: str):
+    """main.py's create_web_call before the shared client."""
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        r = await client.post(f"{base_url}/create-web-call",
+                              headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                              json={"call_type": "web_call", "agent_id": "agent_1"})
+        r.raise_for_status()
+        return r.json()
+
+
+async def timed(func, requests: int) -> list:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    ordered = sorted(latencies)
+    p50, p99 = ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"  {name:<24} first={latencies[0]:7.1f}ms p50={p50:7.1f}ms p99={p99:7.1f}ms")
+
+
+async def run(args):
+    upstream = start_standin(args.latency_ms / 1000, args.handshake_ms / 1000)
+    os.environ["RETELL_API_KEY"] = "bench_key"
+    os.environ["RETELL_BASE_URL"] = upstream
+    import main
+
+    base_url = f"{upstream}/v2"
+    print(f"per-request client ({args.requests} sequential requests each):")
+    report("GET /agents", await timed(lambda: per_request_agents(base_url, "bench_key"), args.requests))
+    report("POST /web-call", await timed(lambda: per_request_web_call(base_url, "bench_key"), args.requests))
+
+    start = time.perf_counter()
+    async with main.gateway.lifespan(main.app):
+        print(f"shared client (startup warm-up {(time.perf_counter() - start) * 1000:.0f}ms):")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://app") as app:
+            async def agents():
+                (await app.get("/agents")).raise_for_status()
+
+            async def web_call():
+                (await app.post("/web-call", json={"agent_id": "agent_1"})).raise_for_status()
+
+            report("GET /agents", await timed(agents, args.requests))
+            report("POST /web-call", await timed(web_call, args.requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Upstream response time")
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="Added to each new upstream connection")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
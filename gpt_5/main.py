@@ -1,66 +1,35 @@
 # main.py
 import os
-from fastapi import FastAPI, HTTPException
+import sys
+from pathlib import Path
+from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
-import httpx
 import uvicorn
 
+# Make the shared retell_gateway package (at the repository root) importable
+for _root in Path(__file__).resolve().parents:
+    if (_root / "retell_gateway").is_dir():
+        if str(_root) not in sys.path:
+            sys.path.insert(0, str(_root))
+        break
+
+from retell_gateway import Gateway
+
 API_KEY = os.environ.get("RETELL_API_KEY", "")  # set this in .env or compose
-BASE_URL = "https://api.retellai.com/v2"
+# Connections opened to the API on startup, so the first requests skip the TLS handshake
+WARM_CONNECTIONS = int(os.environ.get("WARM_CONNECTIONS", 4))
 
-app = FastAPI(title="Retell Minimal Web Call")
+# Pooled client and cached agents behind /agents (a bare list, as this app
+# always served) and /web-call; the gateway reads RETELL_BASE_URL, so it can point at fake-retell
+gateway = Gateway(api_key=API_KEY, warm_connections=WARM_CONNECTIONS)
 
-class WebCallResponse(BaseModel):
-    call_id: str | None
-    access_token: str | None
+app = FastAPI(title="Retell Minimal Web Call", lifespan=gateway.lifespan)
+app.include_router(gateway.list_router)
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
-@app.get("/agents")
-async def list_agents():
-    if not API_KEY:
-        raise HTTPException(status_code=500, detail="RETELL_API_KEY not configured")
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # The API exposes list-agents or agent (pluralization may vary)
-        for ep in ("agent", "agents"):
-            r = await client.get(f"{BASE_URL}/{ep}", headers={"Authorization": f"Bearer {API_KEY}"})
-            if r.status_code == 404:
-                continue
-            try:
-                r.raise_for_status()
-            except httpx.HTTPStatusError as e:
-                raise HTTPException(status_code=500, detail=f"agents error: {e.response.text[:200]}")
-            data = r.json()
-            # docs usually wrap data in { data: [...] }
-            if isinstance(data, dict) and "data" in data:
-                return data["data"]
-            return data
-    raise HTTPException(status_code=500, detail="agents endpoint not found")
-
-@app.post("/web-call", response_model=WebCallResponse)
-async def create_web_call(payload: dict | None = None):
-    if not API_KEY:
-        raise HTTPException(status_code=500, detail="RETELL_API_KEY not configured")
-    agent_id = None
-    if payload and isinstance(payload, dict):
-        agent_id = payload.get("agent_id")
-    body = {"call_type": "web_call"}
-    if agent_id:
-        body["agent_id"] = agent_id
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.post(f"{BASE_URL}/create-web-call",
-                              headers={"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"},
-                              json=body)
-        try:
-            r.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=500, detail=f"create-web-call error: {e.response.text[:400]}")
-        data = r.json()
-        return {"call_id": data.get("call_id"), "access_token": data.get("access_token")}
-
 # Minimal HTML frontend (uses browser SDK to join call)
 INDEX_HTML = """<!doctype html>
 <html>
@@ -116,8 +85,8 @@ document.getElementById('loadAgents').onclick = async () => {
     if(!arr || arr.length===0){ container.textContent='No agents found'; return; }
     arr.forEach(a=>{
       const b = document.createElement('button');
-      b.textContent = (a.agent_id || a.id) + ' — ' + (a.name||'');
-      b.onclick = ()=>{ selectedAgent = a.agent_id || a.id; log('Selected agent '+ selectedAgent); updateButtons(); };
+      b.textContent = a.agent_id + ' — ' + a.agent_name;
+      b.onclick = ()=>{ selectedAgent = a.agent_id; log('Selected agent '+ selectedAgent); updateButtons(); };
       container.appendChild(b);
     });
     log('Agents loaded');
@@ -1,17 +1,27 @@
 import os
-import asyncio
-from typing import Optional, List
-from fastapi import FastAPI, HTTPException, Response
+import sys
+from pathlib import Path
+from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from retell import Retell
+
+# Make the shared retell_gateway package (at the repository root) importable
+for _root in Path(__file__).resolve().parents:
+    if (_root / "retell_gateway").is_dir():
+        if str(_root) not in sys.path:
+            sys.path.insert(0, str(_root))
+        break
+
+from retell_gateway import Gateway
 
 RETELL_API_KEY = os.getenv("RETELL_API_KEY", "")
 if not RETELL_API_KEY:
     print("[WARN] RETELL_API_KEY not set. Set it before creating calls.")
 
-app = FastAPI(title="Minimal Retell Web Call Demo", version="0.1.0")
+# Pooled client, cached normalized agents and the /agents + /web-call routes
+gateway = Gateway(api_key=RETELL_API_KEY, name="minimal_demo")
+
+app = FastAPI(title="Minimal Retell Web Call Demo", version="0.1.0", lifespan=gateway.lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,83 +31,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Simple singleton Retell client
-_retell_client: Optional[Retell] = None
-
-def get_client() -> Retell:
-    global _retell_client
-    if _retell_client is None:
-        if not RETELL_API_KEY:
-            raise HTTPException(status_code=500, detail="RETELL_API_KEY not configured")
-        _retell_client = Retell(api_key=RETELL_API_KEY)
-    return _retell_client
-
-class Agent(BaseModel):
-    agent_id: str
-    agent_name: str
-
-class AgentsResponse(BaseModel):
-    agents: List[Agent]
-    count: int
-
-class CreateWebCallRequest(BaseModel):
-    agent_id: str
-    metadata: dict = {}
-
-class WebCallResponse(BaseModel):
-    call_id: str
-    access_token: str
-    sample_rate: int = 24000
+app.include_router(gateway.router)
 
 @app.get("/health")
 async def health():
     return {"status": "ok", "api_key_configured": bool(RETELL_API_KEY)}
 
-@app.get("/agents", response_model=AgentsResponse)
-async def list_agents():
-    client = get_client()
-    loop = asyncio.get_running_loop()
-    try:
-        resp = await loop.run_in_executor(None, client.agent.list)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list agents: {e}")
-
-    raw = []
-    if hasattr(resp, "data"):
-        raw = resp.data
-    elif isinstance(resp, list):
-        raw = resp
-
-    agents = []
-    for a in raw:
-        agents.append(Agent(
-            agent_id=getattr(a, 'agent_id', getattr(a, 'id', 'unknown')),
-            agent_name=getattr(a, 'agent_name', getattr(a, 'name', 'Unnamed'))
-        ))
-
-    return AgentsResponse(agents=agents, count=len(agents))
-
-@app.post("/web-call", response_model=WebCallResponse)
-async def create_web_call(req: CreateWebCallRequest):
-    client = get_client()
-    loop = asyncio.get_running_loop()
-    try:
-        web_call = await loop.run_in_executor(
-            None,
-            lambda: client.call.create_web_call(agent_id=req.agent_id, metadata=req.metadata)
-        )
-    except Exception as e:
-        msg = str(e)
-        if "not found" in msg.lower():
-            raise HTTPException(status_code=404, detail=f"Agent {req.agent_id} not found")
-        raise HTTPException(status_code=500, detail=f"Failed to create web call: {msg}")
-
-    return WebCallResponse(
-        call_id=web_call.call_id,
-        access_token=web_call.access_token,
-        sample_rate=getattr(web_call, 'sample_rate', 24000)
-    )
-
 @app.get("/")
 async def root():
         return {"message": "Minimal Retell demo", "endpoints": ["/agents", "/web-call", "/health", "/call-demo"]}
@@ -1,18 +1,73 @@
 import os
 import json
+import time
 import asyncio
 import gradio as gr
 import httpx
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
-
-async def fetch_agents():
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(f"{BACKEND_URL}/agents")
-        r.raise_for_status()
-        data = r.json()
-        options = [(a['agent_name'], a['agent_id']) for a in data.get('agents', [])]
-        return options
+# How often the agent index is refreshed from the backend. Refreshes send the
+# last ETag, so an unchanged catalog costs a 304 and no parsing.
+AGENT_REFRESH_INTERVAL = float(os.getenv("AGENT_REFRESH_INTERVAL", "30"))
+
+# One pooled client for the whole process, shared by every session and handler
+client = httpx.AsyncClient(base_url=BACKEND_URL, timeout=20)
+
+
+class AgentIndex:
+    """The agent catalog, kept server-side: dropdown choices plus name/id lookups."""
+
+    def __init__(self):
+        self.choices = []       # (name, agent_id) pairs, as the dropdown shows them
+        self.ids_by_name = {}
+        self.names_by_id = {}
+        self.version = 0        # bumped whenever the catalog changes
+        self.error = None
+        self._etag = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, force=False):
+        """Re-fetch /agents if the index is older than AGENT_REFRESH_INTERVAL (or force)."""
+        async with self._lock:  # concurrent sessions share one fetch
+            if not force and time.monotonic() - self._loaded_at < AGENT_REFRESH_INTERVAL:
+                return
+            headers = {"If-None-Match": self._etag} if self._etag else {}
+            try:
+                r = await client.get("/agents", headers=headers)
+                if r.status_code != 304:
+                    r.raise_for_status()
+                    self._load(r.json().get("agents", []))
+                    self._etag = r.headers.get("etag")
+                self.error = None
+            except httpx.HTTPError as e:
+                self.error = str(e) or type(e).__name__
+            self._loaded_at = time.monotonic()
+
+    def _load(self, agents):
+        choices = [(a.get("agent_name") or a["agent_id"], a["agent_id"]) for a in agents]
+        if choices == self.choices:
+            return
+        self.choices = choices
+        self.ids_by_name = {name: aid for name, aid in choices}
+        self.names_by_id = {aid: name for name, aid in choices}
+        self.version += 1
+
+    def resolve(self, selected):
+        """The agent id for a dropdown value (an id, or a name typed in)."""
+        if selected in self.names_by_id:
+            return selected
+        return self.ids_by_name.get(selected)
+
+    def status(self):
+        if self.error:
+            return f"**Could not load agents:** {self.error}"
+        if not self.choices:
+            return "**No agents found.** Ensure your API key has agents configured."
+        return f"Loaded {len(self.choices)} agents."
+
+
+agent_index = AgentIndex()
 
 async def start_call(agent_id, metadata_json):
     if not agent_id:
@@ -23,12 +78,14 @@ async def start_call(agent_id, metadata_json):
     except json.JSONDecodeError as e:
         return f"Invalid metadata JSON: {e}", None, None
 
-    async with httpx.AsyncClient(timeout=20) as client:
+    try:
         payload = {"agent_id": agent_id, "metadata": metadata}
-        r = await client.post(f"{BACKEND_URL}/web-call", json=payload)
-        if r.status_code != 200:
-            return f"Error: {r.text}", None, None
-        data = r.json()
+        r = await client.post("/web-call", json=payload)
+    except httpx.HTTPError as e:
+        return f"Error: {e}", None, None
+    if r.status_code != 200:
+        return f"Error: {r.text}", None, None
+    data = r.json()
 
     # Provide details for using retell-client-js-sdk in browser
     curl_example = (
@@ -38,10 +95,6 @@ async def start_call(agent_id, metadata_json):
     )
     return "Call session created.", data['call_id'], curl_example
 
-async def refresh_agents_interface():
-    options = await fetch_agents()
-    return gr.update(choices=[o[0] for o in options], value=(options[0][0] if options else None)), json.dumps(options, indent=2)
-
 with gr.Blocks(title="Minimal Retell Web Call UI") as demo:
     gr.Markdown("# Minimal Retell Web Call Demo\nFetch agents, create web call session, then use credentials in JS.")
 
@@ -49,8 +102,11 @@ with gr.Blocks(title="Minimal Retell Web Call UI") as demo:
         refresh_btn = gr.Button("🔄 Refresh Agents", variant="secondary")
         status = gr.Markdown("Loading agents...")
 
-    agents_dropdown = gr.Dropdown(label="Agents (Name)", choices=[], value=None)
-    hidden_agent_map = gr.Textbox(label="Agent Map (name->id)", visible=False)
+    # Choices are (name, agent_id) pairs, so the selected value is already the id
+    agents_dropdown = gr.Dropdown(label="Agents (Name)", choices=[], value=None, filterable=True)
+    # Index version this browser session has, so timer ticks only ship changed catalogs
+    seen_version = gr.State(0)
+    refresh_timer = gr.Timer(AGENT_REFRESH_INTERVAL)
 
     metadata = gr.Textbox(label="Metadata JSON", value="{}", lines=4)
     start_btn = gr.Button("Create Web Call Session", variant="primary")
@@ -59,33 +115,35 @@ with gr.Blocks(title="Minimal Retell Web Call UI") as demo:
     call_id_box = gr.Textbox(label="Call ID")
     instructions = gr.Textbox(label="Usage Instructions", lines=6)
 
+    async def load_agents(force=False):
+        await agent_index.refresh(force=force)
+        choices = agent_index.choices
+        value = choices[0][1] if choices else None
+        return gr.update(choices=choices, value=value), agent_index.version, agent_index.status()
+
     async def init_load():
-        opts = await fetch_agents()
-        if not opts:
-            status_md = "**No agents found.** Ensure your API key has agents configured."
-            return gr.update(choices=[]), json.dumps([], indent=2), status_md
-        status_md = f"Loaded {len(opts)} agents."
-        return gr.update(choices=[o[0] for o in opts], value=opts[0][0]), json.dumps(opts, indent=2), status_md
-
-    def map_name_to_id(selected_name, mapping_json):
-        try:
-            arr = json.loads(mapping_json)
-            for name, aid in arr:
-                if name == selected_name:
-                    return aid
-        except Exception:
-            return None
-        return None
-
-    async def handle_start(selected_name, mapping_json, metadata_json):
-        agent_id = map_name_to_id(selected_name, mapping_json)
-        msg, call_id, details = await start_call(agent_id, metadata_json)
+        return await load_agents()
+
+    async def force_load():
+        return await load_agents(force=True)
+
+    async def refresh_tick(version):
+        await agent_index.refresh()
+        if agent_index.version == version:
+            return gr.update(), version, agent_index.status()
+        # Keep the current selection; only the choices change
+        return gr.update(choices=agent_index.choices), agent_index.version, agent_index.status()
+
+    async def handle_start(selected, metadata_json):
+        msg, call_id, details = await start_call(agent_index.resolve(selected), metadata_json)
         return msg, call_id, details
 
     # Events
-    demo.load(init_load, outputs=[agents_dropdown, hidden_agent_map, status])
-    refresh_btn.click(init_load, outputs=[agents_dropdown, hidden_agent_map, status])
-    start_btn.click(handle_start, inputs=[agents_dropdown, hidden_agent_map, metadata], outputs=[result_msg, call_id_box, instructions])
+    demo.load(init_load, outputs=[agents_dropdown, seen_version, status])
+    refresh_btn.click(force_load, outputs=[agents_dropdown, seen_version, status])
+    refresh_timer.tick(refresh_tick, inputs=[seen_version], outputs=[agents_dropdown, seen_version, status],
+                       show_progress="hidden")
+    start_btn.click(handle_start, inputs=[agents_dropdown, metadata], outputs=[result_msg, call_id_box, instructions])
 
 if __name__ == "__main__":
     demo.queue().launch(server_name="0.0.0.0", server_port=7860)
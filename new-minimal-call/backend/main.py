@@ -1,19 +1,167 @@
-import os, asyncio, json
+import os, asyncio, json, random, sys, time
+from collections import deque
+from pathlib import Path
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
 import uvicorn
-import httpx
 try:
   from retell import Retell as RetellSDK
 except Exception:
   RetellSDK = None
 
+# Make the shared retell_gateway package (at the repository root) importable
+for _root in Path(__file__).resolve().parents:
+  if (_root / "retell_gateway").is_dir():
+    if str(_root) not in sys.path:
+      sys.path.insert(0, str(_root))
+    break
+
+from retell_gateway import Gateway
+
 API_KEY = "key_a33923dece07f7dfae3e20c6149f"  # Hard coded per user request (NOT for production!)
-BASE_URL = "https://api.retellai.com/v2"
+# The SDK and the gateway both read RETELL_BASE_URL, so both paths can point at fake-retell
+
+# Transport selection: outcomes over the last TRANSPORT_WINDOW seconds per
+# transport decide which one goes first; TRANSPORT_PROBE_RATE of requests
+# try the other one first so it can prove itself healthy again
+TRANSPORT_WINDOW = float(os.environ.get("TRANSPORT_WINDOW", 60))
+TRANSPORT_PROBE_RATE = float(os.environ.get("TRANSPORT_PROBE_RATE", 0.05))
+# Success rates closer than this count as equal; latency decides
+TRANSPORT_SUCCESS_MARGIN = 0.1
+
+class TransportHealth:
+  """Success and latency of one transport over the last TRANSPORT_WINDOW seconds."""
+
+  def __init__(self):
+    self.outcomes = deque(maxlen=1000)  # (finished at, ok, seconds)
+
+  def record(self, ok: bool, seconds: float):
+    self.outcomes.append((time.monotonic(), ok, seconds))
+
+  def recent(self) -> deque:
+    cutoff = time.monotonic() - TRANSPORT_WINDOW
+    while self.outcomes and self.outcomes[0][0] < cutoff:
+      self.outcomes.popleft()
+    return self.outcomes
+
+  def success_rate(self) -> float:
+    outcomes = self.recent()
+    # Untried (or long unused) transports look healthy so they get traffic
+    if not outcomes:
+      return 1.0
+    return sum(ok for _, ok, _ in outcomes) / len(outcomes)
+
+  def latency(self) -> float:
+    outcomes = self.recent()
+    if not outcomes:
+      return 0.0
+    return sum(seconds for _, _, seconds in outcomes) / len(outcomes)
+
+  def healthier_than(self, other: "TransportHealth") -> bool:
+    rate, other_rate = self.success_rate(), other.success_rate()
+    if abs(rate - other_rate) > TRANSPORT_SUCCESS_MARGIN:
+      return rate > other_rate
+    return self.latency() <= other.latency()
+
+  def stats(self) -> dict:
+    return {"requests": len(self.recent()), "success_rate": round(self.success_rate(), 3),
+            "mean_latency_ms": round(self.latency() * 1000, 1)}
+
+class TransportSelector:
+  """Orders the SDK and raw HTTP transports by recent health."""
+
+  def __init__(self, names):
+    self.health = {name: TransportHealth() for name in names}
+
+  def order(self, names) -> list:
+    """names ordered healthiest first, except on an occasional probe of the others."""
+    ranked = sorted(names, key=lambda n: sum(self.health[o].healthier_than(self.health[n]) for o in names if o != n))
+    if len(ranked) > 1 and random.random() < TRANSPORT_PROBE_RATE:
+      ranked.append(ranked.pop(0))
+    return ranked
+
+  def record(self, name: str, ok: bool, seconds: float):
+    self.health[name].record(ok, seconds)
+
+  def stats(self) -> dict:
+    return {name: health.stats() for name, health in self.health.items()}
 
-app = FastAPI(title="Retell Minimal Call Demo (HTTPX)")
+selector = TransportSelector(["sdk", "http"])
+# Long-lived clients: the SDK's here, the raw HTTP one is the gateway's pooled client.
+# No SDK retries: falling back to the other transport is the retry
+sdk_client = RetellSDK(api_key=API_KEY, max_retries=0) if RetellSDK else None
+
+def upstream_answered(e: Exception) -> bool:
+  """True for errors the API itself returned for the request (4xx other than 429): the transport works."""
+  response = getattr(e, "response", None)
+  status = getattr(e, "status_code", None) or getattr(response, "status_code", None)
+  return isinstance(status, int) and 400 <= status < 500 and status != 429
+
+async def call_upstream(label: str, sdk_call, http_call):
+  """
+  Run one upstream operation over the healthiest transport, falling back to
+  the other if it fails. sdk_call (blocking, run in a thread) may be None
+  when the SDK can't do the operation.
+  """
+  names = ["sdk", "http"] if sdk_client and sdk_call else ["http"]
+  errors = []
+  for name in selector.order(names):
+    start = time.perf_counter()
+    try:
+      if name == "sdk":
+        result = await asyncio.get_running_loop().run_in_executor(None, sdk_call)
+      else:
+        result = await http_call()
+    except Exception as e:
+      answered = upstream_answered(e)
+      selector.record(name, answered, time.perf_counter() - start)
+      if answered:
+        # The other transport would get the same answer
+        raise HTTPException(status_code=404 if getattr(e, "status_code", None) == 404 else 500,
+                            detail=f"{label} error: {e}")
+      errors.append(f"{name}: {e}")
+      continue
+    selector.record(name, True, time.perf_counter() - start)
+    return result
+  raise HTTPException(status_code=500, detail=f"{label} error: " + "; ".join(errors))
+
+class SelectedUpstream:
+  """The gateway's upstream: each operation goes over the transport the selector picks."""
+
+  def __init__(self, client):
+    self.client = client
+
+  async def list_agents(self):
+    def sdk_list():
+      # retell-sdk 6 pages the list ({items, has_more, pagination_key})
+      agents, kwargs = [], {}
+      while True:
+        resp = sdk_client.agent.list(limit=1000, **kwargs)
+        if isinstance(resp, list):
+          return agents + resp
+        agents.extend(getattr(resp, 'items', None) or getattr(resp, 'data', None) or [])
+        if not getattr(resp, 'has_more', False) or not getattr(resp, 'pagination_key', None):
+          return agents
+        kwargs = {"pagination_key": resp.pagination_key}
+
+    return await call_upstream("agents", sdk_list, self.client.list_agents)
+
+  async def retrieve_agent(self, agent_id: str):
+    return await call_upstream("agent", lambda: sdk_client.agent.retrieve(agent_id),
+                               lambda: self.client.retrieve_agent(agent_id))
+
+  async def create_web_call(self, agent_id, metadata: dict):
+    # Without agent, cannot create web call via SDK
+    sdk_create = (lambda: sdk_client.call.create_web_call(agent_id=agent_id, metadata=metadata)) if agent_id else None
+    return await call_upstream("create call", sdk_create, lambda: self.client.create_web_call(agent_id, metadata))
+
+# Pooled client, cached normalized agents and the /agents + /web-call routes
+# (the list API this app always served)
+gateway = Gateway(api_key=API_KEY, name="minimal_call")
+gateway.upstream = SelectedUpstream(gateway.client)
+
+app = FastAPI(title="Retell Minimal Call Demo (HTTPX)", lifespan=gateway.lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,86 +171,11 @@ app.add_middleware(
     ,allow_headers=["*"]
 )
 
-class WebCallResponse(BaseModel):
-  call_id: str
-  access_token: str
+app.include_router(gateway.list_router)
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
-
-@app.get("/agents")
-async def list_agents():
-  # Prefer SDK if available
-  if RetellSDK:
-    try:
-      loop = asyncio.get_running_loop()
-      client = RetellSDK(api_key=API_KEY)
-      resp = await loop.run_in_executor(None, client.agent.list)
-      if hasattr(resp, 'data'):
-        return resp.data
-      return resp
-    except Exception as e:
-      # fall back to raw HTTP
-      pass
-  try:
-    async with httpx.AsyncClient(timeout=30.0) as client:
-      r = await client.get(f"{BASE_URL}/agent", headers={"Authorization": f"Bearer {API_KEY}"})
-      if r.status_code == 404:
-        # maybe plural
-        r = await client.get(f"{BASE_URL}/agents", headers={"Authorization": f"Bearer {API_KEY}"})
-      r.raise_for_status()
-      data = r.json()
-      if isinstance(data, dict) and 'data' in data:
-        return data['data']
-      return data
-  except Exception as e:
-    raise HTTPException(status_code=500, detail=f"agents error: {e}")
-
-@app.post("/web-call", response_model=WebCallResponse)
-async def create_web_call(payload: dict | None = None):
-  agent_id = None
-  if payload and isinstance(payload, dict):
-    agent_id = payload.get("agent_id")
-  if RetellSDK:
-    try:
-      loop = asyncio.get_running_loop()
-      client = RetellSDK(api_key=API_KEY)
-      def _create():
-        if agent_id:
-          return client.call.create_web_call(agent_id=agent_id, metadata={})
-        # Without agent, cannot create web call via SDK
-        raise ValueError("agent_id required for web call")
-      resp = await loop.run_in_executor(None, _create)
-      return {"call_id": getattr(resp, 'call_id', None), "access_token": getattr(resp, 'access_token', None)}
-    except Exception:
-      pass
-  # Raw HTTP fallback
-  try:
-    async with httpx.AsyncClient(timeout=30.0) as client:
-      body = {"call_type": "web_call"}
-      if agent_id:
-        body["agent_id"] = agent_id
-      errors = []
-      for ep in ("create-web-call",):
-        url = f"{BASE_URL}/{ep}"
-        try:
-          r = await client.post(url,
-                       headers={"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"},
-                       json=body)
-          if r.status_code == 404:
-            errors.append(f"{url} -> 404")
-            continue
-          r.raise_for_status()
-          data = r.json()
-          return {"call_id": data.get("call_id"), "access_token": data.get("access_token")}
-        except httpx.HTTPStatusError as he:
-          errors.append(f"{url} {he.response.status_code}: {he.response.text[:120]}")
-        except Exception as ie:
-          errors.append(f"{url} error {ie}")
-      raise HTTPException(status_code=500, detail="; ".join(errors))
-  except Exception as e:
-    raise HTTPException(status_code=500, detail=f"create call error: {e}")
+    return {"status": "ok", "transports": selector.stats()}
 
 INDEX_HTML = """<!DOCTYPE html>
 <html lang=\"en\">
@@ -172,7 +245,7 @@ INDEX_HTML = """<!DOCTYPE html>
         if(!agents || agents.length === 0){ container.textContent = 'No agents'; return; }
         agents.forEach(a => {
           const b = document.createElement('button');
-          b.textContent = `${a.agent_id} - ${a.name || ''}`;
+          b.textContent = `${a.agent_id} - ${a.agent_name}`;
           b.onclick = () => { selectedAgentId = a.agent_id; document.getElementById('selectedAgent').textContent = selectedAgentId; enableStart(); log('Selected agent '+ selectedAgentId); };
           container.appendChild(b);
         });
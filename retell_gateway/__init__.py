@@ -0,0 +1,27 @@
+"""
+Shared Retell gateway core for the Python apps in this repository.
+
+backend/, gpt_5/, new-minimal-call/ and minimal-retell-demo/ build on
+these pieces, so upstream I/O, caching and encoding work lands once:
+
+- RetellClient: pooled asyncio client for the Retell endpoints
+- normalize_agent: one agent shape from API dicts or SDK objects
+- AsyncTTLCache / LRUCache: stale-while-revalidate and immutable caches
+- EncodedPayload: JSON encoded once, with ETag and gzip/brotli variants
+- SharedPayloadCache: one payload shared by all workers on a host (mmap)
+- upstream_http_error: upstream failures as HTTPExceptions
+- Gateway: all of the above behind GET /agents and POST /web-call
+"""
+from retell_gateway.agents import normalize_agent
+from retell_gateway.cache import AsyncTTLCache, LRUCache, caches
+from retell_gateway.client import DEFAULT_BASE_URL, RetellClient
+from retell_gateway.errors import RetellAPIError, is_not_found, upstream_http_error
+from retell_gateway.gateway import Gateway, WebCallRequest, WebCallResponse
+from retell_gateway.responses import EncodedPayload, cached_json_response
+from retell_gateway.shared_cache import SharedPayloadCache
+
+__all__ = [
+    "AsyncTTLCache", "DEFAULT_BASE_URL", "EncodedPayload", "Gateway", "LRUCache", "RetellAPIError",
+    "RetellClient", "SharedPayloadCache", "WebCallRequest", "WebCallResponse", "cached_json_response", "caches",
+    "is_not_found", "normalize_agent", "upstream_http_error",
+]
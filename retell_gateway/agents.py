@@ -0,0 +1,37 @@
+from typing import Any
+
+_MISSING = object()
+
+
+def _field(agent: Any, *names: str, default: Any = None) -> Any:
+    """First present field of a dict or SDK object, trying names in order."""
+    for name in names:
+        value = agent.get(name, _MISSING) if isinstance(agent, dict) else getattr(agent, name, _MISSING)
+        if value is not _MISSING:
+            return value
+    return default
+
+
+def _plain(value: Any) -> Any:
+    """SDK models (e.g. response_engine) as plain, JSON-encodable dicts."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return value
+
+
+def normalize_agent(agent: Any, detail: bool = False) -> dict:
+    """
+    One agent from the Retell API (a dict or an SDK object) in the shape
+    every app serves. detail adds the prompt and webhook URL.
+    """
+    normalized = {
+        "agent_id": _field(agent, "agent_id", "id"),
+        "agent_name": _field(agent, "agent_name", "name", default="Unknown"),
+        "voice_id": _field(agent, "voice_id"),
+        "language": _field(agent, "language", default="en-US"),
+        "response_engine": _plain(_field(agent, "response_engine")),
+    }
+    if detail:
+        normalized["prompt"] = _field(agent, "prompt")
+        normalized["webhook_url"] = _field(agent, "webhook_url")
+    return normalized
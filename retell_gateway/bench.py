@@ -0,0 +1,97 @@
+"""
+Benchmark every app that mounts the gateway core, against one stand-in.
+
+Loads backend/, gpt_5/, new-minimal-call/ and minimal-retell-demo/ in this
+process, points them all at a local stand-in of the Retell API (with
+--latency of simulated network time), runs each app's startup, and prints
+p50/p99 latency for listing agents and creating a web call through each.
+
+Usage (from the repository root):
+    python -m retell_gateway.bench --requests 300 --latency 0.02
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# (name, entry point, agents path, web-call path)
+APPS = (
+    ("backend", "backend/main.py", "/agents/", "/calls/create-web-call"),
+    ("gpt_5", "gpt_5/main.py", "/agents", "/web-call"),
+    ("new-minimal-call", "new-minimal-call/backend/main.py", "/agents", "/web-call"),
+    ("minimal-retell-demo", "minimal-retell-demo/backend/main.py", "/agents", "/web-call"),
+)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def load_app(name, entry_point):
+    """Import an app's main.py under its own module name."""
+    path = ROOT / entry_point
+    # backend/main.py imports its sibling modules (config, routes, ...)
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(f"bench_{name.replace('-', '_')}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+async def timed(client, method, path, requests, **kwargs):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.request(method, path, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return latencies
+
+
+async def bench_app(app, agents_path, web_call_path, requests):
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            agents = await timed(client, "GET", agents_path, requests)
+            web_calls = await timed(client, "POST", web_call_path, requests, json={"agent_id": "agent_bench"})
+    return agents, web_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated upstream latency (s)")
+    args = parser.parse_args()
+
+    # The stand-in ships with the backend benchmarks
+    sys.path.insert(0, str(ROOT / "backend"))
+    from benchmarks.standin import base_url, start_standin
+
+    server = start_standin(latency=args.latency)
+    os.environ.setdefault("RETELL_API_KEY", "bench_key")
+    os.environ["RETELL_BASE_URL"] = base_url(server)
+    os.environ.setdefault("CALL_REGISTRY_PATH", os.path.join(tempfile.mkdtemp(), "calls.db"))
+
+    print(f"{args.requests} sequential requests per endpoint, {args.latency * 1000:.0f}ms upstream latency")
+    print(f"{'app':<22}{'GET agents p50/p99':>22}{'POST web-call p50/p99':>25}")
+    for name, entry_point, agents_path, web_call_path in APPS:
+        app = load_app(name, entry_point)
+        agents, web_calls = asyncio.run(bench_app(app, agents_path, web_call_path, args.requests))
+        print(f"{name:<22}"
+              f"{percentile(agents, 50):>11.2f} / {percentile(agents, 99):>6.2f}ms"
+              f"{percentile(web_calls, 50):>14.2f} / {percentile(web_calls, 99):>6.2f}ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import logging
+import time
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# All caches by name, for stats and invalidation (e.g. the backend admin routes)
+caches: Dict[str, Any] = {}
+
+
+class CacheEntry:
+    __slots__ = ("value", "created_at", "expires_at")
+
+    def __init__(self, value: Any, ttl: float):
+        self.value = value
+        self.created_at = time.monotonic()
+        self.expires_at = self.created_at + ttl
+
+
+class AsyncTTLCache:
+    """
+    In-process TTL cache with stale-while-revalidate and single-flight loads.
+
+    Fresh entries are served directly. Entries past their TTL but within
+    ``stale_ttl`` are served immediately while one background refresh runs.
+    Concurrent misses for the same key share a single in-flight load.
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float = 0.0):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[Hashable, CacheEntry] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        caches[name] = self
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, loading it with loader() if needed."""
+        if self.ttl <= 0:
+            self.misses += 1
+            return await loader()
+
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.expires_at:
+                self.hits += 1
+                return entry.value
+            if now < entry.expires_at + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh(key, loader)
+                return entry.value
+
+        self.misses += 1
+        # Shield so a disconnecting client does not cancel the shared load
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, self._generation))
+            task.add_done_callback(self._log_failure)
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        self.refreshes += 1
+        try:
+            value = await loader()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        # Drop results that raced with an invalidation
+        if generation == self._generation:
+            self._entries[key] = CacheEntry(value, self.ttl)
+        return value
+
+    def _log_failure(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Cache '{self.name}' refresh failed: {task.exception()}")
+
+    def invalidate(self, key: Optional[Hashable] = None) -> int:
+        """Drop one key, or every key when key is None. Returns entries removed."""
+        self._generation += 1
+        if key is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+        return 1 if self._entries.pop(key, None) is not None else 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+
+class LRUCache:
+    """Size-bounded cache for values that never change once stored."""
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        caches[name] = self
+
+    def get(self, key: Hashable) -> Any:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> int:
+        """Drop one key, or every key when key is None. Returns entries removed."""
+        if key is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+        return 1 if self._entries.pop(key, None) is not None else 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
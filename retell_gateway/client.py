@@ -0,0 +1,121 @@
+from typing import Any, Optional
+from retell_gateway.errors import RetellAPIError, error_message, parse_retry_after
+import asyncio
+import httpx
+import logging
+import os
+
+try:
+    import orjson
+except ImportError:  # response.json() is used instead
+    orjson = None
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.retellai.com"
+
+# Spellings of list-agents seen across API versions, tried in order until
+# one is not a 404; the working one is remembered. The first is the one the
+# SDK calls (retell-sdk 6): a paginated POST. The older ones are GETs
+# answering with the whole list.
+AGENT_LIST_PATHS = ("/v2/list-agents", "/list-agents", "/v2/agent", "/v2/agents")
+PAGED_AGENT_LIST_PATH = AGENT_LIST_PATHS[0]
+
+# Agents per /v2/list-agents page (the API's maximum)
+AGENT_PAGE_SIZE = 1000
+
+
+class RetellClient:
+    """
+    Pooled asyncio client for the Retell endpoints the apps share. Create
+    one per process and close it on shutdown.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, timeout: float = 30.0,
+                 limits: Optional[httpx.Limits] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = (base_url or os.environ.get("RETELL_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.agent_list_path: Optional[str] = None
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+            limits=limits or httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            transport=transport,
+        )
+
+    async def send(self, method: str, path: str, json: Optional[dict] = None, params: Optional[dict] = None,
+                   headers: Optional[dict] = None, extensions: Optional[dict] = None) -> httpx.Response:
+        """One request over the pool; see parse() for the body."""
+        return await self._client.request(method, path, json=json, params=params, headers=headers,
+                                          extensions=extensions)
+
+    @staticmethod
+    def parse(response: httpx.Response) -> Any:
+        """The decoded JSON body, or RetellAPIError for an error status."""
+        if response.status_code >= 400:
+            raise RetellAPIError(response.status_code, error_message(response),
+                                 parse_retry_after(response.headers.get("retry-after")))
+        if not response.content:
+            return None
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+
+    async def request(self, method: str, path: str, json: Optional[dict] = None) -> Any:
+        return self.parse(await self.send(method, path, json=json))
+
+    async def list_agents(self) -> list:
+        """Every agent, from the remembered list-agents path (probing again on a 404)."""
+        paths = AGENT_LIST_PATHS
+        if self.agent_list_path is not None:
+            paths = (self.agent_list_path,) + tuple(p for p in AGENT_LIST_PATHS if p != self.agent_list_path)
+        for path in paths:
+            if path == PAGED_AGENT_LIST_PATH:
+                response = await self._agent_page()
+            else:
+                response = await self.send("GET", path)
+            if response.status_code == 404:
+                continue
+            self.agent_list_path = path
+            data = self.parse(response)
+            if isinstance(data, list):
+                return data
+            data = data or {}
+            agents = list(data.get("items") or data.get("data") or [])
+            # Only /v2/list-agents pages; follow its cursor to the end
+            while data.get("has_more") and data.get("pagination_key"):
+                data = self.parse(await self._agent_page(data["pagination_key"])) or {}
+                agents.extend(data.get("items") or [])
+            return agents
+        self.agent_list_path = None
+        raise RetellAPIError(404, "list-agents endpoint not found")
+
+    async def _agent_page(self, pagination_key: Optional[str] = None) -> httpx.Response:
+        params = {"limit": AGENT_PAGE_SIZE}
+        if pagination_key:
+            params["pagination_key"] = pagination_key
+        return await self.send("POST", PAGED_AGENT_LIST_PATH, json={}, params=params)
+
+    async def retrieve_agent(self, agent_id: str) -> dict:
+        return await self.request("GET", f"/get-agent/{agent_id}")
+
+    async def create_web_call(self, agent_id: Optional[str], metadata: Optional[dict] = None) -> dict:
+        body = {"metadata": metadata or {}}
+        if agent_id:
+            body["agent_id"] = agent_id
+        return await self.request("POST", "/v3/create-web-call", json=body)
+
+    async def warm_up(self, connections: int) -> None:
+        """
+        Find the list-agents path and open up to `connections` pooled
+        connections, so the first requests skip connection (and TLS) setup.
+        """
+        await self.list_agents()
+        if connections > 1:
+            # Concurrent, so each opens its own connection; any answer will do
+            await asyncio.gather(*(self.send("HEAD", self.agent_list_path) for _ in range(connections)))
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,53 @@
+from email.utils import parsedate_to_datetime
+from fastapi import HTTPException
+from typing import Optional
+import httpx
+import time
+
+
+class RetellAPIError(Exception):
+    """Error response from the Retell API; retry_after is its Retry-After in seconds, if any"""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_not_found(error: Exception) -> bool:
+    """True if an upstream error means the requested resource does not exist."""
+    return getattr(error, "status_code", None) == 404 or "not found" in str(error).lower()
+
+
+def upstream_http_error(error: Exception, not_found: str, failure: str) -> HTTPException:
+    """Map an upstream error to the HTTPException a handler should raise."""
+    if isinstance(error, HTTPException):
+        return error  # already mapped, e.g. 503 from the upstream guard
+    if is_not_found(error):
+        return HTTPException(status_code=404, detail=not_found)
+    return HTTPException(status_code=500, detail=f"{failure}: {error}")
+
+
+def error_message(response: httpx.Response) -> str:
+    """The most useful message in a Retell error response."""
+    try:
+        data = response.json()
+    except ValueError:
+        return response.text[:400] or response.reason_phrase
+    if isinstance(data, dict):
+        return str(data.get("error_message") or data.get("message") or data.get("detail") or data)
+    return str(data)
@@ -0,0 +1,219 @@
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from pydantic import BaseModel
+from typing import Any, Optional
+from retell_gateway.agents import normalize_agent
+from retell_gateway.cache import AsyncTTLCache
+from retell_gateway.client import RetellClient
+from retell_gateway.errors import upstream_http_error
+from retell_gateway.responses import EncodedPayload, cached_json_response
+from retell_gateway.shared_cache import SharedPayloadCache
+import asyncio
+import logging
+import os
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+
+class WebCallRequest(BaseModel):
+    agent_id: str
+    metadata: dict = {}
+
+
+class WebCallResponse(BaseModel):
+    # Optional, as gpt_5 and new-minimal-call served them before the gateway
+    call_id: Optional[str] = None
+    access_token: Optional[str] = None
+    sample_rate: int = 24000
+
+
+def _web_call(web_call: Any) -> dict:
+    """A create-web-call result (dict or SDK object) as a WebCallResponse dict."""
+    get = web_call.get if isinstance(web_call, dict) else lambda name, default=None: getattr(web_call, name, default)
+    return {
+        "call_id": get("call_id"),
+        "access_token": get("access_token"),
+        "sample_rate": get("sample_rate") or 24000,
+    }
+
+
+class Gateway:
+    """
+    Agent listing and web call creation shared by the apps: one pooled
+    upstream client, normalized agents cached as pre-encoded (and
+    pre-compressed) payloads, and upstream errors mapped to HTTP errors.
+
+    Mount it with FastAPI(lifespan=gateway.lifespan) and
+    app.include_router(gateway.router), which serves GET /agents,
+    GET /agents/{agent_id} and POST /web-call. Apps whose clients expect
+    the older list API include gateway.list_router instead; see there.
+
+    upstream replaces the RetellClient with any object with the same
+    list_agents / retrieve_agent / create_web_call coroutines.
+
+    shared_cache_path (default: AGENT_SHARED_CACHE_PATH) shares the agent
+    list between all worker processes on a host; see SharedPayloadCache.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, upstream: Any = None, base_url: Optional[str] = None,
+                 agent_ttl: float = 30.0, agent_stale_ttl: float = 300.0, warm_connections: int = 4,
+                 name: str = "gateway", shared_cache_path: Optional[str] = None):
+        self.api_key = api_key if api_key is not None else os.environ.get("RETELL_API_KEY", "")
+        self.client = RetellClient(self.api_key, base_url)
+        self.upstream = upstream or self.client
+        self.warm_connections = warm_connections
+        self.agent_cache = AsyncTTLCache(f"{name}_agents", ttl=agent_ttl, stale_ttl=agent_stale_ttl)
+        self.agent_detail_cache = AsyncTTLCache(f"{name}_agent_details", ttl=agent_ttl,
+                                                stale_ttl=agent_stale_ttl)
+        shared_cache_path = shared_cache_path or os.environ.get("AGENT_SHARED_CACHE_PATH")
+        self.shared_agent_cache = None
+        if shared_cache_path:
+            self.shared_agent_cache = SharedPayloadCache(f"{name}_agents_shared", shared_cache_path,
+                                                         ttl=agent_ttl, stale_ttl=agent_stale_ttl)
+        self._agent_list = None  # (agents() payload it came from, bare list payload)
+        self.router = self._build_router()
+        self.list_router = self._build_list_router()
+
+    async def start(self) -> None:
+        """Warm the connection pool; failures only mean the first requests pay for it."""
+        if self.api_key and self.shared_agent_cache is not None:
+            self.shared_agent_cache.start(self._load_agents)
+        if not self.api_key or self.warm_connections <= 0:
+            return
+        try:
+            await self.client.warm_up(self.warm_connections)
+            logger.info(f"Retell gateway ready ({self.client.base_url}{self.client.agent_list_path})")
+        except Exception as e:
+            logger.warning(f"Retell gateway warm-up failed: {e!r}")
+
+    async def close(self) -> None:
+        if self.shared_agent_cache is not None:
+            await self.shared_agent_cache.stop()
+        await self.client.aclose()
+
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        await self.start()
+        try:
+            yield
+        finally:
+            await self.close()
+
+    async def _load_agents(self) -> EncodedPayload:
+        raw_agents = await self.upstream.list_agents()
+        logger.info(f"Retrieved {len(raw_agents)} agents")
+
+        def encode() -> EncodedPayload:
+            agents = [normalize_agent(agent) for agent in raw_agents]
+            return EncodedPayload({"agents": agents, "count": len(agents)}, compressed=True)
+
+        # Normalizing and compressing a large catalog takes a while; keep it off the loop
+        return await asyncio.to_thread(encode)
+
+    async def _load_agent(self, agent_id: str) -> EncodedPayload:
+        agent = await self.upstream.retrieve_agent(agent_id)
+        return await asyncio.to_thread(
+            lambda: EncodedPayload(normalize_agent(agent, detail=True), compressed=True)
+        )
+
+    async def agents(self) -> EncodedPayload:
+        """{"agents": [...], "count": n}, normalized and pre-encoded."""
+        if self.shared_agent_cache is not None:
+            return await self.shared_agent_cache.get(self._load_agents)
+        return await self.agent_cache.get("agents", self._load_agents)
+
+    async def agent_list(self) -> EncodedPayload:
+        """The agents of agents() as a bare JSON list, pre-encoded."""
+        payload = await self.agents()
+        cached = self._agent_list
+        if cached is None or cached[0] is not payload:
+            # Re-derived only when agents() hands out a new payload
+            cached = self._agent_list = (
+                payload,
+                await asyncio.to_thread(lambda: EncodedPayload(payload.value["agents"], compressed=True)),
+            )
+        return cached[1]
+
+    async def agent(self, agent_id: str) -> EncodedPayload:
+        return await self.agent_detail_cache.get(agent_id, lambda: self._load_agent(agent_id))
+
+    async def create_web_call(self, agent_id: Optional[str], metadata: Optional[dict] = None) -> dict:
+        return _web_call(await self.upstream.create_web_call(agent_id, metadata or {}))
+
+    def _require_key(self) -> None:
+        if not self.api_key:
+            raise HTTPException(status_code=500, detail="RETELL_API_KEY not configured")
+
+    def _build_router(self) -> APIRouter:
+        router = APIRouter(tags=["gateway"])
+
+        @router.get("/agents")
+        async def list_agents(request: Request):
+            """All agents, normalized; ETag-validated and compressed per Accept-Encoding."""
+            self._require_key()
+            try:
+                payload = await self.agents()
+            except Exception as e:
+                logger.error(f"Error listing agents: {e}")
+                raise upstream_http_error(e, "Agents not found", "Failed to fetch agents")
+            return cached_json_response(request, payload)
+
+        @router.get("/agents/{agent_id}")
+        async def get_agent(agent_id: str, request: Request):
+            """One agent, with its prompt and webhook URL."""
+            self._require_key()
+            try:
+                payload = await self.agent(agent_id)
+            except Exception as e:
+                logger.error(f"Error fetching agent {agent_id}: {e}")
+                raise upstream_http_error(e, f"Agent {agent_id} not found", "Failed to fetch agent")
+            return cached_json_response(request, payload)
+
+        @router.post("/web-call", response_model=WebCallResponse)
+        async def create_web_call(body: WebCallRequest):
+            """Create a web call; the browser SDK joins it with the access token."""
+            self._require_key()
+            try:
+                return await self.create_web_call(body.agent_id, body.metadata)
+            except Exception as e:
+                logger.error(f"Error creating web call for agent {body.agent_id}: {e}")
+                raise upstream_http_error(e, f"Agent {body.agent_id} not found", "Failed to create web call")
+
+        return router
+
+    def _build_list_router(self) -> APIRouter:
+        """
+        The API gpt_5 and new-minimal-call served before the gateway: GET
+        /agents is a bare list, POST /web-call takes any (or no) JSON body
+        with an optional agent_id, and upstream failures are 500s.
+        """
+        router = APIRouter(tags=["gateway"])
+
+        @router.get("/agents")
+        async def list_agents(request: Request):
+            """All agents, normalized, as a bare list; ETag-validated and compressed."""
+            self._require_key()
+            try:
+                payload = await self.agent_list()
+            except HTTPException:
+                raise  # already mapped by the upstream
+            except Exception as e:
+                logger.error(f"Error listing agents: {e}")
+                raise HTTPException(status_code=500, detail=f"agents error: {e}")
+            return cached_json_response(request, payload)
+
+        @router.post("/web-call", response_model=WebCallResponse)
+        async def create_web_call(payload: Optional[dict] = None):
+            """Create a web call; without an agent_id Retell decides whether that is allowed."""
+            self._require_key()
+            agent_id = payload.get("agent_id") if isinstance(payload, dict) else None
+            try:
+                return await self.create_web_call(agent_id)
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error creating web call for agent {agent_id}: {e}")
+                raise HTTPException(status_code=500, detail=f"create-web-call error: {e}")
+
+        return router
@@ -0,0 +1,131 @@
+from fastapi import Request
+from fastapi.responses import Response
+from typing import Any, Dict, Iterable
+import gzip
+import hashlib
+import json
+
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Content codings a payload can be pre-compressed with, preferred first
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Defaults for EncodedPayload(compressed=True)
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def encode_json(value: Any) -> bytes:
+    """Compact JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = GZIP_LEVEL,
+             brotli_quality: int = BROTLI_QUALITY) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class EncodedPayload:
+    """
+    A JSON payload serialized once, with a stable content-hash ETag.
+
+    With compressed=True, bodies of at least min_size bytes are also kept
+    gzip- (and brotli-) encoded, so serving them costs no encoding work.
+    Build large payloads off the event loop.
+    """
+
+    __slots__ = ("value", "body", "etag", "variants")
+
+    def __init__(self, value: Any, compressed: bool = False, min_size: int = COMPRESS_MIN_SIZE,
+                 gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY):
+        self.value = value
+        self.body = encode_json(value)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.variants: Dict[str, bytes] = {}
+        if compressed and len(self.body) >= min_size:
+            self.variants = {
+                encoding: compress(self.body, encoding, gzip_level, brotli_quality)
+                for encoding in ENCODINGS
+            }
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str]) -> str:
+    """
+    The preferred coding in available that the Accept-Encoding header
+    allows, or "identity".
+    """
+    if not accept_encoding:
+        return "identity"
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, number = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = "identity", 0.0
+    for encoding in available:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """Distinct strong ETag per content coding of the same payload."""
+    return etag if encoding == "identity" else f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    True if an If-None-Match header value matches etag (weak comparison),
+    in any of its content codings.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    variants = {etag} | {variant_etag(etag, encoding) for encoding in ENCODINGS}
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") in variants for tag in candidates)
+
+
+def cached_json_response(request: Request, payload: EncodedPayload, max_age: int = 0) -> Response:
+    """
+    Serve a pre-encoded payload in the best coding the client accepts, or
+    304 if the client already has it.
+    """
+    encoding = "identity"
+    if payload.variants:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), payload.variants)
+    headers = {
+        "ETag": variant_etag(payload.etag, encoding),
+        "Cache-Control": f"private, max-age={max_age}, must-revalidate",
+    }
+    if payload.variants:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match", ""), payload.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding == "identity":
+        return Response(content=payload.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=payload.variants[encoding], media_type="application/json", headers=headers)
@@ -0,0 +1,278 @@
+from typing import Any, Awaitable, Callable, Optional
+from retell_gateway.cache import caches
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: SharedPayloadCache is unavailable
+    fcntl = None
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, a little-endian u32 header length, a JSON header
+# ({"etag", "written_at", "sections": {coding: [offset, length]}}), then the
+# identity body and each compressed variant (offsets count from the end of
+# the header)
+MAGIC = b"RGWSHM01"
+_HEADER_LENGTH = struct.Struct("<I")
+
+# How often each worker checks leadership and the published file's age
+POLL_INTERVAL = 1.0
+# Wait after a failed refresh before the leader tries again
+RETRY_INTERVAL = 5.0
+# How often a reader with nothing to serve looks for the leader's file
+PUBLISH_POLL = 0.02
+
+
+class SharedPayload:
+    """
+    A published payload, served straight from the shared mapping: body and
+    variants are memoryviews into the file, so every worker on the host
+    serves the same page-cache pages and nothing is decoded per request.
+    """
+
+    __slots__ = ("etag", "written_at", "body", "variants")
+
+    def __init__(self, mapping: mmap.mmap):
+        view = memoryview(mapping)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("not a shared payload file")
+        (header_length,) = _HEADER_LENGTH.unpack_from(mapping, len(MAGIC))
+        start = len(MAGIC) + _HEADER_LENGTH.size
+        header = json.loads(bytes(view[start:start + header_length]))
+        base = start + header_length
+        self.etag = header["etag"]
+        self.written_at = header["written_at"]
+        sections = {
+            coding: view[base + offset:base + offset + length]
+            for coding, (offset, length) in header["sections"].items()
+        }
+        self.body = sections.pop("identity")
+        self.variants = sections
+
+    @property
+    def value(self) -> Any:
+        """The decoded payload; parses the whole body, so keep it off hot paths."""
+        return json.loads(bytes(self.body))
+
+
+def write_payload(path: str, payload: Any) -> None:
+    """
+    Publish an EncodedPayload at path. The file is written beside it and
+    renamed over it, so readers never see a partial file and keep their
+    old mapping until they next look.
+    """
+    sections = {"identity": payload.body, **payload.variants}
+    layout, offset = {}, 0
+    for coding, data in sections.items():
+        layout[coding] = [offset, len(data)]
+        offset += len(data)
+    header = json.dumps({"etag": payload.etag, "written_at": time.time(), "sections": layout}).encode()
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for data in sections.values():
+            f.write(data)
+    os.replace(temp_path, path)
+
+
+class SharedPayloadCache:
+    """
+    One pre-encoded payload (e.g. the agent list) shared by every worker
+    process on a host through a memory-mapped file.
+
+    Workers elect a leader with a non-blocking flock on path + ".lock"; the
+    leader republishes the file with loader() once it is ttl old, and every
+    worker serves the file's bytes in place, mapping it again only when it
+    has been replaced. The kernel drops the lock when the leader exits, and
+    another worker takes over within POLL_INTERVAL. A worker finding no
+    file (or one older than ttl + stale_ttl) waits up to publish_wait for
+    the leader, then loads on its own.
+    """
+
+    def __init__(self, name: str, path: str, ttl: float, stale_ttl: float = 0.0, publish_wait: float = 2.0):
+        if fcntl is None:
+            raise RuntimeError("SharedPayloadCache needs fcntl.flock (POSIX)")
+        self.name = name
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.publish_wait = publish_wait
+        self.leader = False
+        self._lock_fd: Optional[int] = None
+        self._loader: Optional[Callable[[], Awaitable[Any]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+        self._mapped_key = None
+        self._mapped: Optional[SharedPayload] = None
+        self._local: Optional[Any] = None  # fallback payload, when no file can be served
+        self._local_expires_at = 0.0
+        self._local_loading: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.remaps = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        caches[name] = self
+
+    def start(self, loader: Callable[[], Awaitable[Any]]) -> None:
+        """Join the election and keep the file fresh while leading."""
+        self._loader = loader
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # releases the lock for the other workers
+            self._lock_fd = None
+        self.leader = False
+
+    def _try_lead(self) -> bool:
+        if self.leader:
+            return True
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self.leader = True
+        logger.info(f"Shared cache '{self.name}': pid {os.getpid()} is the refresh leader")
+        return True
+
+    def read(self) -> Optional[SharedPayload]:
+        """The published payload, mapping the file again only if it was replaced."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key == self._mapped_key:
+            return self._mapped
+        try:
+            with open(self.path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            payload = SharedPayload(mapping)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Shared cache '{self.name}': unreadable {self.path}: {e}")
+            return None
+        # The old mapping is released once no response still uses its views
+        self._mapped_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._mapped = payload
+        self.remaps += 1
+        return payload
+
+    def _age(self, payload: Optional[SharedPayload]) -> float:
+        return float("inf") if payload is None else time.time() - payload.written_at
+
+    async def _publish(self) -> Any:
+        self.refreshes += 1
+        try:
+            payload = await self._loader()
+            await asyncio.to_thread(write_payload, self.path, payload)
+        except Exception:
+            self.refresh_errors += 1
+            self._retry_at = time.monotonic() + min(self.ttl, RETRY_INTERVAL)
+            raise
+        finally:
+            self._refreshing = None
+        return payload
+
+    def _refresh(self) -> asyncio.Task:
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._publish())
+        return self._refreshing
+
+    async def _run(self) -> None:
+        while True:
+            if self._try_lead() and self._age(self.read()) >= self.ttl and time.monotonic() >= self._retry_at:
+                try:
+                    await self._refresh()
+                except Exception as e:
+                    logger.warning(f"Shared cache '{self.name}' refresh failed: {e}")
+            await asyncio.sleep(min(self.ttl, POLL_INTERVAL))
+
+    async def get(self, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """The published payload, or (failing that) a payload loaded with loader()."""
+        payload = self.read()
+        age = self._age(payload)
+        if age < self.ttl:
+            self.hits += 1
+            return payload
+        if age < self.ttl + self.stale_ttl:
+            # The leader republishes on its next poll
+            self.stale_hits += 1
+            return payload
+
+        self.misses += 1
+        self._loader = self._loader or loader
+        if self._try_lead():
+            return await asyncio.shield(self._refresh())
+        # Another worker leads: give it a moment to publish (e.g. on a cold start)
+        deadline = time.monotonic() + self.publish_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(PUBLISH_POLL)
+            payload = self.read()
+            if self._age(payload) < self.ttl + self.stale_ttl:
+                return payload
+        if self._local is not None and time.monotonic() < self._local_expires_at:
+            return self._local
+        if self._local_loading is None:
+            self._local_loading = asyncio.ensure_future(self._load_local(loader))
+        return await asyncio.shield(self._local_loading)
+
+    async def _load_local(self, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            self._local = await loader()
+            self._local_expires_at = time.monotonic() + self.ttl
+        finally:
+            self._local_loading = None
+        return self._local
+
+    def invalidate(self, key: Any = None) -> int:
+        """Remove the published file, so every worker reloads. Returns files removed."""
+        self._local = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            return 0
+        return 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        payload = self.read()
+        return {
+            "entries": 0 if payload is None else 1,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "path": self.path,
+            "leader": self.leader,
+            "age": None if payload is None else round(self._age(payload), 3),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "remaps": self.remaps,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }